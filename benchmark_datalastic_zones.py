@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Measure a Datalastic collection cycle against a local mock HTTP server
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+from src.data_ingestion.ais_collectors import AISCollector
+
+# Simulated upstream latency per zone request
+RESPONSE_DELAY = 0.5
+VESSELS_PER_ZONE = 200
+OVERLAP = 50  # vessels each zone shares with the previous one
+
+
+async def start_mock_server(port: int):
+    """Serve /vessel_inradius with overlapping vessel sets per zone"""
+    requests = []
+
+    async def vessel_inradius(request):
+        zone = len(requests)
+        requests.append(time.perf_counter())
+        await asyncio.sleep(RESPONSE_DELAY)
+        first = zone * (VESSELS_PER_ZONE - OVERLAP)
+        data = [
+            {'mmsi': 200000000 + first + i, 'name': f'MOCK_{first + i}', 'type': 'Cargo',
+             'lat': float(request.query['lat']), 'lon': float(request.query['lon']),
+             'speed': 12.0, 'course': 90.0}
+            for i in range(VESSELS_PER_ZONE)
+        ]
+        return web.json_response({'success': True, 'data': data})
+
+    app = web.Application()
+    app.router.add_get('/api/v0/vessel_inradius', vessel_inradius)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner, requests
+
+
+async def main(port: int = 8765):
+    runner, requests = await start_mock_server(port)
+    collector = AISCollector({
+        'datalastic_api_key': 'mock',
+        'datalastic_base_url': f'http://127.0.0.1:{port}/api/v0',
+    })
+
+    try:
+        zones = collector._get_datalastic_zones()
+        for concurrency in (1, len(zones)):
+            collector.max_concurrent_zones = concurrency
+            requests.clear()
+            records = collector.datalastic_record_count
+            duplicates = collector.datalastic_duplicate_count
+            start = time.perf_counter()
+            vessels = await collector._collect_from_datalastic()
+            elapsed = time.perf_counter() - start
+            records = collector.datalastic_record_count - records
+            duplicates = collector.datalastic_duplicate_count - duplicates
+            print(f"concurrency={concurrency}: {len(requests)} zones in {elapsed:.2f}s, "
+                  f"{records} records, {duplicates} overlap duplicates dropped, "
+                  f"{records - duplicates} unique vessels ({len(vessels)} parsed)")
+        print(f"pool: {collector.http_pool.get_stats()}")
+    finally:
+        await collector.http_pool.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -74,6 +74,33 @@ def generate_data(count: int, format: str):
     print(f"✅ Generated {len(positions)} vessel positions")
 
 
+@cli.command()
+@click.option('--vessels', default=100000, help='Number of synthetic vessels')
+@click.option('--steps', default=100, help='Number of time steps per vessel')
+@click.option('--interval', default=60.0, help='Seconds between time steps')
+@click.option('--steps-per-batch', default=10, help='Time steps generated per batch')
+def generate_load(vessels: int, steps: int, interval: float, steps_per_batch: int):
+    """Generate a large vectorized synthetic feed and report throughput"""
+    
+    import time
+    
+    print(f"🌊 Generating {vessels * steps:,} positions ({vessels:,} vessels x {steps} steps)...")
+    
+    generator = SyntheticDataGenerator(seed=42)
+    start = time.perf_counter()
+    rows = 0
+    nbytes = 0
+    
+    for batch in generator.iter_position_batches(vessels, steps, interval_seconds=interval,
+                                                 steps_per_batch=steps_per_batch):
+        rows += len(batch)
+        nbytes += batch.nbytes
+    
+    elapsed = time.perf_counter() - start
+    print(f"✅ Generated {rows:,} rows ({nbytes / 1e6:,.0f} MB) in {elapsed:.2f}s "
+          f"({rows / elapsed:,.0f} rows/s)")
+
+
 @cli.command()
 @click.option('--port', default='SHANGHAI', help='Port name for congestion scenario')
 @click.option('--level', default=0.8, help='Congestion level (0.0 - 1.0)')
@@ -98,6 +125,23 @@ def simulate_congestion(port: str, level: float):
         print(f"❌ Error: {e}")
 
 
+@cli.command()
+@click.option('--messages', default=50000, help='Number of messages to publish')
+@click.option('--flush-latency', default=0.002, help='Simulated broker round trip per flush (seconds)')
+def benchmark_kafka(messages: int, flush_latency: float):
+    """Benchmark Kafka publishing against an in-process stub broker"""
+    
+    from src.data_ingestion.kafka_publisher import benchmark_publisher
+    
+    print(f"📨 Publishing {messages} messages to stub broker...")
+    
+    legacy = asyncio.run(benchmark_publisher(min(messages, 2000), flush_latency, batched=False))
+    batched = asyncio.run(benchmark_publisher(messages, flush_latency, batched=True))
+    
+    print(f"   - Flush per message: {legacy['messages_per_second']:,.0f} msg/s ({legacy['flushes']} flushes)")
+    print(f"   - Batched:           {batched['messages_per_second']:,.0f} msg/s ({batched['flushes']} flushes)")
+
+
 @cli.command()
 def status():
     """Show MaritimeFlow system status"""
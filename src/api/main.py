@@ -11,6 +11,7 @@ import time
 from typing import Callable
 
 from ..core.config import settings
+from ..data_ingestion.partitioning import get_position_history
 
 logger = structlog.get_logger(__name__)
 
@@ -111,6 +112,16 @@ def add_routes(app: FastAPI) -> None:
             "version": settings.app_version
         }
     
+    # Metrics endpoint
+    @app.get("/metrics")
+    async def metrics():
+        """Cache metrics"""
+        from .response_cache import get_response_cache
+        return {
+            "response_cache": get_response_cache().get_stats(),
+            "timestamp": time.time()
+        }
+    
     # Root endpoint
     @app.get("/")
     async def root():
@@ -133,11 +144,23 @@ def add_event_handlers(app: FastAPI) -> None:
         logger.info("Starting MaritimeFlow API server")
         logger.info(f"Debug mode: {settings.debug}")
         logger.info(f"API host: {settings.api_host}:{settings.api_port}")
+        
+        # Demo fleet and its synthetic history for the vessels API
+        from .routes import vessels
+        vessels.seed_demo_data()
+        
+        # Seal finished position partitions and drop expired ones
+        position_history = get_position_history()
+        if position_history is not None:
+            position_history.start_maintenance()
     
     @app.on_event("shutdown")
     async def shutdown_event():
         """Application shutdown handler"""
         logger.info("Shutting down MaritimeFlow API server")
+        position_history = get_position_history()
+        if position_history is not None:
+            await position_history.stop_maintenance()
 
 
 # Global exception handler
@@ -0,0 +1,166 @@
+"""
+Per-vessel response cache with ETag / Last-Modified revalidation
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from ..core.config import settings
+
+
+class CachedResponse:
+    """One rendered JSON body and its validators"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'expires_at', 'revision')
+
+    def __init__(self, body: bytes, etag: str, last_modified: float, expires_at: float, revision: int):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.revision = revision
+
+
+class ResponseCache:
+    """LRU cache of rendered per-vessel responses, invalidated by position revision"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.response_cache_ttl_seconds
+        self.max_entries = max_entries or settings.response_cache_max_entries
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hit_count = 0
+        self.miss_count = 0
+        self.not_modified_count = 0
+        self.invalidated_count = 0
+        self.evicted_count = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def window_end(self, now: Optional[float] = None) -> float:
+        """``now`` (epoch seconds) rounded up to the TTL, the end of open-ended time windows.
+
+        Requests within one TTL bucket resolve to the same window and share
+        an entry; the next bucket is a new key.
+        """
+        bucket = max(self.ttl_seconds, 1.0)
+        return math.ceil((time.time() if now is None else now) / bucket) * bucket
+
+    def get(self, key: Hashable, revision: int) -> Optional[CachedResponse]:
+        """Fresh entry for ``key`` built at ``revision``, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.revision != revision or entry.expires_at <= time.time()):
+                if entry.revision != revision:
+                    self.invalidated_count += 1
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.miss_count += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hit_count += 1
+            return entry
+
+    def put(self, key: Hashable, mmsi: int, revision: int, body: bytes,
+            last_modified: Optional[float] = None) -> CachedResponse:
+        """Store a rendered body"""
+        now = time.time()
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).hexdigest()
+        entry = CachedResponse(body, f'W/"{mmsi}-{revision}-{digest}"',
+                               last_modified if last_modified is not None else now,
+                               now + self.ttl_seconds, revision)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted_count += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hit_count + self.miss_count
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hit_count': self.hit_count,
+            'miss_count': self.miss_count,
+            'hit_rate': self.hit_count / lookups if lookups else 0.0,
+            'not_modified_count': self.not_modified_count,
+            'invalidated_count': self.invalidated_count,
+            'evicted_count': self.evicted_count
+        }
+
+
+def _not_modified(request: Request, entry: CachedResponse) -> bool:
+    """Whether the client's validators match the entry"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or entry.etag in tags or entry.etag[2:] in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return int(entry.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def cached_response(cache: ResponseCache, request: Request, mmsi: int, revision: int,
+                    build: Callable[[], bytes], media_type: str,
+                    last_modified: Optional[float] = None, window: Hashable = None) -> Response:
+    """Serve the body returned by ``build()`` through the cache, answering 304 when the client is current.
+
+    ``build`` runs only on a miss. ``window`` is the resolved time range the
+    body covers (e.g. ``(start, end)`` epoch seconds) and is part of the key
+    and ETag, so responses for defaulted ranges change as time moves on.
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())), window)
+    entry = cache.get(key, revision)
+    if entry is None:
+        entry = cache.put(key, mmsi, revision, build(), last_modified)
+
+    headers = {
+        'ETag': entry.etag,
+        'Last-Modified': formatdate(entry.last_modified, usegmt=True),
+        'Cache-Control': 'no-cache'
+    }
+    if _not_modified(request, entry):
+        cache.not_modified_count += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=media_type, headers=headers)
+
+
+def cached_json_response(cache: ResponseCache, request: Request, mmsi: int, revision: int,
+                         build: Callable[[], Any], last_modified: Optional[float] = None,
+                         window: Hashable = None) -> Response:
+    """``cached_response`` for a model, encoded like FastAPI encodes a returned model"""
+    return cached_response(cache, request, mmsi, revision,
+                           lambda: JSONResponse(jsonable_encoder(build())).body,
+                           'application/json', last_modified, window)
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache"""
+    return ResponseCache()
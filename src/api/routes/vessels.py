@@ -2,179 +2,427 @@
 Vessel API routes for vessel tracking and information
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from datetime import datetime, timedelta
+import numpy as np
 
 from ...models.vessel import (
     VesselResponse, VesselPositionResponse, VesselTrack, 
     VesselSummary, VesselType
 )
+from ...core.geo import haversine_nm, simplify_track, zoom_tolerance_nm
+from ..response_cache import cached_json_response, cached_response, get_response_cache
+from ..streaming import streaming_response
 from ...data_ingestion.synthetic_generator import SyntheticDataGenerator
+from ...data_ingestion.position_store import (
+    NAVIGATION_STATUSES, get_position_store, from_epoch, select_range, to_epoch
+)
+from ...data_ingestion.vessel_registry import get_vessel_registry
+from ...data_ingestion.partitioning import get_position_history
+from ...data_ingestion.position_cache import get_position_cache
+from ...data_ingestion.position_archive import get_position_archive
+from ...core.config import settings
+from ...data_ingestion.track_codec import TRACK_MEDIA_TYPE, encode_track
 
 router = APIRouter()
 
 # Initialize synthetic data generator for demo purposes
 synthetic_generator = SyntheticDataGenerator(seed=42)
 
+# Latest/recent positions written by the collectors
+position_store = get_position_store()
+
+# Latest positions shared by all API workers (None unless REDIS_POSITION_CACHE_ENABLED)
+position_cache = get_position_cache()
+
+# Rendered track/summary responses, invalidated by new positions
+response_cache = get_response_cache()
+
+# Partitioned database history (None unless POSITION_HISTORY_ENABLED)
+position_history = get_position_history()
+
+# Archived days older than the partitioned history (None unless ARCHIVE_HISTORY_ENABLED)
+position_archive = get_position_archive() if settings.archive_history_enabled else None
+
+# Vessel master data shared with the collectors
+vessel_registry = get_vessel_registry()
+
+
+def seed_demo_data(hours: int = 24):
+    """Register the demo fleet and give it synthetic hourly history (called on API startup)"""
+    vessel_registry.upsert_many(synthetic_generator.vessel_database)
+    start_time = datetime.utcnow() - timedelta(hours=hours - 1)
+    batch = synthetic_generator.generate_position_arrays(
+        len(synthetic_generator.vessel_database), hours, start_time, interval_seconds=3600
+    )
+    position_store.update_batch(batch)
+
+
+def _vessel_history(mmsi: int, start: float, end: Optional[float] = None,
+                    limit: Optional[int] = None):
+    """Positions for one vessel, chronological.
+    
+    Served from the position store's history ring when it reaches back to
+    ``start``, otherwise from the partitioned database history (touching
+    only the partitions that overlap the range) if it has any rows. The
+    part of the range older than both comes from the position archive
+    when it is enabled.
+    """
+    ring = position_store.recent(mmsi)
+    if ring is not None and len(ring['timestamp']) and ring['timestamp'][0] <= start:
+        return select_range(ring, start, end, limit)
+    
+    columns = None
+    if position_history is not None:
+        columns = position_history.query(mmsi, start=start, end=end, limit=limit)
+    if (columns is None or not len(columns['timestamp'])) and ring is not None:
+        columns = select_range(ring, start, end, limit)
+    
+    found = 0 if columns is None else len(columns['timestamp'])
+    if position_archive is None or (limit is not None and found >= limit):
+        return columns
+    
+    # Archived days before the oldest live row
+    archived = position_archive.track(mmsi, start, np.nextafter(columns['timestamp'][0], -np.inf) if found else end)
+    if archived is None or not len(archived['timestamp']):
+        return columns
+    if found:
+        archived = {name: np.concatenate([archived[name], columns[name]]) for name in columns}
+    return select_range(archived, limit=limit)
+
+
+async def _position_revision(mmsi: int):
+    """Revision of a vessel's positions and its last report time, for response caching"""
+    if position_cache is not None:
+        latest = await position_cache.get(mmsi)
+        if latest is None:
+            return 0, None
+        return int(latest['timestamp'] * 1e6), latest['timestamp']
+    latest = position_store.get(mmsi)
+    return position_store.revision_of(mmsi), latest['timestamp'] if latest else None
+
+
+def _data_source(mmsi: int) -> Optional[str]:
+    latest = position_store.get(mmsi)
+    return latest['data_source'] if latest else None
+
+
+def _parse_bounds(bounds: str):
+    """Parse a 'north,south,east,west' bounds string"""
+    try:
+        north, south, east, west = (float(v) for v in bounds.split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bounds must be 'north,south,east,west'")
+    
+    if not (-90 <= south <= north <= 90) or not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise HTTPException(status_code=400, detail="bounds are out of range")
+    
+    return north, south, east, west
+
+
+def _vessel_type_mmsis(vessel_types: str) -> np.ndarray:
+    """MMSIs of registered vessels of the given comma-separated types"""
+    try:
+        types = [VesselType(value.strip()) for value in vessel_types.split(',') if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="vessel_types must be comma-separated vessel types")
+    mmsis = {vessel['mmsi'] for vessel_type in types for vessel in vessel_registry.find(vessel_type=vessel_type)}
+    return np.fromiter(mmsis, dtype=np.int64, count=len(mmsis))
+
+
+def _get_vessel_or_404(mmsi: int) -> dict:
+    """Look up a vessel in the registry"""
+    vessel = vessel_registry.get(mmsi)
+    if not vessel:
+        raise HTTPException(status_code=404, detail="Vessel not found")
+    return vessel
+
+
+def _vessel_response(vessel: dict, last_updated: Optional[datetime] = None) -> VesselResponse:
+    """Build a vessel response model from a registry record"""
+    now = datetime.utcnow()
+    return VesselResponse(
+        mmsi=vessel['mmsi'],
+        vessel_name=vessel.get('vessel_name'),
+        vessel_type=vessel.get('vessel_type'),
+        length=vessel.get('length'),
+        max_speed=vessel.get('max_speed'),
+        flag_country=vessel.get('flag_country'),
+        first_seen=vessel.get('first_seen', now - timedelta(days=30)),
+        last_updated=last_updated or vessel.get('last_seen', now),
+        is_active=True
+    )
+
+
+def _position_responses(columns, mmsi: Optional[int] = None, data_source: Optional[str] = None,
+                        store=position_store) -> List[VesselPositionResponse]:
+    """Build response models from position store (or cache) columns.
+    
+    Snapshot columns carry their own mmsi/data_source codes, resolved by
+    ``store``; history columns belong to a single vessel given by ``mmsi``
+    and ``data_source``.
+    """
+    
+    def optional(values):
+        return [None if v != v else v for v in values.tolist()]  # NaN -> None
+    
+    if 'mmsi' in columns:
+        mmsis = columns['mmsi'].tolist()
+        sources = [store.source_name(code) for code in columns['data_source'].tolist()]
+    else:
+        mmsis = [mmsi] * len(columns['timestamp'])
+        sources = [data_source] * len(columns['timestamp'])
+    
+    latitudes = columns['latitude'].tolist()
+    longitudes = columns['longitude'].tolist()
+    courses = optional(columns['course_over_ground'])
+    speeds = optional(columns['speed_over_ground'])
+    headings = optional(columns['true_heading'])
+    statuses = columns['navigation_status'].tolist()
+    timestamps = columns['timestamp'].tolist()
+    
+    responses = []
+    for i in range(len(latitudes)):
+        timestamp = from_epoch(timestamps[i])
+        responses.append(VesselPositionResponse(
+            id=i,
+            mmsi=mmsis[i],
+            latitude=latitudes[i],
+            longitude=longitudes[i],
+            course_over_ground=courses[i],
+            speed_over_ground=speeds[i],
+            true_heading=headings[i],
+            navigation_status=NAVIGATION_STATUSES[statuses[i]] if statuses[i] >= 0 else None,
+            timestamp=timestamp,
+            message_timestamp=timestamp,
+            received_timestamp=timestamp,
+            data_source=sources[i] or "unknown"
+        ))
+    
+    return responses
+
 
 @router.get("/", response_model=List[VesselResponse])
 async def get_vessels(
-    limit: int = Query(100, description="Maximum number of vessels to return"),
+    limit: int = Query(100, ge=0, description="Maximum number of vessels to return"),
     vessel_type: Optional[VesselType] = Query(None, description="Filter by vessel type"),
     flag_country: Optional[str] = Query(None, description="Filter by flag country")
 ):
     """Get list of vessels with optional filtering"""
     
-    vessels = synthetic_generator.vessel_database[:limit]
-    
-    # Apply filters
-    if vessel_type:
-        vessels = [v for v in vessels if v.get('vessel_type') == vessel_type]
-    
-    if flag_country:
-        vessels = [v for v in vessels if v.get('flag_country') == flag_country]
-    
-    # Convert to response models
-    response_vessels = []
-    for vessel in vessels:
-        response_vessels.append(VesselResponse(
-            mmsi=vessel['mmsi'],
-            vessel_name=vessel['vessel_name'],
-            vessel_type=vessel['vessel_type'],
-            length=vessel['length'],
-            max_speed=vessel['max_speed'],
-            flag_country=vessel['flag_country'],
-            first_seen=datetime.utcnow() - timedelta(days=30),
-            last_updated=datetime.utcnow(),
-            is_active=True
-        ))
+    # Filters are answered from the registry's secondary indexes
+    vessels = vessel_registry.find(vessel_type=vessel_type, flag_country=flag_country, limit=limit)
     
-    return response_vessels
+    return [_vessel_response(vessel) for vessel in vessels]
+
+
+# Registered before the /{mmsi} routes so "live" is not parsed as an MMSI
+@router.get("/live/positions", response_model=List[VesselPositionResponse])
+async def get_live_positions(
+    bounds: Optional[str] = Query(None, description="Geographic bounds as 'north,south,east,west'"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Center latitude for a radius query"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Center longitude for a radius query"),
+    radius_nm: Optional[float] = Query(None, gt=0, description="Radius in nautical miles around lat/lon"),
+    vessel_types: Optional[str] = Query(None, description="Comma-separated vessel types"),
+    limit: int = Query(1000, ge=0, description="Maximum number of positions to return"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson|arrow)$",
+                                 description="Response format: json, or streamed ndjson/arrow")
+):
+    """Get live vessel positions within specified bounds"""
+    
+    if radius_nm is not None and (lat is None or lon is None):
+        raise HTTPException(status_code=400, detail="radius_nm requires lat and lon")
+    
+    # With a type filter the limit applies after filtering
+    type_mmsis = _vessel_type_mmsis(vessel_types) if vessel_types else None
+    query_limit = limit if type_mmsis is None else None
+    
+    if position_cache is not None:
+        # Shared across API workers
+        store = position_cache
+        if radius_nm is not None:
+            columns = await position_cache.within(lat, lon, radius_nm, query_limit)
+        elif bounds:
+            columns = await position_cache.in_bbox(*_parse_bounds(bounds), limit=query_limit)
+        else:
+            columns = await position_cache.snapshot(query_limit)
+    else:
+        store = position_store
+        if radius_nm is not None:
+            rows = position_store.rows_within(lat, lon, radius_nm)
+        elif bounds:
+            rows = position_store.rows_in_bbox(*_parse_bounds(bounds))
+        else:
+            rows = None
+        
+        if rows is None:
+            # Latest position of every vessel is one slice of the store
+            columns = position_store.snapshot(query_limit)
+        else:
+            columns = position_store.select(np.sort(rows)[:query_limit])
+    
+    if type_mmsis is not None:
+        keep = np.flatnonzero(np.isin(columns['mmsi'], type_mmsis))[:limit]
+        columns = {name: values[keep] for name, values in columns.items()}
+    
+    if response_format != "json":
+        return streaming_response(response_format, columns, store)
+    
+    return _position_responses(columns, store=store)
 
 
 @router.get("/{mmsi}", response_model=VesselResponse)
 async def get_vessel(mmsi: int):
     """Get detailed information about a specific vessel"""
     
-    # Find vessel in synthetic database
-    vessel = next((v for v in synthetic_generator.vessel_database if v['mmsi'] == mmsi), None)
+    vessel = _get_vessel_or_404(mmsi)
     
-    if not vessel:
-        raise HTTPException(status_code=404, detail="Vessel not found")
+    last_updated = None
+    if position_cache is not None:
+        latest = await position_cache.get(mmsi)
+        if latest is not None:
+            last_updated = from_epoch(latest['timestamp'])
     
-    return VesselResponse(
-        mmsi=vessel['mmsi'],
-        vessel_name=vessel['vessel_name'],
-        vessel_type=vessel['vessel_type'],
-        length=vessel['length'],
-        max_speed=vessel['max_speed'],
-        flag_country=vessel['flag_country'],
-        first_seen=datetime.utcnow() - timedelta(days=30),
-        last_updated=datetime.utcnow(),
-        is_active=True
-    )
+    return _vessel_response(vessel, last_updated)
 
 
 @router.get("/{mmsi}/positions", response_model=List[VesselPositionResponse])
 async def get_vessel_positions(
     mmsi: int,
     hours: int = Query(24, description="Number of hours of history to return"),
-    limit: int = Query(1000, description="Maximum number of positions to return")
+    limit: int = Query(1000, ge=0, description="Maximum number of positions to return"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson|arrow|compact)$",
+                                 description="Response format: json, streamed ndjson/arrow, or compact")
 ):
-    """Get position history for a specific vessel"""
+    """Get position history for a specific vessel.
     
-    # Find vessel in synthetic database
-    vessel = next((v for v in synthetic_generator.vessel_database if v['mmsi'] == mmsi), None)
+    ``format=compact`` returns the positions as one encoded track
+    (``track_codec``), roughly 8-10 bytes per point.
+    """
     
-    if not vessel:
-        raise HTTPException(status_code=404, detail="Vessel not found")
+    vessel = _get_vessel_or_404(mmsi)
     
-    # Generate synthetic position history
-    positions = []
-    current_time = datetime.utcnow()
+    # Recent history, newest first
+    start = to_epoch(datetime.utcnow() - timedelta(hours=hours))
+    columns = _vessel_history(mmsi, start, limit=limit)
+    if columns is None:
+        return []
     
-    for i in range(min(hours, limit)):
-        position_time = current_time - timedelta(hours=i)
-        position = synthetic_generator.generate_vessel_position(vessel, position_time)
-        
-        positions.append(VesselPositionResponse(
-            id=i,
-            mmsi=position.mmsi,
-            latitude=position.latitude,
-            longitude=position.longitude,
-            course_over_ground=position.course_over_ground,
-            speed_over_ground=position.speed_over_ground,
-            true_heading=position.true_heading,
-            navigation_status=position.navigation_status,
-            timestamp=position.timestamp,
-            message_timestamp=position.message_timestamp,
-            received_timestamp=position_time,
-            data_source=position.data_source
-        ))
+    columns = {name: values[::-1] for name, values in columns.items()}
+    data_source = _data_source(mmsi)
+    
+    if response_format == "compact":
+        return Response(encode_track(columns, mmsi, data_source), media_type=TRACK_MEDIA_TYPE)
     
-    return positions
+    if response_format != "json":
+        return streaming_response(response_format, columns, position_store,
+                                  mmsi=mmsi, data_source=data_source)
+    
+    return _position_responses(columns, mmsi=mmsi, data_source=data_source)
 
 
 @router.get("/{mmsi}/track", response_model=VesselTrack)
 async def get_vessel_track(
+    request: Request,
     mmsi: int,
     start_time: Optional[datetime] = Query(None, description="Start time for track"),
-    end_time: Optional[datetime] = Query(None, description="End time for track")
+    end_time: Optional[datetime] = Query(None, description="End time for track"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Simplification tolerance in nautical miles"),
+    max_points: Optional[int] = Query(None, ge=2, description="Maximum number of track points to return"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom level; simplifies to half a pixel"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson|arrow|compact)$",
+                                 description="Response format: json, streamed ndjson/arrow, or compact")
 ):
-    """Get vessel track with calculated metrics"""
+    """Get vessel track with calculated metrics.
     
-    # Find vessel in synthetic database
-    vessel = next((v for v in synthetic_generator.vessel_database if v['mmsi'] == mmsi), None)
+    ``tolerance``, ``zoom`` and ``max_points`` thin the returned positions
+    with Ramer-Douglas-Peucker; distance and speed metrics still use the
+    full track. Streamed and compact formats return only the track
+    positions. JSON and compact responses are cached per query (so per
+    zoom level) and time window until the vessel reports new positions and
+    carry ETag / Last-Modified validators. Without ``end_time`` the window
+    ends at the current time rounded up to the cache TTL.
+    """
     
-    if not vessel:
-        raise HTTPException(status_code=404, detail="Vessel not found")
+    vessel = _get_vessel_or_404(mmsi)
     
     # Set default time range
-    if not end_time:
-        end_time = datetime.utcnow()
+    open_ended = end_time is None
+    if open_ended:
+        end_time = from_epoch(response_cache.window_end())
     if not start_time:
         start_time = end_time - timedelta(hours=24)
     
-    # Generate vessel response
-    vessel_response = VesselResponse(
-        mmsi=vessel['mmsi'],
-        vessel_name=vessel['vessel_name'],
-        vessel_type=vessel['vessel_type'],
-        length=vessel['length'],
-        max_speed=vessel['max_speed'],
-        flag_country=vessel['flag_country'],
-        first_seen=datetime.utcnow() - timedelta(days=30),
-        last_updated=datetime.utcnow(),
-        is_active=True
+    if zoom is not None and tolerance is None:
+        tolerance = zoom_tolerance_nm(zoom)
+    
+    if response_format in ("ndjson", "arrow"):
+        columns = _vessel_history(mmsi, to_epoch(start_time), to_epoch(end_time))
+        if columns is None:
+            columns = position_store.snapshot(0)
+        else:
+            columns = _simplify(columns, tolerance, max_points)
+        return streaming_response(response_format, columns, position_store, mmsi=mmsi,
+                                  data_source=_data_source(mmsi))
+    
+    revision, last_modified = await _position_revision(mmsi)
+    window = (to_epoch(start_time), to_epoch(end_time))
+    if open_ended:
+        # The body moves with the window, not only with new positions
+        last_modified = None
+    if response_format == "compact":
+        return cached_response(
+            response_cache, request, mmsi, revision,
+            lambda: _encode_track(mmsi, start_time, end_time, tolerance, max_points),
+            TRACK_MEDIA_TYPE, last_modified, window
+        )
+    
+    return cached_json_response(
+        response_cache, request, mmsi, revision,
+        lambda: _build_track(vessel, mmsi, start_time, end_time, tolerance, max_points), last_modified, window
     )
+
+
+def _simplify(columns, tolerance: Optional[float], max_points: Optional[int]):
+    """Track columns thinned by RDP simplification (unchanged when neither option is given)"""
+    if tolerance is None and max_points is None:
+        return columns
+    keep = simplify_track(columns['latitude'], columns['longitude'], tolerance, max_points)
+    return {name: values[keep] for name, values in columns.items()}
+
+
+def _encode_track(mmsi: int, start_time: datetime, end_time: datetime,
+                  tolerance: Optional[float] = None, max_points: Optional[int] = None) -> bytes:
+    """Track positions as one encoded track"""
+    columns = _vessel_history(mmsi, to_epoch(start_time), to_epoch(end_time))
+    if columns is None:
+        columns = position_store.snapshot(0)
+    return encode_track(_simplify(columns, tolerance, max_points), mmsi, _data_source(mmsi))
+
+
+def _build_track(vessel: dict, mmsi: int, start_time: datetime, end_time: datetime,
+                 tolerance: Optional[float] = None, max_points: Optional[int] = None) -> VesselTrack:
+    """Track response with metrics computed over the full position arrays"""
     
-    # Generate position history
-    positions = []
-    hours_diff = int((end_time - start_time).total_seconds() / 3600)
+    # Generate vessel response
+    vessel_response = _vessel_response(vessel)
     
-    for i in range(hours_diff):
-        position_time = start_time + timedelta(hours=i)
-        position = synthetic_generator.generate_vessel_position(vessel, position_time)
-        
-        positions.append(VesselPositionResponse(
-            id=i,
-            mmsi=position.mmsi,
-            latitude=position.latitude,
-            longitude=position.longitude,
-            course_over_ground=position.course_over_ground,
-            speed_over_ground=position.speed_over_ground,
-            true_heading=position.true_heading,
-            navigation_status=position.navigation_status,
-            timestamp=position.timestamp,
-            message_timestamp=position.message_timestamp,
-            received_timestamp=position_time,
-            data_source=position.data_source
-        ))
+    # Position history (store ring or partitioned history)
+    columns = _vessel_history(mmsi, to_epoch(start_time), to_epoch(end_time))
     
-    # Calculate track metrics
-    total_distance = len(positions) * 10.0  # Simplified calculation
-    average_speed = sum(p.speed_over_ground or 0 for p in positions) / len(positions) if positions else 0
+    positions = []
+    total_distance = 0.0
+    average_speed = 0.0
+    if columns is not None and len(columns['timestamp']):
+        # Calculate track metrics over the position arrays
+        lat, lon = columns['latitude'], columns['longitude']
+        total_distance = float(np.sum(haversine_nm(lat[:-1], lon[:-1], lat[1:], lon[1:])))
+        speeds = columns['speed_over_ground']
+        average_speed = float(np.nanmean(speeds)) if np.any(~np.isnan(speeds)) else 0.0
+        
+        positions = _position_responses(_simplify(columns, tolerance, max_points),
+                                        mmsi=mmsi, data_source=_data_source(mmsi))
     
     return VesselTrack(
         vessel=vessel_response,
@@ -189,25 +437,30 @@ async def get_vessel_track(
 
 
 @router.get("/{mmsi}/summary", response_model=VesselSummary)
-async def get_vessel_summary(mmsi: int):
-    """Get vessel operational summary and statistics"""
+async def get_vessel_summary(request: Request, mmsi: int):
+    """Get vessel operational summary and statistics (cached like an open-ended track)"""
     
-    # Find vessel in synthetic database
-    vessel = next((v for v in synthetic_generator.vessel_database if v['mmsi'] == mmsi), None)
+    vessel = _get_vessel_or_404(mmsi)
     
-    if not vessel:
-        raise HTTPException(status_code=404, detail="Vessel not found")
+    revision, _ = await _position_revision(mmsi)
+    now = response_cache.window_end()
+    return cached_json_response(response_cache, request, mmsi, revision,
+                                lambda: _build_summary(vessel, mmsi, from_epoch(now)), window=(now,))
+
+
+def _build_summary(vessel: dict, mmsi: int, now: datetime) -> VesselSummary:
+    """Summary response for a vessel as of ``now``"""
     
     # Generate synthetic summary data
     return VesselSummary(
         mmsi=mmsi,
-        vessel_name=vessel['vessel_name'],
+        vessel_name=vessel.get('vessel_name'),
         total_positions=1440,  # 24 hours * 60 positions
-        first_position=datetime.utcnow() - timedelta(days=30),
-        last_position=datetime.utcnow(),
+        first_position=now - timedelta(days=30),
+        last_position=now,
         total_distance=12500.0,  # nautical miles
         average_speed=15.2,
-        max_speed=vessel['max_speed'],
+        max_speed=vessel.get('max_speed') or 0.0,
         ports_visited=8,
         time_at_sea=720.0,  # hours
         time_in_port=48.0,  # hours
@@ -215,37 +468,3 @@ async def get_vessel_summary(mmsi: int):
         route_optimization_score=78.3,
         safety_score=95.1
     )
-
-
-@router.get("/live/positions", response_model=List[VesselPositionResponse])
-async def get_live_positions(
-    bounds: Optional[str] = Query(None, description="Geographic bounds as 'north,south,east,west'"),
-    vessel_types: Optional[str] = Query(None, description="Comma-separated vessel types"),
-    limit: int = Query(1000, description="Maximum number of positions to return")
-):
-    """Get live vessel positions within specified bounds"""
-    
-    current_time = datetime.utcnow()
-    
-    # Generate synthetic live positions
-    positions = synthetic_generator.generate_batch_positions(limit, current_time)
-    
-    # Convert to response models
-    response_positions = []
-    for i, position in enumerate(positions):
-        response_positions.append(VesselPositionResponse(
-            id=i,
-            mmsi=position.mmsi,
-            latitude=position.latitude,
-            longitude=position.longitude,
-            course_over_ground=position.course_over_ground,
-            speed_over_ground=position.speed_over_ground,
-            true_heading=position.true_heading,
-            navigation_status=position.navigation_status,
-            timestamp=position.timestamp,
-            message_timestamp=position.message_timestamp,
-            received_timestamp=current_time,
-            data_source=position.data_source
-        ))
-    
-    return response_positions 
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""
+Streaming NDJSON and Arrow IPC encoders for position query results
+"""
+
+import json
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+# Optional imports
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+from ..data_ingestion.position_store import NAVIGATION_STATUSES, PositionStore
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+STREAM_FORMATS = ("json", "ndjson", "arrow")
+
+# Rows encoded per chunk written to the socket
+DEFAULT_CHUNK_ROWS = 2000
+
+_NAV_STATUS_VALUES = [status.value for status in NAVIGATION_STATUSES]
+
+
+def _iso_timestamps(epochs: np.ndarray) -> list:
+    """ISO 8601 UTC strings for epoch seconds, formatted like the JSON responses' datetimes"""
+    micros = np.round(epochs * 1e6).astype(np.int64).astype('datetime64[us]')
+    return [value[:-7] if value.endswith('.000000') else value
+            for value in np.datetime_as_string(micros, unit='us').tolist()]
+
+
+def _chunk_columns(columns: Dict[str, np.ndarray], store: PositionStore, mmsi: Optional[int],
+                   data_source: Optional[str], start: int, end: int) -> Dict[str, list]:
+    """Python lists for rows [start, end) with statuses, sources and NaNs resolved"""
+
+    def optional(values):
+        return [None if v != v else v for v in values[start:end].tolist()]
+
+    n = end - start
+    if 'mmsi' in columns:
+        mmsis = columns['mmsi'][start:end].tolist()
+        sources = [store.source_name(code) for code in columns['data_source'][start:end].tolist()]
+    else:
+        mmsis = [mmsi] * n
+        sources = [data_source] * n
+
+    return {
+        'mmsi': mmsis,
+        'latitude': columns['latitude'][start:end].tolist(),
+        'longitude': columns['longitude'][start:end].tolist(),
+        'course_over_ground': optional(columns['course_over_ground']),
+        'speed_over_ground': optional(columns['speed_over_ground']),
+        'true_heading': optional(columns['true_heading']),
+        'navigation_status': [_NAV_STATUS_VALUES[c] if c >= 0 else None
+                              for c in columns['navigation_status'][start:end].tolist()],
+        'timestamp': _iso_timestamps(columns['timestamp'][start:end]),
+        'data_source': sources,
+    }
+
+
+def iter_ndjson(columns: Dict[str, np.ndarray], store: PositionStore, mmsi: Optional[int] = None,
+                data_source: Optional[str] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode position columns as NDJSON, one chunk of ``chunk_rows`` lines at a time.
+
+    Timestamps are ISO 8601 UTC strings, as in the JSON responses, formatted
+    a chunk at a time without per-row datetime objects.
+    """
+    total = len(columns['timestamp'])
+    for start in range(0, total, chunk_rows):
+        chunk = _chunk_columns(columns, store, mmsi, data_source, start, min(start + chunk_rows, total))
+        names = list(chunk)
+        lines = [json.dumps(dict(zip(names, row)), separators=(',', ':')) for row in zip(*chunk.values())]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the stream generator"""
+
+    def __init__(self):
+        self._parts = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_arrow(columns: Dict[str, np.ndarray], store: PositionStore, mmsi: Optional[int] = None,
+               data_source: Optional[str] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode position columns as an Arrow IPC stream, one record batch per chunk"""
+    total = len(columns['timestamp'])
+    schema = pa.schema([
+        ('mmsi', pa.int64()),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+        ('course_over_ground', pa.float32()),
+        ('speed_over_ground', pa.float32()),
+        ('true_heading', pa.float32()),
+        ('navigation_status', pa.dictionary(pa.int8(), pa.string())),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('data_source', pa.string()),
+    ])
+    nav_dictionary = pa.array(_NAV_STATUS_VALUES)
+
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.take()
+
+    for start in range(0, total, chunk_rows):
+        end = min(start + chunk_rows, total)
+        if 'mmsi' in columns:
+            mmsis = columns['mmsi'][start:end]
+            sources = [store.source_name(code) for code in columns['data_source'][start:end].tolist()]
+        else:
+            mmsis = np.full(end - start, mmsi, dtype=np.int64)
+            sources = [data_source] * (end - start)
+
+        status = columns['navigation_status'][start:end]
+        batch = pa.record_batch([
+            pa.array(mmsis, pa.int64()),
+            pa.array(columns['latitude'][start:end]),
+            pa.array(columns['longitude'][start:end]),
+            pa.array(columns['course_over_ground'][start:end], from_pandas=True),
+            pa.array(columns['speed_over_ground'][start:end], from_pandas=True),
+            pa.array(columns['true_heading'][start:end], from_pandas=True),
+            pa.DictionaryArray.from_arrays(pa.array(status, mask=status < 0), nav_dictionary),
+            pa.array((columns['timestamp'][start:end] * 1e6).astype('int64'), pa.int64())
+              .cast(pa.timestamp('us', tz='UTC')),
+            pa.array(sources, pa.string()),
+        ], schema=schema)
+        writer.write_batch(batch)
+        yield sink.take()
+
+    writer.close()
+    yield sink.take()
+
+
+def streaming_response(response_format: str, columns: Dict[str, np.ndarray], store: PositionStore,
+                       mmsi: Optional[int] = None, data_source: Optional[str] = None) -> StreamingResponse:
+    """Stream position columns in ``ndjson`` or ``arrow`` format.
+
+    The columns are copied first: they may be views of the live store,
+    which collectors keep writing while the response is being sent.
+    """
+    if response_format in ("ndjson", "arrow"):
+        columns = {name: np.array(values) for name, values in columns.items()}
+
+    if response_format == "ndjson":
+        return StreamingResponse(iter_ndjson(columns, store, mmsi, data_source), media_type=NDJSON_MEDIA_TYPE)
+
+    if response_format == "arrow":
+        if not ARROW_AVAILABLE:
+            raise HTTPException(status_code=406, detail="Arrow output requires pyarrow to be installed")
+        return StreamingResponse(iter_arrow(columns, store, mmsi, data_source), media_type=ARROW_MEDIA_TYPE)
+
+    raise HTTPException(status_code=400, detail=f"Unsupported streaming format: {response_format}")
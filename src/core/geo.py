@@ -0,0 +1,131 @@
+"""
+Vectorized geodesy helpers shared by ingestion and the API
+"""
+
+import numpy as np
+
+# Mean Earth radius in nautical miles
+EARTH_RADIUS_NM = 3440.065
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Great-circle distance in nautical miles (inputs in degrees, broadcastable)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """Initial great-circle bearing in degrees [0, 360) from point 1 to point 2"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(x, y)) % 360.0
+
+
+def interpolate_great_circle(lat1, lon1, lat2, lon2, fraction):
+    """Point at ``fraction`` of the way along the great circle from point 1 to point 2"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    fraction = np.asarray(fraction, dtype=np.float64)
+
+    # Unit vectors of both endpoints
+    p1 = np.stack([np.cos(lat1) * np.cos(lon1), np.cos(lat1) * np.sin(lon1), np.sin(lat1)])
+    p2 = np.stack([np.cos(lat2) * np.cos(lon2), np.cos(lat2) * np.sin(lon2), np.sin(lat2)])
+
+    omega = np.arccos(np.clip(np.sum(p1 * p2, axis=0), -1.0, 1.0))
+    sin_omega = np.sin(omega)
+    degenerate = sin_omega < 1e-12
+    safe = np.where(degenerate, 1.0, sin_omega)
+    a = np.where(degenerate, 1.0 - fraction, np.sin((1.0 - fraction) * omega) / safe)
+    b = np.where(degenerate, fraction, np.sin(fraction * omega) / safe)
+
+    x, y, z = a * p1 + b * p2
+    lat = np.degrees(np.arctan2(z, np.sqrt(x ** 2 + y ** 2)))
+    lon = np.degrees(np.arctan2(y, x))
+    return lat, lon
+
+
+def _local_xy(lat, lon):
+    """Equirectangular projection to nautical miles around the mean latitude (antimeridian-safe)"""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.unwrap(np.asarray(lon, dtype=np.float64), period=360.0)
+    x = lon * 60.0 * np.cos(np.radians(np.mean(lat)))
+    return x, lat * 60.0
+
+
+def rdp_importance(lat, lon):
+    """Ramer-Douglas-Peucker significance of every point of a track, in nautical miles.
+
+    All segments at one recursion depth are split in a single vectorized
+    pass. A point's value is the distance at which RDP would keep it
+    (capped by its parent's, so values never increase down the tree):
+    ``importance > tolerance`` is exactly the RDP result for that
+    tolerance, and the top ``k`` values give a nested ``k``-point track.
+    Endpoints are ``inf``.
+    """
+    n = len(lat)
+    importance = np.full(n, np.inf)
+    if n <= 2:
+        return importance
+    importance[1:-1] = 0.0
+    x, y = _local_xy(lat, lon)
+
+    starts = np.array([0])
+    ends = np.array([n - 1])
+    parent = np.array([np.inf])
+    while len(starts):
+        lengths = ends - starts - 1
+        active = lengths > 0
+        starts, ends, parent, lengths = starts[active], ends[active], parent[active], lengths[active]
+        if not len(starts):
+            break
+
+        # Interior points of every segment, concatenated
+        offsets = np.cumsum(lengths) - lengths
+        segment = np.repeat(np.arange(len(starts)), lengths)
+        idx = starts[segment] + 1 + np.arange(int(lengths.sum())) - offsets[segment]
+
+        ax, ay = x[starts][segment], y[starts][segment]
+        dx, dy = x[ends][segment] - ax, y[ends][segment] - ay
+        chord = np.hypot(dx, dy)
+        distance = np.where(chord > 0,
+                            np.abs(dx * (ay - y[idx]) - dy * (ax - x[idx])) / np.where(chord > 0, chord, 1.0),
+                            np.hypot(x[idx] - ax, y[idx] - ay))
+
+        # Farthest point of each segment (first one on ties)
+        farthest = np.maximum.reduceat(distance, offsets)
+        position = np.where(distance == farthest[segment], np.arange(len(distance)), len(distance))
+        split = idx[np.minimum.reduceat(position, offsets)]
+
+        value = np.minimum(farthest, parent)
+        importance[split] = value
+        starts, ends = np.concatenate([starts, split]), np.concatenate([split, ends])
+        parent = np.concatenate([value, value])
+
+    return importance
+
+
+def simplify_track(lat, lon, tolerance_nm=None, max_points=None):
+    """Indices of the points kept by RDP simplification, in track order.
+
+    ``tolerance_nm`` drops points closer than that to the simplified line;
+    ``max_points`` keeps at most that many of the most significant points.
+    """
+    importance = rdp_importance(lat, lon)
+    keep = np.ones(len(importance), dtype=bool)
+    if tolerance_nm is not None:
+        keep &= importance > tolerance_nm
+    if max_points is not None and np.count_nonzero(keep) > max_points:
+        ranked = np.argsort(-importance, kind='stable')[:max(max_points, 2)]
+        top = np.zeros(len(importance), dtype=bool)
+        top[ranked] = True
+        keep &= top
+    return np.flatnonzero(keep)
+
+
+def zoom_tolerance_nm(zoom, pixels=0.5):
+    """Distance covered by ``pixels`` of a 256-px web-map tile at ``zoom``, at the equator"""
+    return pixels * 360.0 * 60.0 / (256 * 2 ** zoom)
@@ -3,10 +3,20 @@ AIS data ingestion and processing modules
 """
 
 from .synthetic_generator import SyntheticDataGenerator
+from .position_store import PositionStore, get_position_store
+from .vessel_registry import VesselRegistry, get_vessel_registry
+from .spool import SpoolReplayer, SpoolWriter, get_spool_writer
+from .position_sink import PositionPersistenceSink
+from .position_cache import InMemoryRedis, RedisPositionCache, get_position_cache
+from .track_codec import decode_track, encode_track
+from .position_archive import ArchiveDay, PositionArchive, get_position_archive
 
 # Optional imports with error handling
 try:
     from .ais_collectors import AISHubCollector, AISStreamCollector, MarinePlanCollector
+    from .nmea_collector import NMEACollector
+    from .replay_collector import ReplayCollector
+    from .sharded_workers import ShardedCollectorManager
     AIS_COLLECTORS_AVAILABLE = True
 except ImportError:
     AIS_COLLECTORS_AVAILABLE = False
@@ -16,12 +26,31 @@ except ImportError:
 # from .validation import AISDataValidator
 
 __all__ = [
-    "SyntheticDataGenerator"
+    "SyntheticDataGenerator",
+    "PositionStore",
+    "get_position_store",
+    "VesselRegistry",
+    "get_vessel_registry",
+    "SpoolWriter",
+    "SpoolReplayer",
+    "get_spool_writer",
+    "PositionPersistenceSink",
+    "RedisPositionCache",
+    "InMemoryRedis",
+    "get_position_cache",
+    "encode_track",
+    "decode_track",
+    "PositionArchive",
+    "ArchiveDay",
+    "get_position_archive"
 ]
 
 if AIS_COLLECTORS_AVAILABLE:
     __all__.extend([
         "AISHubCollector",
         "AISStreamCollector", 
-        "MarinePlanCollector"
+        "MarinePlanCollector",
+        "NMEACollector",
+        "ReplayCollector",
+        "ShardedCollectorManager"
     ]) 
\ No newline at end of file
@@ -5,131 +5,38 @@ AIS data collectors for multiple free and commercial data sources
 import asyncio
 import json
 import logging
+import re
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Optional, Any, AsyncGenerator
 import aiohttp
 import websockets
 
 # Optional imports
-try:
-    from kafka import KafkaProducer
-    KAFKA_AVAILABLE = True
-except ImportError:
-    KAFKA_AVAILABLE = False
-
 try:
     import structlog
     STRUCTLOG_AVAILABLE = True
 except ImportError:
     STRUCTLOG_AVAILABLE = False
 
-from ..core.config import AIS_SOURCES
+from ..core.config import AIS_SOURCES, settings
 from ..models.vessel import VesselPositionCreate, NavigationStatus, VesselType, Vessel, VesselPosition
-from .base_collector import BaseCollector
+from .base_collector import BaseAISCollector, BaseCollector
+from .rate_limiter import get_rate_limiter
+from .bulk_parser import parse_aishub_batch, parse_aisstream_batch, parse_digitraffic_batch
+from .http_pool import SharedHTTPPool, get_http_pool
+from .conflation import PositionConflator
+from .position_cache import RedisPositionCache
+from .position_sink import PositionPersistenceSink
+from .kafka_publisher import create_kafka_producer
+from .spool import SpoolReplayer, get_spool_writer
 
 logger = logging.getLogger(__name__)
 
-
-class BaseAISCollector(ABC):
-    """Base class for AIS data collectors"""
-    
-    def __init__(self, source_name: str, api_key: Optional[str] = None):
-        self.source_name = source_name
-        self.api_key = api_key
-        self.is_running = False
-        self.last_request_time = 0
-        self.request_count = 0
-        self.error_count = 0
-        self.kafka_producer = None
-        
-        # Initialize Kafka producer
-        if KAFKA_AVAILABLE:
-            self._init_kafka_producer()
-        
-        # Rate limiting
-        self.rate_limit = AIS_SOURCES.get(source_name, {}).get('rate_limit', 60)
-        self.min_request_interval = 60.0 / self.rate_limit if self.rate_limit else 0
-    
-    def _init_kafka_producer(self):
-        """Initialize Kafka producer for streaming data"""
-        if not KAFKA_AVAILABLE:
-            return
-        try:
-            self.kafka_producer = KafkaProducer(
-                bootstrap_servers=['localhost:9092'],  # Default kafka servers
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                key_serializer=lambda k: k.encode('utf-8') if k else None
-            )
-        except Exception as e:
-            logger.error(f"Failed to initialize Kafka producer: {e}")
-    
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting between requests"""
-        if self.min_request_interval > 0:
-            time_since_last = time.time() - self.last_request_time
-            if time_since_last < self.min_request_interval:
-                sleep_time = self.min_request_interval - time_since_last
-                time.sleep(sleep_time)
-        self.last_request_time = time.time()
-    
-    def _publish_to_kafka(self, ais_data: Dict[str, Any]):
-        """Publish AIS data to Kafka topic"""
-        if self.kafka_producer:
-            try:
-                self.kafka_producer.send(
-                    'ais_data',  # Default topic name
-                    key=str(ais_data.get('mmsi')),
-                    value=ais_data
-                )
-                self.kafka_producer.flush()
-            except Exception as e:
-                logger.error(f"Failed to publish to Kafka: {e}")
-    
-    @abstractmethod
-    async def collect_data(self) -> AsyncGenerator[Dict[str, Any], None]:
-        """Collect AIS data from the source"""
-        pass
-    
-    @abstractmethod
-    def parse_message(self, raw_message: Any) -> Optional[VesselPositionCreate]:
-        """Parse raw message to standardized format"""
-        pass
-    
-    async def start_collection(self):
-        """Start the data collection process"""
-        self.is_running = True
-        logger.info(f"Starting AIS data collection from {self.source_name}")
-        
-        try:
-            async for data in self.collect_data():
-                if not self.is_running:
-                    break
-                    
-                # Parse and validate data
-                parsed_data = self.parse_message(data)
-                if parsed_data:
-                    # Convert to dict and publish
-                    data_dict = parsed_data.dict()
-                    data_dict['source'] = self.source_name
-                    data_dict['collection_timestamp'] = datetime.utcnow().isoformat()
-                    
-                    self._publish_to_kafka(data_dict)
-                    self.request_count += 1
-                else:
-                    self.error_count += 1
-                    
-        except Exception as e:
-            logger.error(f"Error in data collection: {e}")
-            self.error_count += 1
-        finally:
-            self.is_running = False
-    
-    def stop_collection(self):
-        """Stop the data collection process"""
-        self.is_running = False
-        logger.info(f"Stopping AIS data collection from {self.source_name}")
+# Cheap MMSI extraction from raw AISStream frames, used before JSON decoding
+_USER_ID_PATTERN = re.compile(r'"UserID"\s*:\s*(\d+)')
 
 
 class AISHubCollector(BaseAISCollector):
@@ -142,11 +49,11 @@ class AISHubCollector(BaseAISCollector):
     
     async def collect_data(self) -> AsyncGenerator[Dict[str, Any], None]:
         """Collect data from AISHub API"""
-        self.session = aiohttp.ClientSession()
+        self.session = self.http_pool.session
         
         try:
             while self.is_running:
-                self._enforce_rate_limit()
+                await self._enforce_rate_limit()
                 
                 # Request parameters for AISHub
                 params = {
@@ -173,13 +80,11 @@ class AISHubCollector(BaseAISCollector):
                         if response.status == 200:
                             data = await response.json()
                             
-                            # AISHub returns array of vessels
+                            # AISHub returns array of vessels; the whole response is parsed in bulk
                             if isinstance(data, list):
-                                for vessel_data in data:
-                                    yield vessel_data
+                                yield data
                             elif isinstance(data, dict) and 'data' in data:
-                                for vessel_data in data['data']:
-                                    yield vessel_data
+                                yield list(data['data'])
                         else:
                             logger.warning(f"AISHub API returned status {response.status}")
                             await asyncio.sleep(60)  # Wait before retry
@@ -189,8 +94,12 @@ class AISHubCollector(BaseAISCollector):
                     await asyncio.sleep(30)  # Wait before retry
                 
         finally:
-            if self.session:
-                await self.session.close()
+            # The pooled session is owned by the HTTP pool, not the collector
+            self.session = None
+    
+    def parse_batch(self, raw_messages: List[Dict[str, Any]]):
+        """Parse a whole response in bulk; rejected rows go through ``parse_message``"""
+        return parse_aishub_batch(raw_messages, self.source_name, fallback=self.parse_message)
     
     def parse_message(self, raw_message: Dict[str, Any]) -> Optional[VesselPositionCreate]:
         """Parse AISHub message format"""
@@ -236,7 +145,7 @@ class AISHubCollector(BaseAISCollector):
                 longitude=longitude,
                 course_over_ground=float(course) if course else None,
                 speed_over_ground=float(speed) if speed else None,
-                true_heading=float(heading) if heading else None,
+                true_heading=float(heading) if heading and heading != 511 else None,
                 destination=destination if destination else None,
                 eta=eta,
                 timestamp=timestamp,
@@ -294,6 +203,12 @@ class AISStreamCollector(BaseAISCollector):
                         if not self.is_running:
                             break
                             
+                        # Sharded workers skip decoding other shards' vessels
+                        if self.mmsi_shard is not None:
+                            match = _USER_ID_PATTERN.search(message)
+                            if match and not self.owns_mmsi(int(match.group(1))):
+                                continue
+                        
                         try:
                             data = json.loads(message)
                             yield data
@@ -304,6 +219,10 @@ class AISStreamCollector(BaseAISCollector):
                 logger.error(f"WebSocket connection error: {e}")
                 await asyncio.sleep(30)  # Wait before reconnecting
     
+    def parse_batch(self, raw_messages: List[Dict[str, Any]]):
+        """Parse a whole response in bulk; rejected rows go through ``parse_message``"""
+        return parse_aisstream_batch(raw_messages, self.source_name, fallback=self.parse_message)
+    
     def parse_message(self, raw_message: Dict[str, Any]) -> Optional[VesselPositionCreate]:
         """Parse AISStream message format"""
         try:
@@ -386,11 +305,11 @@ class MarinePlanCollector(BaseAISCollector):
     
     async def collect_data(self) -> AsyncGenerator[Dict[str, Any], None]:
         """Collect data from MarinePlan API"""
-        self.session = aiohttp.ClientSession()
+        self.session = self.http_pool.session
         
         try:
             while self.is_running:
-                self._enforce_rate_limit()
+                await self._enforce_rate_limit()
                 
                 # Request parameters for MarinePlan
                 params = {
@@ -426,8 +345,8 @@ class MarinePlanCollector(BaseAISCollector):
                     await asyncio.sleep(30)
                 
         finally:
-            if self.session:
-                await self.session.close()
+            # The pooled session is owned by the HTTP pool, not the collector
+            self.session = None
     
     def parse_message(self, raw_message: Dict[str, Any]) -> Optional[VesselPositionCreate]:
         """Parse MarinePlan message format"""
@@ -499,21 +418,19 @@ class DigitalTrafficCollector(BaseAISCollector):
     
     async def collect_data(self) -> AsyncGenerator[Dict[str, Any], None]:
         """Collect data from Digitraffic API"""
-        self.session = aiohttp.ClientSession()
+        self.session = self.http_pool.session
         
         try:
             while self.is_running:
-                self._enforce_rate_limit()
+                await self._enforce_rate_limit()
                 
                 try:
                     async with self.session.get(f"{self.base_url}/latest") as response:
                         if response.status == 200:
                             data = await response.json()
                             
-                            # Digitraffic returns GeoJSON features
-                            features = data.get('features', [])
-                            for feature in features:
-                                yield feature
+                            # Digitraffic returns GeoJSON features, parsed in bulk
+                            yield list(data.get('features', []))
                         else:
                             logger.warning(f"Digitraffic API returned status {response.status}")
                             await asyncio.sleep(60)
@@ -523,8 +440,12 @@ class DigitalTrafficCollector(BaseAISCollector):
                     await asyncio.sleep(30)
                 
         finally:
-            if self.session:
-                await self.session.close()
+            # The pooled session is owned by the HTTP pool, not the collector
+            self.session = None
+    
+    def parse_batch(self, raw_messages: List[Dict[str, Any]]):
+        """Parse a whole response in bulk; rejected rows go through ``parse_message``"""
+        return parse_digitraffic_batch(raw_messages, self.source_name, fallback=self.parse_message)
     
     def parse_message(self, raw_message: Dict[str, Any]) -> Optional[VesselPositionCreate]:
         """Parse Digitraffic GeoJSON format"""
@@ -599,13 +520,39 @@ class DigitalTrafficCollector(BaseAISCollector):
 class AISCollectorManager:
     """Manager for multiple AIS data collectors"""
     
-    def __init__(self):
+    def __init__(self, http_pool: Optional[SharedHTTPPool] = None,
+                 conflator: Optional[PositionConflator] = None,
+                 position_sink: Optional[PositionPersistenceSink] = None,
+                 position_cache: Optional[RedisPositionCache] = None):
         self.collectors = {}
         self.tasks = {}
         self.is_running = False
+        
+        # Connection pool shared by every managed collector
+        self.http_pool = http_pool if http_pool is not None else get_http_pool()
+        
+        # Sources overlap, so one conflation stage de-duplicates across all collectors
+        self.conflator = conflator if conflator is not None else PositionConflator()
+        
+        # Optional bulk writer to the vessel_positions table
+        self.position_sink = position_sink
+        
+        # Optional Redis latest-position cache read by the API workers
+        self.position_cache = position_cache
+        
+        # One replayer per spooled source, draining into Kafka once it is reachable
+        self.spool_replayers: Dict[str, SpoolReplayer] = {}
+        self.spool_tasks: Dict[str, asyncio.Task] = {}
+        self._cache_prune_task: Optional[asyncio.Task] = None
     
     def add_collector(self, collector: BaseAISCollector):
         """Add a collector to the manager"""
+        collector.http_pool = self.http_pool
+        collector.conflator = self.conflator
+        if self.position_sink is not None:
+            collector.position_sink = self.position_sink
+        if self.position_cache is not None:
+            collector.position_cache = self.position_cache
         self.collectors[collector.source_name] = collector
     
     async def start_all(self):
@@ -617,6 +564,33 @@ class AISCollectorManager:
             task = asyncio.create_task(collector.start_collection())
             self.tasks[name] = task
             logger.info(f"Started collector: {name}")
+        
+        # GEO and time index members do not expire with their hashes
+        if self.position_cache is not None and self._cache_prune_task is None:
+            self._cache_prune_task = asyncio.create_task(self.position_cache.run_pruning())
+        
+        # Partitioned history written by this manager's sink needs sealing and retention
+        if self.position_sink is not None and self.position_sink.partitions is not None:
+            self.position_sink.partitions.start_maintenance()
+        
+        if settings.spool_enabled:
+            # Spools left by earlier runs (or worker processes) as well as the managed collectors'
+            sources = [collector.spool.directory.name for collector in self.collectors.values() if collector.spool]
+            spool_root = Path(settings.spool_dir)
+            if spool_root.is_dir():
+                sources += [path.name for path in spool_root.iterdir() if path.is_dir()]
+            for source_name in sources:
+                self.start_spool_replay(source_name)
+    
+    def start_spool_replay(self, source_name: str):
+        """Drain ``source_name``'s spool into Kafka in the background (once per source)"""
+        if source_name in self.spool_tasks:
+            return
+        replayer = SpoolReplayer(get_spool_writer(source_name))
+        self.spool_replayers[source_name] = replayer
+        self.spool_tasks[source_name] = asyncio.create_task(
+            replayer.run(create_kafka_producer, retry_interval=settings.spool_replay_interval)
+        )
     
     async def stop_all(self):
         """Stop all collectors"""
@@ -637,16 +611,37 @@ class AISCollectorManager:
                 task.cancel()
         
         self.tasks.clear()
+        if self._cache_prune_task is not None:
+            self._cache_prune_task.cancel()
+            await asyncio.gather(self._cache_prune_task, return_exceptions=True)
+            self._cache_prune_task = None
+        for task in self.spool_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.spool_tasks.values(), return_exceptions=True)
+        self.spool_tasks.clear()
+        await self.http_pool.close()
+        if self.position_sink is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.position_sink.flush)
+            if self.position_sink.partitions is not None:
+                await self.position_sink.partitions.stop_maintenance()
     
     def get_status(self) -> Dict[str, Dict[str, Any]]:
-        """Get status of all collectors"""
-        status = {}
+        """Get status of all collectors and the shared pool, conflation, persistence and cache stages"""
+        status = {'http_pool': self.http_pool.get_stats(), 'conflation': self.conflator.get_stats()}
+        if self.position_sink is not None:
+            status['persistence'] = self.position_sink.get_stats()
+        if self.position_cache is not None:
+            status['position_cache'] = self.position_cache.get_stats()
+        if self.spool_replayers:
+            status['spool'] = {name: dict(replayer.writer.get_stats(), **replayer.get_stats())
+                               for name, replayer in self.spool_replayers.items()}
         for name, collector in self.collectors.items():
             status[name] = {
                 'is_running': collector.is_running,
                 'request_count': collector.request_count,
                 'error_count': collector.error_count,
-                'error_rate': collector.error_count / max(collector.request_count, 1)
+                'error_rate': collector.error_count / max(collector.request_count, 1),
+                'duplicate_count': collector.duplicate_count
             }
         return status
 
@@ -660,6 +655,13 @@ class AISCollector(BaseCollector):
         self.myshiptracking_secret_key = config.get('myshiptracking_secret_key')
         self.datalastic_api_key = config.get('datalastic_api_key')
         self.rate_limit_delay = config.get('rate_limit_delay', 1.0)  # seconds between requests
+        self.datalastic_base_url = config.get('datalastic_base_url', 'https://api.datalastic.com/api/v0')
+        self.max_concurrent_zones = config.get('max_concurrent_zones', 4)
+        
+        # Zone requests share one token bucket with any other Datalastic client
+        self.datalastic_rate_limiter = get_rate_limiter('datalastic')
+        self.datalastic_record_count = 0
+        self.datalastic_duplicate_count = 0
         
     async def collect_data(self, region: Optional[str] = None) -> List[Vessel]:
         """Collect real AIS data from available APIs"""
@@ -702,18 +704,18 @@ class AISCollector(BaseCollector):
             'Content-Type': 'application/json'
         }
         
-        async with aiohttp.ClientSession(headers=headers) as session:
-            try:
-                # Get vessels using bulk endpoint
-                vessels.extend(await self._get_known_vessels_mst(session))
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                        
-            except Exception as e:
-                logger.error(f"MyShipTracking API error: {e}")
+        try:
+            # Get vessels using bulk endpoint
+            vessels.extend(await self._get_known_vessels_mst(self.http_pool.session, headers))
+            await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
+                    
+        except Exception as e:
+            logger.error(f"MyShipTracking API error: {e}")
                 
         return vessels
     
-    async def _get_known_vessels_mst(self, session: aiohttp.ClientSession) -> List[Vessel]:
+    async def _get_known_vessels_mst(self, session: aiohttp.ClientSession,
+                                     headers: Optional[Dict[str, str]] = None) -> List[Vessel]:
         """Get known vessels from MyShipTracking API using bulk endpoint"""
         vessels = []
         
@@ -744,7 +746,7 @@ class AISCollector(BaseCollector):
                     'response': 'extended'  # Get detailed vessel information
                 }
                 
-                async with session.get(url, params=params) as response:
+                async with session.get(url, params=params, headers=headers) as response:
                     logger.info(f"MyShipTracking API request: {url} with MMSIs: {mmsi_string}")
                     logger.info(f"Response status: {response.status}")
                     
@@ -885,47 +887,68 @@ class AISCollector(BaseCollector):
         return status_mapping.get(nav_status, 'Unknown')
     
     async def _collect_from_datalastic(self, region: Optional[str] = None) -> List[Vessel]:
-        """Collect data from Datalastic API"""
-        vessels = []
-        
+        """Collect data from Datalastic API, fetching all zones concurrently"""
         headers = {
             'Authorization': f'Bearer {self.datalastic_api_key}',
             'Content-Type': 'application/json'
         }
         
-        async with aiohttp.ClientSession(headers=headers) as session:
-            try:
-                # Get live vessel data
-                url = "https://api.datalastic.com/api/v0/vessel_inradius"
-                
-                # Define zones for different regions
-                zones = self._get_datalastic_zones(region)
-                
-                for zone in zones:
-                    params = {
-                        'api-key': self.datalastic_api_key,
-                        'lat': zone['lat'],
-                        'lon': zone['lon'],
-                        'radius': zone['radius']
-                    }
-                    
-                    async with session.get(url, params=params) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            
-                            if data.get('success') and 'data' in data:
-                                for vessel_data in data['data']:
-                                    vessel = self._parse_datalastic_vessel(vessel_data)
-                                    if vessel:
-                                        vessels.append(vessel)
-                        
-                        await asyncio.sleep(self.rate_limit_delay)
-                        
-            except Exception as e:
-                logger.error(f"Datalastic API error: {e}")
+        zones = self._get_datalastic_zones(region)
+        semaphore = asyncio.Semaphore(self.max_concurrent_zones)
+        
+        session = self.http_pool.session
+        results = await asyncio.gather(
+            *(self._fetch_datalastic_zone(session, headers, zone, semaphore) for zone in zones),
+            return_exceptions=True
+        )
+        
+        # Zones overlap, so the same vessel can be reported more than once
+        vessels = []
+        seen_mmsis = set()
+        for zone, result in zip(zones, results):
+            if isinstance(result, Exception):
+                logger.error(f"Datalastic API error for zone {zone}: {result}")
+                continue
+            
+            self.datalastic_record_count += len(result)
+            for vessel_data in result:
+                mmsi = vessel_data.get('mmsi')
+                if mmsi is not None:
+                    if mmsi in seen_mmsis:
+                        self.datalastic_duplicate_count += 1
+                        continue
+                    seen_mmsis.add(mmsi)
                 
+                vessel = self._parse_datalastic_vessel(vessel_data)
+                if vessel:
+                    vessels.append(vessel)
+        
         return vessels
     
+    async def _fetch_datalastic_zone(self, session: aiohttp.ClientSession, headers: Dict[str, str],
+                                     zone: Dict[str, float], semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """Fetch raw vessel records for one zone within the shared Datalastic rate budget"""
+        params = {
+            'api-key': self.datalastic_api_key,
+            'lat': zone['lat'],
+            'lon': zone['lon'],
+            'radius': zone['radius']
+        }
+        
+        async with semaphore:
+            await self.datalastic_rate_limiter.acquire()
+            async with session.get(f"{self.datalastic_base_url}/vessel_inradius",
+                                   params=params, headers=headers) as response:
+                if response.status != 200:
+                    logger.warning(f"Datalastic API returned status {response.status} for zone {zone}")
+                    return []
+                
+                data = await response.json()
+        
+        if data.get('success') and 'data' in data:
+            return data['data']
+        return []
+    
     def _get_datalastic_zones(self, region: Optional[str] = None) -> List[Dict[str, float]]:
         """Get zones for Datalastic API based on region"""
         all_zones = {
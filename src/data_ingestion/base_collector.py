@@ -3,19 +3,13 @@ Base AIS data collector with common functionality
 """
 
 import asyncio
-import json
 import logging
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, List, Optional, Any, AsyncGenerator
+from typing import Dict, List, Optional, Any, AsyncGenerator, Tuple
 
-# Optional imports
-try:
-    from kafka import KafkaProducer
-    KAFKA_AVAILABLE = True
-except ImportError:
-    KAFKA_AVAILABLE = False
+import numpy as np
 
 try:
     import structlog
@@ -25,64 +19,92 @@ except ImportError:
     STRUCTLOG_AVAILABLE = False
     logger = logging.getLogger(__name__)
 
-from ..core.config import AIS_SOURCES
+from ..core.config import AIS_SOURCES, settings
 from ..models.vessel import VesselPositionCreate
+from .conflation import PositionConflator
+from .position_batch import PositionBatch
+from .position_cache import RedisPositionCache
+from .position_sink import PositionPersistenceSink
+from .position_store import PositionStore, get_position_store
+from .vessel_registry import VesselRegistry, get_vessel_registry
+from .http_pool import SharedHTTPPool, get_http_pool
+from .rate_limiter import AsyncTokenBucket, get_rate_limiter
+from .kafka_publisher import KAFKA_AVAILABLE, BatchingKafkaPublisher, create_kafka_producer
+from .spool import SpoolWriter, get_spool_writer
 
 
 class BaseAISCollector(ABC):
     """Base class for AIS data collectors"""
     
-    def __init__(self, source_name: str, api_key: Optional[str] = None):
+    def __init__(self, source_name: str, api_key: Optional[str] = None,
+                 position_store: Optional[PositionStore] = None,
+                 vessel_registry: Optional[VesselRegistry] = None,
+                 http_pool: Optional[SharedHTTPPool] = None,
+                 conflator: Optional[PositionConflator] = None,
+                 position_sink: Optional[PositionPersistenceSink] = None,
+                 position_cache: Optional[RedisPositionCache] = None):
         self.source_name = source_name
         self.api_key = api_key
         self.is_running = False
         self.last_request_time = 0
         self.request_count = 0
         self.error_count = 0
+        self.duplicate_count = 0
         self.kafka_producer = None
+        self.publisher: Optional[BatchingKafkaPublisher] = None
+        
+        # Latest/recent positions shared with the API layer
+        self.position_store = position_store if position_store is not None else get_position_store()
+        self.vessel_registry = vessel_registry if vessel_registry is not None else get_vessel_registry()
+        
+        # Pooled HTTP connections (replaced by the manager's pool when managed)
+        self.http_pool = http_pool if http_pool is not None else get_http_pool()
+        
+        # Cross-source de-duplication (set by the manager; None stores every report)
+        self.conflator = conflator
+        
+        # Bulk database persistence (set by the manager; None keeps positions in memory only)
+        self.position_sink = position_sink
+        
+        # Latest-position cache shared by API workers (set by the manager)
+        self.position_cache = position_cache
+        
+        # (index, count): only keep vessels with mmsi % count == index (set by sharded workers)
+        self.mmsi_shard: Optional[Tuple[int, int]] = None
+        
+        # Spool used while Kafka is unavailable, replayed by ``SpoolReplayer``
+        self.spool: Optional[SpoolWriter] = get_spool_writer(source_name) if settings.spool_enabled else None
         
-        # Initialize Kafka producer
+        # Initialize Kafka producer, falling back to the spool
         if KAFKA_AVAILABLE:
             self._init_kafka_producer()
+        if self.publisher is None and self.spool is not None:
+            self.publisher = BatchingKafkaPublisher(self.spool)
         
-        # Rate limiting
+        # Rate limiting (token bucket shared by all collectors of this source)
+        self.rate_limiter: AsyncTokenBucket = get_rate_limiter(source_name)
         self.rate_limit = AIS_SOURCES.get(source_name, {}).get('rate_limit', 60)
-        self.min_request_interval = 60.0 / self.rate_limit if self.rate_limit else 0
+        self.min_request_interval = 1.0 / self.rate_limiter.rate if self.rate_limiter.rate else 0
     
     def _init_kafka_producer(self):
         """Initialize Kafka producer for streaming data"""
         if not KAFKA_AVAILABLE:
             return
         try:
-            self.kafka_producer = KafkaProducer(
-                bootstrap_servers=['localhost:9092'],  # Default kafka servers
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                key_serializer=lambda k: k.encode('utf-8') if k else None
-            )
+            self.kafka_producer = create_kafka_producer()
+            self.publisher = BatchingKafkaPublisher(self.kafka_producer, fallback=self.spool)
         except Exception as e:
             logger.error(f"Failed to initialize Kafka producer: {e}")
     
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting between requests"""
-        if self.min_request_interval > 0:
-            time_since_last = time.time() - self.last_request_time
-            if time_since_last < self.min_request_interval:
-                sleep_time = self.min_request_interval - time_since_last
-                time.sleep(sleep_time)
+    async def _enforce_rate_limit(self):
+        """Wait for this source's rate limiter without blocking the event loop"""
+        await self.rate_limiter.acquire()
         self.last_request_time = time.time()
     
-    def _publish_to_kafka(self, ais_data: Dict[str, Any]):
-        """Publish AIS data to Kafka topic"""
-        if self.kafka_producer:
-            try:
-                self.kafka_producer.send(
-                    'ais_data',  # Default topic name
-                    key=str(ais_data.get('mmsi')),
-                    value=ais_data
-                )
-                self.kafka_producer.flush()
-            except Exception as e:
-                logger.error(f"Failed to publish to Kafka: {e}")
+    async def _publish_to_kafka(self, ais_data: Dict[str, Any]):
+        """Queue AIS data for batched publishing (waits while the queue is full)"""
+        if self.publisher:
+            await self.publisher.publish(ais_data)
     
     @abstractmethod
     async def collect_data(self) -> AsyncGenerator[Dict[str, Any], None]:
@@ -94,8 +116,96 @@ class BaseAISCollector(ABC):
         """Parse raw message to standardized format"""
         pass
     
+    def parse_batch(self, raw_messages: List[Any]) -> Optional[Tuple[PositionBatch, List[VesselPositionCreate]]]:
+        """Decode a whole API response at once.
+
+        Collectors that support bulk parsing return the batch of rows that
+        passed the vectorized checks plus the models recovered from rejected
+        rows; the default (None) falls back to ``parse_message`` per message.
+        """
+        return None
+    
+    def owns_mmsi(self, mmsi: int) -> bool:
+        """Whether a vessel belongs to this collector's MMSI shard"""
+        return self.mmsi_shard is None or mmsi % self.mmsi_shard[1] == self.mmsi_shard[0]
+    
+    async def _process_position(self, parsed_data: Optional[VesselPositionCreate]):
+        """Store and publish one parsed position report"""
+        if not parsed_data:
+            self.error_count += 1
+            return
+        
+        if not self.owns_mmsi(parsed_data.mmsi):
+            return
+        
+        if self.conflator is not None and not self.conflator.accept(parsed_data, self.source_name):
+            self.duplicate_count += 1
+            return
+        
+        # One dict serves both the store and the published record
+        data_dict = parsed_data.dict()
+        self.position_store.update(data_dict)
+        if self.position_sink is not None:
+            await self.position_sink.update(parsed_data)
+        if self.position_cache is not None:
+            await self.position_cache.update(parsed_data)
+        self.vessel_registry.observe(parsed_data.mmsi, self.source_name, parsed_data.timestamp)
+        
+        data_dict['source'] = self.source_name
+        data_dict['collection_timestamp'] = datetime.utcnow().isoformat()
+        
+        await self._publish_to_kafka(data_dict)
+        self.request_count += 1
+    
+    async def _process_messages(self, raw_messages: List[Any]):
+        """Store and publish a list of raw messages, in bulk when the collector supports it"""
+        parsed = self.parse_batch(raw_messages)
+        if parsed is None:
+            for raw_message in raw_messages:
+                await self._process_position(self.parse_message(raw_message))
+            return
+        
+        batch, recovered = parsed
+        self.error_count += len(raw_messages) - len(batch) - len(recovered)
+        await self._process_batch(batch)
+        
+        for parsed_data in recovered:
+            await self._process_position(parsed_data)
+    
+    async def _process_batch(self, batch: PositionBatch):
+        """Store and publish an already decoded batch of position reports"""
+        if self.mmsi_shard is not None and len(batch):
+            index, count = self.mmsi_shard
+            batch = batch.take(batch.mmsi % count == index)
+        
+        if self.conflator is not None and len(batch):
+            keep = self.conflator.accept_batch(batch, self.source_name)
+            self.duplicate_count += int(np.count_nonzero(~keep))
+            batch = batch.take(keep)
+        
+        if len(batch):
+            self.position_store.update_batch(batch)
+            if self.position_sink is not None:
+                await self.position_sink.update_batch(batch)
+            if self.position_cache is not None:
+                await self.position_cache.update_batch(batch)
+            self.vessel_registry.observe_many(batch.mmsi.tolist(), self.source_name)
+            
+            if self.publisher:
+                collection_timestamp = datetime.utcnow().isoformat()
+                for data_dict in batch.to_records():
+                    data_dict['source'] = self.source_name
+                    data_dict['collection_timestamp'] = collection_timestamp
+                    await self._publish_to_kafka(data_dict)
+            self.request_count += len(batch)
+    
     async def start_collection(self):
-        """Start the data collection process"""
+        """Start the data collection process.
+        
+        ``collect_data`` may yield single messages, a list holding a whole
+        API response (lists go through ``parse_batch``) or an already
+        decoded ``PositionBatch``.
+        """
         self.is_running = True
         logger.info(f"Starting AIS data collection from {self.source_name}")
         
@@ -103,25 +213,26 @@ class BaseAISCollector(ABC):
             async for data in self.collect_data():
                 if not self.is_running:
                     break
-                    
-                # Parse and validate data
-                parsed_data = self.parse_message(data)
-                if parsed_data:
-                    # Convert to dict and publish
-                    data_dict = parsed_data.dict()
-                    data_dict['source'] = self.source_name
-                    data_dict['collection_timestamp'] = datetime.utcnow().isoformat()
-                    
-                    self._publish_to_kafka(data_dict)
-                    self.request_count += 1
+                
+                if isinstance(data, PositionBatch):
+                    await self._process_batch(data)
+                elif isinstance(data, list):
+                    await self._process_messages(data)
                 else:
-                    self.error_count += 1
+                    # Parse and validate data
+                    await self._process_position(self.parse_message(data))
                     
         except Exception as e:
             logger.error(f"Error in data collection: {e}")
             self.error_count += 1
         finally:
             self.is_running = False
+            # Deliver whatever is still queued and flush the producer
+            if self.publisher:
+                try:
+                    await self.publisher.close()
+                except Exception as e:
+                    logger.error(f"Failed to flush Kafka publisher: {e}")
     
     def stop_collection(self):
         """Stop the data collection process"""
@@ -136,15 +247,20 @@ class BaseAISCollector(ABC):
             'request_count': self.request_count,
             'error_count': self.error_count,
             'error_rate': self.error_count / max(self.request_count, 1),
-            'last_request_time': self.last_request_time
+            'duplicate_count': self.duplicate_count,
+            'last_request_time': self.last_request_time,
+            'rate_limiter': self.rate_limiter.get_stats(),
+            'publisher': self.publisher.get_stats() if self.publisher else None,
+            'spool': self.spool.get_stats() if self.spool else None
         }
 
 
 class BaseCollector(ABC):
     """Simple base collector for real AIS data integration"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], http_pool: Optional[SharedHTTPPool] = None):
         self.config = config
+        self.http_pool = http_pool if http_pool is not None else get_http_pool()
         
     @abstractmethod
     async def collect_data(self, region: Optional[str] = None) -> List[Any]:
@@ -0,0 +1,119 @@
+"""
+Cross-source de-duplication of position reports
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..models.vessel import VesselPositionCreate
+from .position_batch import PositionBatch
+from .position_store import to_epoch
+
+
+class PositionConflator:
+    """Drop repeated reports of the same vessel within a time bucket"""
+
+    def __init__(self, bucket_seconds: float = 30.0, window_seconds: float = 600.0,
+                 max_entries: int = 500000, source_priority: Optional[Dict[str, float]] = None):
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = max(int(window_seconds // bucket_seconds), 1)
+        self.max_entries = max_entries
+        self.source_priority = source_priority or {}
+
+        self._seen: "OrderedDict[Tuple[int, int], float]" = OrderedDict()
+        self._newest_bucket = 0
+        self._swept_bucket = -self.window_buckets
+
+        self.seen_count = 0
+        self.accepted_count = 0
+        self.upgraded_count = 0
+        self.dropped_count = 0
+        self.evicted_count = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _evict(self):
+        oldest_allowed = self._newest_bucket - self.window_buckets
+        seen = self._seen
+        if oldest_allowed > self._swept_bucket:
+            # Late reports and upgrades put keys out of bucket order, so sweep them all once per bucket
+            expired = [key for key in seen if key[1] < oldest_allowed]
+            for key in expired:
+                del seen[key]
+            self.evicted_count += len(expired)
+            self._swept_bucket = oldest_allowed
+        while len(seen) > self.max_entries:
+            seen.popitem(last=False)
+            self.evicted_count += 1
+
+    def _offer(self, mmsi: int, bucket: int, quality: float) -> bool:
+        self.seen_count += 1
+        key = (mmsi, bucket)
+        best = self._seen.get(key)
+
+        if best is None:
+            if bucket < self._newest_bucket - self.window_buckets:
+                # Older than the window: we no longer know whether it is a duplicate
+                self.accepted_count += 1
+                return True
+            self._seen[key] = quality
+            self.accepted_count += 1
+        elif quality > best:
+            self._seen[key] = quality
+            self._seen.move_to_end(key)
+            self.upgraded_count += 1
+        else:
+            self.dropped_count += 1
+            return False
+
+        if bucket > self._newest_bucket:
+            self._newest_bucket = bucket
+        return True
+
+    def accept(self, position: VesselPositionCreate, source: Optional[str] = None) -> bool:
+        """Whether a single report should be stored and published (again, if it is an upgrade)"""
+        quality = sum(value is not None for value in (
+            position.speed_over_ground, position.course_over_ground,
+            position.true_heading, position.navigation_status
+        )) + self.source_priority.get(source or position.data_source, 0.0)
+
+        bucket = int(to_epoch(position.timestamp) // self.bucket_seconds)
+        accepted = self._offer(int(position.mmsi), bucket, quality)
+        self._evict()
+        return accepted
+
+    def accept_batch(self, batch: PositionBatch, source: Optional[str] = None) -> np.ndarray:
+        """Boolean mask of the batch rows that should be stored and published"""
+        quality = (
+            (~np.isnan(batch.speed_over_ground)).astype(np.float64)
+            + ~np.isnan(batch.course_over_ground)
+            + ~np.isnan(batch.true_heading)
+            + (batch.navigation_status >= 0)
+            + self.source_priority.get(source or batch.data_source, 0.0)
+        )
+        buckets = np.floor(batch.timestamp / self.bucket_seconds).astype(np.int64)
+
+        offer = self._offer
+        mask = np.fromiter(
+            (offer(mmsi, bucket, q) for mmsi, bucket, q in
+             zip(batch.mmsi.tolist(), buckets.tolist(), quality.tolist())),
+            dtype=bool, count=len(batch)
+        )
+        self._evict()
+        return mask
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get conflation statistics"""
+        return {
+            'seen_count': self.seen_count,
+            'accepted_count': self.accepted_count,
+            'upgraded_count': self.upgraded_count,
+            'dropped_count': self.dropped_count,
+            'dedup_ratio': self.dropped_count / self.seen_count if self.seen_count else 0.0,
+            'tracked_keys': len(self._seen),
+            'evicted_count': self.evicted_count,
+            'bucket_seconds': self.bucket_seconds
+        }
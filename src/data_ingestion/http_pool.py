@@ -0,0 +1,106 @@
+"""
+Process-wide pooled aiohttp session shared by the AIS collectors
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+
+class SharedHTTPPool:
+    """One pooled aiohttp session shared by every collector"""
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10,
+                 keepalive_timeout: float = 30.0, dns_cache_ttl: int = 300,
+                 timeout: float = 30.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.request_count = 0
+        self.connections_reused = 0
+        self.connections_created = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.request_count += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.connections_reused += 1
+
+        async def on_connection_create_end(session, context, params):
+            self.connections_created += 1
+
+        async def on_dns_cache_hit(session, context, params):
+            self.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, context, params):
+            self.dns_cache_misses += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, created on first use in the current event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[self._trace_config()],
+            )
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        """Close the session and its pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        connections = self.connections_reused + self.connections_created
+        dns_lookups = self.dns_cache_hits + self.dns_cache_misses
+        return {
+            'request_count': self.request_count,
+            'connections_reused': self.connections_reused,
+            'connections_created': self.connections_created,
+            'pool_hit_rate': self.connections_reused / connections if connections else 0.0,
+            'dns_cache_hits': self.dns_cache_hits,
+            'dns_cache_misses': self.dns_cache_misses,
+            'dns_cache_hit_rate': self.dns_cache_hits / dns_lookups if dns_lookups else 0.0,
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'is_open': self._session is not None and not self._session.closed
+        }
+
+
+@lru_cache()
+def get_http_pool() -> SharedHTTPPool:
+    """Get the process-wide HTTP pool shared by all collectors"""
+    return SharedHTTPPool()
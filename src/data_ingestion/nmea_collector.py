@@ -0,0 +1,390 @@
+"""
+Collector for raw NMEA 0183 AIVDM/AIVDO sentences from receivers or replay files
+"""
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from ..models.vessel import VesselPositionCreate, VesselType
+from .base_collector import BaseAISCollector
+from .position_batch import PositionBatch
+
+logger = structlog.get_logger(__name__)
+
+# A complete AIS message: (6-bit armoured payload, fill bits, received epoch seconds)
+AISPayload = Tuple[str, int, float]
+
+POSITION_TYPES = (1, 2, 3, 18)
+STATIC_TYPES = (5, 24)
+
+# Minimum payload length in bits for each decoded message type
+_MIN_BITS = {1: 168, 2: 168, 3: 168, 18: 168, 5: 424, 24: 160}
+
+# Pending multipart messages kept while waiting for the remaining fragments
+MAX_PENDING_FRAGMENTS = 1024
+
+_TAG_TIME = re.compile(r'(?:^|,)c:(\d+)')
+
+
+def nmea_checksum_ok(sentence: str) -> bool:
+    """Validate the ``*hh`` XOR checksum of a sentence (sentences without one pass)"""
+    star = sentence.rfind('*')
+    if star < 0:
+        return True
+    checksum = 0
+    for char in sentence[1:star]:
+        checksum ^= ord(char)
+    return sentence[star + 1:star + 3].upper() == f'{checksum:02X}'
+
+
+def ship_type_to_vessel_type(ship_type: int) -> VesselType:
+    """Map an AIS ship-and-cargo type code to a ``VesselType``"""
+    special = {
+        30: VesselType.FISHING, 31: VesselType.TUG, 32: VesselType.TUG,
+        35: VesselType.MILITARY, 36: VesselType.SAILING_VESSEL, 37: VesselType.PLEASURE_CRAFT,
+        50: VesselType.PILOT_VESSEL, 51: VesselType.SEARCH_RESCUE, 52: VesselType.TUG,
+        53: VesselType.PORT_TENDER, 54: VesselType.ANTI_POLLUTION, 55: VesselType.LAW_ENFORCEMENT,
+        58: VesselType.MEDICAL_TRANSPORT,
+    }
+    if ship_type in special:
+        return special[ship_type]
+    decade = {2: VesselType.WIG, 4: VesselType.HIGH_SPEED_CRAFT, 6: VesselType.PASSENGER,
+              7: VesselType.CARGO, 8: VesselType.TANKER}
+    return decade.get(ship_type // 10, VesselType.UNKNOWN)
+
+
+class SentenceAssembler:
+    """Reassemble multipart AIVDM sentences into complete payloads"""
+
+    def __init__(self, max_pending: int = MAX_PENDING_FRAGMENTS):
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[Tuple[str, str], List[Optional[str]]]" = OrderedDict()
+        self.sentence_count = 0
+        self.invalid_count = 0
+        self.dropped_fragments = 0
+
+    def feed(self, line: str, received: float) -> Optional[AISPayload]:
+        """Add one line; returns a payload when it completes a message"""
+        line = line.strip()
+        if not line:
+            return None
+
+        # NMEA 4.0 tag block: \s:receiver,c:1700000000*hh\!AIVDM,...
+        if line.startswith('\\'):
+            end = line.find('\\', 1)
+            if end < 0:
+                self.invalid_count += 1
+                return None
+            match = _TAG_TIME.search(line[1:end])
+            if match:
+                received = float(match.group(1))
+                if received > 1e11:  # milliseconds
+                    received /= 1000.0
+            line = line[end + 1:]
+
+        fields = line.split(',')
+        if len(fields) < 7 or not fields[0].endswith(('VDM', 'VDO')) or not nmea_checksum_ok(line):
+            self.invalid_count += 1
+            return None
+        self.sentence_count += 1
+
+        try:
+            total, number = int(fields[1]), int(fields[2])
+            fill_bits = int(fields[6].split('*')[0] or 0)
+        except ValueError:
+            self.invalid_count += 1
+            return None
+        payload = fields[5]
+
+        if total == 1:
+            return payload, fill_bits, received
+
+        key = (fields[3], fields[4])
+        parts = self._pending.get(key)
+        if parts is None or len(parts) != total or number == 1:
+            if parts is not None:
+                self.dropped_fragments += sum(p is not None for p in parts)
+            parts = [None] * total
+            self._pending[key] = parts
+            if len(self._pending) > self.max_pending:
+                _, evicted = self._pending.popitem(last=False)
+                self.dropped_fragments += sum(p is not None for p in evicted)
+        if not 1 <= number <= total:
+            self.invalid_count += 1
+            return None
+        parts[number - 1] = payload
+
+        if number == total and all(p is not None for p in parts):
+            del self._pending[key]
+            return ''.join(parts), fill_bits, received
+        return None
+
+
+def payload_bits(payloads: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Dearmour 6-bit payloads into a zero-padded (n, 6 * max_len) bit matrix.
+
+    Returns the bit matrix and the number of bits in each payload.
+    """
+    lengths = np.fromiter((len(p) for p in payloads), dtype=np.int64, count=len(payloads))
+    # Pad to the longest decoded layout (type 5) so every field offset is addressable
+    width = max(int(lengths.max()) if len(payloads) else 0, -(-max(_MIN_BITS.values()) // 6))
+    codes = np.frombuffer(''.join(payloads).encode('ascii', 'replace'), dtype=np.uint8).astype(np.int16) - 48
+    codes[codes > 40] -= 8
+    codes = np.clip(codes, 0, 63).astype(np.uint8)
+
+    sixbit = np.zeros((len(payloads), width), dtype=np.uint8)
+    sixbit[np.arange(width) < lengths[:, None]] = codes
+    bits = np.unpackbits(sixbit[:, :, None], axis=2)[:, :, 2:].reshape(len(payloads), width * 6)
+    return bits, lengths * 6
+
+
+def _uint(bits: np.ndarray, start: int, length: int) -> np.ndarray:
+    weights = np.left_shift(np.int64(1), np.arange(length - 1, -1, -1, dtype=np.int64))
+    return bits[:, start:start + length].astype(np.int64) @ weights
+
+
+def _int(bits: np.ndarray, start: int, length: int) -> np.ndarray:
+    value = _uint(bits, start, length)
+    return np.where(value >= 1 << (length - 1), value - (1 << length), value)
+
+
+def _text(bits: np.ndarray, start: int, length: int) -> List[str]:
+    """Decode 6-bit ASCII text fields ('@' padding and trailing spaces removed)"""
+    chars = bits[:, start:start + length].reshape(len(bits), length // 6, 6)
+    codes = chars.astype(np.uint8) @ np.array([32, 16, 8, 4, 2, 1], dtype=np.uint8)
+    codes = np.where(codes < 32, codes + 64, codes).astype(np.uint8)
+    return [row.tobytes().decode('ascii').split('@')[0].rstrip() for row in codes]
+
+
+def decode_positions(messages: List[AISPayload], data_source: str = "nmea") -> PositionBatch:
+    """Decode position reports (types 1/2/3 and 18) in bulk.
+
+    Reports without an available position, or too short for their type,
+    are dropped. Unavailable speed, course and heading become NaN.
+    """
+    if not messages:
+        return PositionBatch.empty(data_source)
+
+    bits, nbits = payload_bits([m[0] for m in messages])
+    received = np.array([m[2] for m in messages], dtype=np.float64)
+    msg_type = _uint(bits, 0, 6)
+
+    # Class A (types 1-3) and class B (type 18) reports share fields at different offsets
+    class_a = np.isin(msg_type, (1, 2, 3))
+    sog = np.where(class_a, _uint(bits, 50, 10), _uint(bits, 46, 10)).astype(np.float64)
+    lon = np.where(class_a, _int(bits, 61, 28), _int(bits, 57, 28)) / 600000.0
+    lat = np.where(class_a, _int(bits, 89, 27), _int(bits, 85, 27)) / 600000.0
+    cog = np.where(class_a, _uint(bits, 116, 12), _uint(bits, 112, 12)).astype(np.float64)
+    heading = np.where(class_a, _uint(bits, 128, 9), _uint(bits, 124, 9)).astype(np.float64)
+    status = np.where(class_a, _uint(bits, 38, 4), -1).astype(np.int8)
+
+    sog[sog == 1023] = np.nan
+    sog /= 10.0
+    cog[cog >= 3600] = np.nan
+    cog /= 10.0
+    heading[heading >= 360] = np.nan
+
+    valid = (
+        np.isin(msg_type, POSITION_TYPES)
+        & (nbits >= 168)
+        & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    )
+    return PositionBatch(
+        mmsi=_uint(bits, 8, 30)[valid],
+        latitude=lat[valid],
+        longitude=lon[valid],
+        speed_over_ground=sog[valid],
+        course_over_ground=cog[valid],
+        true_heading=heading[valid],
+        # NavigationStatus is declared in AIS status order, so the 4-bit field is the store code
+        navigation_status=status[valid],
+        timestamp=received[valid],
+        data_source=data_source
+    )
+
+
+def decode_static(messages: List[AISPayload]) -> List[Dict[str, Any]]:
+    """Decode static and voyage data (type 5, type 24 parts A/B) into vessel registry records"""
+    records: List[Dict[str, Any]] = []
+    if not messages:
+        return records
+
+    bits, nbits = payload_bits([m[0] for m in messages])
+    msg_type = _uint(bits, 0, 6)
+    mmsi = _uint(bits, 8, 30)
+
+    type5 = np.flatnonzero((msg_type == 5) & (nbits >= _MIN_BITS[5]))
+    if len(type5):
+        b = bits[type5]
+        names, call_signs, destinations = _text(b, 112, 120), _text(b, 70, 42), _text(b, 302, 120)
+        imos, ship_types = _uint(b, 40, 30).tolist(), _uint(b, 232, 8).tolist()
+        lengths = (_uint(b, 240, 9) + _uint(b, 249, 9)).tolist()
+        widths = (_uint(b, 258, 6) + _uint(b, 264, 6)).tolist()
+        drafts = (_uint(b, 294, 8) / 10.0).tolist()
+        for i, row in enumerate(type5.tolist()):
+            records.append({
+                'mmsi': int(mmsi[row]),
+                'imo': str(imos[i]) if imos[i] else None,
+                'call_sign': call_signs[i] or None,
+                'vessel_name': names[i] or None,
+                'vessel_type': ship_type_to_vessel_type(ship_types[i]),
+                'vessel_type_code': ship_types[i],
+                'length': float(lengths[i]) or None,
+                'width': float(widths[i]) or None,
+                'draft': drafts[i] or None,
+                'destination': destinations[i] or None,
+            })
+
+    type24 = np.flatnonzero((msg_type == 24) & (nbits >= _MIN_BITS[24]))
+    if len(type24):
+        b = bits[type24]
+        part = _uint(b, 38, 2).tolist()
+        names, call_signs = _text(b, 40, 120), _text(b, 90, 42)
+        ship_types = _uint(b, 40, 8).tolist()
+        lengths = (_uint(b, 132, 9) + _uint(b, 141, 9)).tolist()
+        widths = (_uint(b, 150, 6) + _uint(b, 156, 6)).tolist()
+        for i, row in enumerate(type24.tolist()):
+            if part[i] == 0:
+                records.append({'mmsi': int(mmsi[row]), 'vessel_name': names[i] or None})
+            elif part[i] == 1:
+                records.append({
+                    'mmsi': int(mmsi[row]),
+                    'call_sign': call_signs[i] or None,
+                    'vessel_type': ship_type_to_vessel_type(ship_types[i]),
+                    'vessel_type_code': ship_types[i],
+                    'length': float(lengths[i]) or None,
+                    'width': float(widths[i]) or None,
+                })
+
+    return records
+
+
+def _payload_type(payload: str) -> int:
+    code = ord(payload[0]) - 48 if payload else -1
+    return code - 8 if code > 40 else code
+
+
+class NMEACollector(BaseAISCollector):
+    """Collector for raw AIVDM sentences from a receiver or a replay file"""
+
+    def __init__(self, source: str, source_name: str = "nmea", read_size: int = 1 << 20,
+                 reconnect_delay: float = 30.0, **kwargs):
+        super().__init__(source_name, **kwargs)
+        self.source = source
+        self.read_size = read_size
+        self.reconnect_delay = reconnect_delay
+        self.assembler = SentenceAssembler()
+        self.static_count = 0
+        self.skipped_count = 0
+
+    def _complete_messages(self, lines: Iterable[str]) -> List[AISPayload]:
+        """Feed lines to the assembler; returns position payloads and registers static data"""
+        received = time.time()
+        positions, static = [], []
+        for line in lines:
+            message = self.assembler.feed(line, received)
+            if message is None:
+                continue
+            msg_type = _payload_type(message[0])
+            if msg_type in POSITION_TYPES:
+                positions.append(message)
+            elif msg_type in STATIC_TYPES:
+                static.append(message)
+            else:
+                self.skipped_count += 1
+
+        if static:
+            records = decode_static(static)
+            self.vessel_registry.upsert_many(records)
+            self.static_count += len(records)
+        return positions
+
+    async def _read_file(self) -> AsyncGenerator[List[str], None]:
+        with open(self.source, 'r', encoding='ascii', errors='replace') as handle:
+            while self.is_running:
+                lines = await asyncio.to_thread(handle.readlines, self.read_size)
+                if not lines:
+                    break
+                yield lines
+
+    async def _read_tcp(self, host: str, port: int) -> AsyncGenerator[List[str], None]:
+        while self.is_running:
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                logger.info(f"Connected to NMEA receiver {host}:{port}")
+                remainder = ''
+                try:
+                    while self.is_running:
+                        data = await reader.read(self.read_size)
+                        if not data:
+                            break
+                        lines = (remainder + data.decode('ascii', 'replace')).split('\n')
+                        remainder = lines.pop()
+                        yield lines
+                finally:
+                    writer.close()
+            except OSError as e:
+                logger.error(f"NMEA receiver connection error: {e}")
+            if self.is_running:
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _read_udp(self, host: str, port: int) -> AsyncGenerator[List[str], None]:
+        queue: asyncio.Queue = asyncio.Queue()
+
+        class _Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                queue.put_nowait(data)
+
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(_Protocol, local_addr=(host, port))
+        try:
+            while self.is_running:
+                datagrams = [await queue.get()]
+                while not queue.empty():
+                    datagrams.append(queue.get_nowait())
+                yield b''.join(datagrams).decode('ascii', 'replace').splitlines()
+        finally:
+            transport.close()
+
+    def _reader(self) -> AsyncGenerator[List[str], None]:
+        if self.source.startswith(('tcp://', 'udp://')):
+            scheme, address = self.source.split('://', 1)
+            host, port = address.rsplit(':', 1)
+            if scheme == 'tcp':
+                return self._read_tcp(host, int(port))
+            return self._read_udp(host, int(port))
+        return self._read_file()
+
+    async def collect_data(self) -> AsyncGenerator[List[AISPayload], None]:
+        """Yield the complete position payloads found in each chunk read"""
+        async for lines in self._reader():
+            positions = self._complete_messages(lines)
+            if positions:
+                yield positions
+
+    def parse_batch(self, raw_messages: List[AISPayload]) -> Tuple[PositionBatch, List[VesselPositionCreate]]:
+        """Decode position payloads in bulk; undecodable reports are rejected without fallback"""
+        return decode_positions(raw_messages, self.source_name), []
+
+    def parse_message(self, raw_message: AISPayload) -> Optional[VesselPositionCreate]:
+        """Decode a single position payload"""
+        return next(decode_positions([raw_message], self.source_name).to_models(), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get collector statistics"""
+        stats = super().get_stats()
+        stats.update({
+            'source': self.source,
+            'sentence_count': self.assembler.sentence_count,
+            'invalid_sentences': self.assembler.invalid_count,
+            'dropped_fragments': self.assembler.dropped_fragments,
+            'static_reports': self.static_count,
+            'skipped_messages': self.skipped_count
+        })
+        return stats
@@ -0,0 +1,314 @@
+"""
+Time-partitioned storage and retention for vessel position history
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Column, Index, MetaData, Table, create_engine, inspect, select, union_all
+from sqlalchemy.exc import SQLAlchemyError
+import structlog
+
+from ..core.config import settings
+from ..models.vessel import VesselPosition
+from .position_store import POSITION_COLUMNS, nav_status_code, to_epoch
+
+logger = structlog.get_logger(__name__)
+
+PARTITION_PREFIX = 'vessel_positions_p'
+
+# granularity -> (seconds per partition, name suffix format)
+GRANULARITIES = {
+    'day': (86400, '%Y%m%d'),
+    'hour': (3600, '%Y%m%d%H'),
+}
+
+# Columns indexed on the unpartitioned table; partitions get them once sealed
+INDEXED_COLUMNS = [column.name for column in VesselPosition.__table__.columns if column.index]
+
+
+class PositionPartitionManager:
+    """Daily or hourly vessel_positions partition tables with whole-partition retention"""
+
+    def __init__(self, engine=None, database_url: Optional[str] = None, granularity: str = 'day',
+                 retention_days: Optional[int] = None, seal_delay_seconds: float = 3600.0):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown partition granularity: {granularity}")
+        self.engine = engine if engine is not None else create_engine(database_url or settings.database_url)
+        self.granularity = granularity
+        self.span, self._format = GRANULARITIES[granularity]
+        self.retention_days = retention_days if retention_days is not None else settings.data_retention_days
+        self.seal_delay_seconds = seal_delay_seconds
+
+        self.metadata = MetaData()
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Table] = {}
+        self._sealed: set = set()
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+        self.created_count = 0
+        self.dropped_count = 0
+
+        self.refresh()
+
+    # Naming
+
+    def partition_name(self, epoch: float) -> str:
+        """Partition holding a timestamp (epoch seconds)"""
+        start = int(epoch // self.span) * self.span
+        return PARTITION_PREFIX + datetime.fromtimestamp(start, timezone.utc).strftime(self._format)
+
+    def partition_bounds(self, name: str) -> Tuple[float, float]:
+        """[start, end) of a partition in epoch seconds"""
+        start = datetime.strptime(name[len(PARTITION_PREFIX):], self._format).replace(tzinfo=timezone.utc)
+        return start.timestamp(), start.timestamp() + self.span
+
+    def partition_keys(self, epochs: np.ndarray) -> np.ndarray:
+        """Partition period number of each timestamp"""
+        return np.floor_divide(epochs, self.span).astype(np.int64)
+
+    def name_for_key(self, key: int) -> str:
+        return self.partition_name(key * self.span)
+
+    def _is_partition(self, name: str) -> bool:
+        if not name.startswith(PARTITION_PREFIX):
+            return False
+        try:
+            self.partition_bounds(name)
+        except ValueError:
+            return False
+        return True
+
+    # Tables
+
+    def _table(self, name: str) -> Table:
+        table = self._tables.get(name)
+        if table is None:
+            table = Table(name, self.metadata, *[
+                Column(column.name, column.type, primary_key=column.primary_key,
+                       nullable=column.nullable, autoincrement=column.autoincrement)
+                for column in VesselPosition.__table__.columns
+            ])
+            self._tables[name] = table
+        return table
+
+    def refresh(self):
+        """Re-read the existing partitions (and which are sealed) from the database"""
+        inspector = inspect(self.engine)
+        names = set(filter(self._is_partition, inspector.get_table_names()))
+        with self._lock:
+            # Dropped by another process
+            for name in set(self._tables) - names:
+                self.metadata.remove(self._tables.pop(name))
+                self._sealed.discard(name)
+            for name in names:
+                self._table(name)
+            unsealed = sorted(names - self._sealed)
+        for name in unsealed:
+            indexes = {index['name'] for index in inspector.get_indexes(name)}
+            if all(self._index_name(name, column) in indexes for column in INDEXED_COLUMNS):
+                with self._lock:
+                    self._sealed.add(name)
+
+    def partitions(self) -> List[str]:
+        """Existing partitions, oldest first"""
+        with self._lock:
+            return sorted(self._tables)
+
+    def ensure_partition(self, name: str) -> Table:
+        """Create a partition (without secondary indexes) if it does not exist"""
+        with self._lock:
+            exists = name in self._tables
+            table = self._table(name)
+        if not exists:
+            table.create(self.engine, checkfirst=True)
+            self.created_count += 1
+            logger.info(f"Created position partition {name}")
+        return table
+
+    def is_expired(self, name: str, now: Optional[float] = None) -> bool:
+        now = to_epoch(None) if now is None else now
+        return self.partition_bounds(name)[1] <= now - self.retention_days * 86400
+
+    @staticmethod
+    def _index_name(partition: str, column: str) -> str:
+        return f"ix_{partition}_{column}"
+
+    def seal(self, name: str):
+        """Build the secondary indexes of a partition that no longer receives live data"""
+        table = self._tables.get(name)
+        if table is None:
+            return
+        try:
+            for column in INDEXED_COLUMNS:
+                Index(self._index_name(name, column), table.c[column]).create(self.engine, checkfirst=True)
+        except SQLAlchemyError as e:
+            # Sealed or dropped meanwhile by another process
+            logger.warning(f"Could not seal position partition {name}: {e}")
+            self.refresh()
+            return
+        with self._lock:
+            self._sealed.add(name)
+        logger.info(f"Sealed position partition {name}")
+
+    def seal_partitions(self, now: Optional[float] = None) -> List[str]:
+        """Seal every partition whose period ended more than ``seal_delay_seconds`` ago"""
+        now = to_epoch(None) if now is None else now
+        sealed = []
+        for name in self.partitions():
+            if name not in self._sealed and self.partition_bounds(name)[1] + self.seal_delay_seconds <= now:
+                self.seal(name)
+                if name in self._sealed:
+                    sealed.append(name)
+        return sealed
+
+    def enforce_retention(self, now: Optional[float] = None) -> List[str]:
+        """Drop partitions entirely older than ``retention_days``"""
+        dropped = []
+        for name in self.partitions():
+            if self.is_expired(name, now):
+                with self._lock:
+                    table = self._tables.pop(name, None)
+                    self._sealed.discard(name)
+                if table is None:
+                    continue
+                self.metadata.remove(table)
+                try:
+                    table.drop(self.engine, checkfirst=True)
+                except SQLAlchemyError as e:
+                    # Dropped meanwhile by another process
+                    logger.warning(f"Could not drop position partition {name}: {e}")
+                    continue
+                self.dropped_count += 1
+                dropped.append(name)
+                logger.info(f"Dropped expired position partition {name}")
+        return dropped
+
+    def maintain(self, now: Optional[float] = None) -> Dict[str, List[str]]:
+        """Seal finished partitions and drop expired ones"""
+        self.refresh()
+        return {'dropped': self.enforce_retention(now), 'sealed': self.seal_partitions(now)}
+
+    async def run_maintenance(self, interval: Optional[float] = None):
+        """Run ``maintain`` periodically off the event loop, until cancelled"""
+        loop = asyncio.get_running_loop()
+        interval = interval if interval is not None else min(self.span, 3600)
+        while True:
+            try:
+                await loop.run_in_executor(None, self.maintain)
+            except Exception as e:
+                logger.error(f"Position partition maintenance failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start_maintenance(self, interval: Optional[float] = None) -> asyncio.Task:
+        """Schedule ``run_maintenance`` on the running event loop (once per manager)"""
+        if self._maintenance_task is None or self._maintenance_task.done():
+            self._maintenance_task = asyncio.get_running_loop().create_task(self.run_maintenance(interval))
+            logger.info("Started position partition maintenance")
+        return self._maintenance_task
+
+    async def stop_maintenance(self):
+        """Cancel the scheduled maintenance task"""
+        task, self._maintenance_task = self._maintenance_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    # Queries
+
+    def partitions_for_range(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """Partitions overlapping [start, end] (epoch seconds); the rest are pruned"""
+        partitions = self.partitions()
+        horizon = to_epoch(None) if end is None else end
+        if not partitions or horizon >= self.partition_bounds(partitions[-1])[1]:
+            # Newer partitions may have been created by another process
+            self.refresh()
+            partitions = self.partitions()
+        names = []
+        for name in partitions:
+            lower, upper = self.partition_bounds(name)
+            if (start is None or upper > start) and (end is None or lower <= end):
+                names.append(name)
+        return names
+
+    def query(self, mmsi: int, start: Optional[float] = None, end: Optional[float] = None,
+              limit: Optional[int] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Stored positions for one vessel in chronological order.
+
+        Same shape and semantics as ``PositionStore.recent``: ``start`` and
+        ``end`` are inclusive epoch seconds and ``limit`` keeps the newest
+        rows. Returns None when no partition overlaps the range.
+        """
+        try:
+            return self._query(mmsi, start, end, limit)
+        except SQLAlchemyError as e:
+            # A partition was dropped by another process; retry with the current list
+            logger.warning(f"Position history query failed, refreshing partitions: {e}")
+            self.refresh()
+            return self._query(mmsi, start, end, limit)
+
+    def _query(self, mmsi: int, start: Optional[float], end: Optional[float],
+               limit: Optional[int]) -> Optional[Dict[str, np.ndarray]]:
+        names = self.partitions_for_range(start, end)
+        if not names:
+            return None
+
+        with self._lock:
+            tables = [self._tables[name] for name in names if name in self._tables]
+        start_dt = datetime.utcfromtimestamp(start) if start is not None else None
+        end_dt = datetime.utcfromtimestamp(end) if end is not None else None
+        selects = []
+        for table in tables:
+            statement = select(*[table.c[column] for column in POSITION_COLUMNS]).where(table.c.mmsi == mmsi)
+            if start_dt is not None:
+                statement = statement.where(table.c.timestamp >= start_dt)
+            if end_dt is not None:
+                statement = statement.where(table.c.timestamp <= end_dt)
+            selects.append(statement)
+
+        combined = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+        statement = select(combined).order_by(combined.c.timestamp.desc())
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()[::-1]
+        return self._columns(rows)
+
+    @staticmethod
+    def _columns(rows: Sequence) -> Dict[str, np.ndarray]:
+        names = list(POSITION_COLUMNS)
+        values = {name: [getattr(row, name) for row in rows] for name in names}
+        values['timestamp'] = [to_epoch(value) for value in values['timestamp']]
+        values['navigation_status'] = [nav_status_code(value) for value in values['navigation_status']]
+        return {
+            name: np.array([np.nan if v is None else v for v in values[name]], dtype=dtype)
+            if dtype != np.int8 else np.array(values[name], dtype=dtype)
+            for name, dtype in POSITION_COLUMNS.items()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get partition statistics"""
+        partitions = self.partitions()
+        return {
+            'granularity': self.granularity,
+            'partition_count': len(partitions),
+            'sealed_count': len(self._sealed),
+            'oldest_partition': partitions[0] if partitions else None,
+            'newest_partition': partitions[-1] if partitions else None,
+            'created_count': self.created_count,
+            'dropped_count': self.dropped_count,
+            'retention_days': self.retention_days
+        }
+
+
+@lru_cache()
+def get_position_history() -> Optional[PositionPartitionManager]:
+    """Get the partitioned position history, or None when it is not enabled"""
+    if not settings.position_history_enabled:
+        return None
+    return PositionPartitionManager(granularity=settings.position_partition_granularity)
@@ -0,0 +1,270 @@
+"""
+Immutable, day-partitioned, memory-mapped columnar archive of position reports
+"""
+
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import structlog
+
+from ..core.config import settings
+from .position_batch import PositionBatch
+from .position_store import POSITION_COLUMNS, to_epoch
+
+logger = structlog.get_logger(__name__)
+
+# Column files of one archived day; rows sorted by (mmsi, timestamp)
+ARCHIVE_COLUMNS = dict(PositionBatch.COLUMNS, data_source=np.int16)
+
+DAY_FORMAT = '%Y%m%d'
+
+DEFAULT_INDEX_STRIDE = 4096
+
+
+def _day_key(value: Union[date, datetime, str]) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        value = datetime.fromtimestamp(to_epoch(value), timezone.utc)
+    return value.strftime(DAY_FORMAT)
+
+
+def _day_bounds(day: str) -> Tuple[float, float]:
+    start = datetime.strptime(day, DAY_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+    return start, start + 86400
+
+
+class ArchiveDay:
+    """One archived day, memory-mapped read-only"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path / 'meta.json') as handle:
+            meta = json.load(handle)
+        self.day = meta['day']
+        self.row_count = meta['rows']
+        self.sources: List[str] = meta['sources']
+        self.index_stride = meta['index_stride']
+        self.start, self.end = _day_bounds(self.day)
+
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.load(self.path / f'{name}.npy', mmap_mode='r') for name in ARCHIVE_COLUMNS
+        }
+        self.index_mmsi = np.load(self.path / 'index_mmsi.npy')
+        self.index_timestamp = np.load(self.path / 'index_timestamp.npy')
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def _position(self, mmsi: int, timestamp: float, side: str) -> int:
+        """Row position of the key (mmsi, timestamp), as ``np.searchsorted`` with ``side``"""
+        lo = int(np.searchsorted(self.index_mmsi, mmsi, 'left'))
+        hi = int(np.searchsorted(self.index_mmsi, mmsi, 'right'))
+        block = max(lo + int(np.searchsorted(self.index_timestamp[lo:hi], timestamp, side)) - 1, 0)
+        start = block * self.index_stride
+        end = min(start + self.index_stride, self.row_count)
+
+        mmsis = self.columns['mmsi'][start:end]
+        timestamps = self.columns['timestamp'][start:end]
+        before = timestamps < timestamp if side == 'left' else timestamps <= timestamp
+        return start + int(np.count_nonzero((mmsis < mmsi) | ((mmsis == mmsi) & before)))
+
+    def row_range(self, mmsi: int, start: Optional[float] = None, end: Optional[float] = None) -> slice:
+        """Rows of one vessel with ``start <= timestamp <= end`` (epoch seconds)"""
+        mmsi = int(mmsi)
+        return slice(self._position(mmsi, -np.inf if start is None else start, 'left'),
+                     self._position(mmsi, np.inf if end is None else end, 'right'))
+
+    def track(self, mmsi: int, start: Optional[float] = None,
+              end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """One vessel's positions, chronological, as views of the mapped columns"""
+        rows = self.row_range(mmsi, start, end)
+        return {name: self.columns[name][rows] for name in POSITION_COLUMNS}
+
+    def scan(self) -> Dict[str, np.ndarray]:
+        """Every column of the day (mapped, not copied), sorted by (mmsi, timestamp)"""
+        return self.columns
+
+    def source_name(self, code: int) -> Optional[str]:
+        return self.sources[code] if 0 <= code < len(self.sources) else None
+
+    def batches(self, rows=None) -> Iterator[PositionBatch]:
+        """Rows (a slice or index array; default all) as position batches, one per data source"""
+        rows = rows if rows is not None else slice(0, self.row_count)
+        codes = self.columns['data_source'][rows]
+        for code in np.unique(codes).tolist():
+            mask = codes == code
+            yield PositionBatch(data_source=self.source_name(code) or "unknown",
+                                **{name: self.columns[name][rows][mask] for name in PositionBatch.COLUMNS})
+
+
+class PositionArchive:
+    """Directory of immutable archived days"""
+
+    def __init__(self, root: Optional[str] = None, index_stride: int = DEFAULT_INDEX_STRIDE):
+        self.root = Path(root or settings.archive_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_stride = index_stride
+        self._open: Dict[str, ArchiveDay] = {}
+
+        self.written_days = 0
+        self.written_rows = 0
+
+    def days(self) -> List[str]:
+        """Archived days (YYYYMMDD), oldest first"""
+        names = []
+        for path in self.root.iterdir():
+            if path.is_dir() and (path / 'meta.json').exists():
+                try:
+                    datetime.strptime(path.name, DAY_FORMAT)
+                except ValueError:
+                    continue
+                names.append(path.name)
+        return sorted(names)
+
+    def days_for_range(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """Archived days overlapping [start, end] (epoch seconds)"""
+        names = []
+        for day in self.days():
+            lower, upper = _day_bounds(day)
+            if (start is None or upper > start) and (end is None or lower <= end):
+                names.append(day)
+        return names
+
+    def open_day(self, day: Union[date, datetime, str]) -> ArchiveDay:
+        """Map one archived day (cached; days are immutable)"""
+        day = _day_key(day)
+        opened = self._open.get(day)
+        if opened is None:
+            path = self.root / day
+            if not (path / 'meta.json').exists():
+                raise KeyError(f"Day {day} is not archived")
+            opened = self._open[day] = ArchiveDay(path)
+        return opened
+
+    # Writing
+
+    def write(self, batches: Iterable[PositionBatch]) -> List[str]:
+        """Archive position batches, one new day per UTC date they cover.
+
+        Raises ``FileExistsError`` if any of those days is already archived.
+        """
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return []
+
+        sources: List[str] = []
+        codes = []
+        for batch in batches:
+            if batch.data_source not in sources:
+                sources.append(batch.data_source)
+            codes.append(np.full(len(batch), sources.index(batch.data_source), dtype=np.int16))
+        columns = {name: np.concatenate([getattr(batch, name) for batch in batches])
+                   for name in PositionBatch.COLUMNS}
+        columns['data_source'] = np.concatenate(codes)
+
+        day_numbers = np.floor_divide(columns['timestamp'], 86400).astype(np.int64)
+        keys = np.unique(day_numbers)
+        days = [datetime.fromtimestamp(key * 86400, timezone.utc).strftime(DAY_FORMAT) for key in keys.tolist()]
+        existing = [day for day in days if (self.root / day).exists()]
+        if existing:
+            raise FileExistsError(f"Days already archived: {', '.join(existing)}")
+
+        for key, day in zip(keys.tolist(), days):
+            mask = day_numbers == key
+            self._write_day(day, {name: values[mask] for name, values in columns.items()}, sources)
+        return days
+
+    def _write_day(self, day: str, columns: Dict[str, np.ndarray], sources: List[str]):
+        order = np.lexsort((columns['timestamp'], columns['mmsi']))
+        rows = len(order)
+
+        # Only the sources this day references, renumbered from 0
+        used = np.unique(columns['data_source'])
+        remap = np.full(len(sources), -1, dtype=np.int16)
+        remap[used] = np.arange(len(used), dtype=np.int16)
+
+        staging = self.root / f'.tmp-{day}-{os.getpid()}'
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir()
+        try:
+            for name, dtype in ARCHIVE_COLUMNS.items():
+                values = columns[name][order].astype(dtype, copy=False)
+                if name == 'data_source':
+                    values = remap[values]
+                np.save(staging / f'{name}.npy', np.ascontiguousarray(values))
+            sample = np.arange(0, rows, self.index_stride)
+            np.save(staging / 'index_mmsi.npy', columns['mmsi'][order][sample].astype(np.int64))
+            np.save(staging / 'index_timestamp.npy', columns['timestamp'][order][sample].astype(np.float64))
+            with open(staging / 'meta.json', 'w') as handle:
+                json.dump({
+                    'day': day,
+                    'rows': rows,
+                    'sources': [sources[code] for code in used.tolist()],
+                    'index_stride': self.index_stride,
+                    'columns': {name: np.dtype(dtype).str for name, dtype in ARCHIVE_COLUMNS.items()}
+                }, handle)
+            os.rename(staging, self.root / day)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self.written_days += 1
+        self.written_rows += rows
+        logger.info(f"Archived {rows} positions for {day}")
+
+    # Reading
+
+    def track(self, mmsi: int, start: Optional[float] = None,
+              end: Optional[float] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Archived positions for one vessel in chronological order.
+
+        Same shape as ``PositionStore.recent``; ``start`` and ``end`` are
+        inclusive epoch seconds. A range within one day returns views of
+        the mapped files; longer ranges are concatenated. Returns None when
+        no archived day overlaps the range.
+        """
+        days = self.days_for_range(start, end)
+        if not days:
+            return None
+        parts = [self.open_day(day).track(mmsi, start, end) for day in days]
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in POSITION_COLUMNS}
+
+    def scan(self, day: Union[date, datetime, str]) -> Dict[str, np.ndarray]:
+        """Every column of one day, memory-mapped (see ``ArchiveDay.scan``)"""
+        return self.open_day(day).scan()
+
+    def iter_days(self, start: Optional[float] = None,
+                  end: Optional[float] = None) -> Iterator[ArchiveDay]:
+        """Archived days overlapping [start, end], oldest first"""
+        for day in self.days_for_range(start, end):
+            yield self.open_day(day)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get archive statistics"""
+        days = self.days()
+        return {
+            'root': str(self.root),
+            'day_count': len(days),
+            'oldest_day': days[0] if days else None,
+            'newest_day': days[-1] if days else None,
+            'open_days': len(self._open),
+            'mapped_rows': sum(len(day) for day in self._open.values()),
+            'written_days': self.written_days,
+            'written_rows': self.written_rows
+        }
+
+
+@lru_cache()
+def get_position_archive() -> PositionArchive:
+    """Get the position archive under ``settings.archive_dir``"""
+    return PositionArchive()
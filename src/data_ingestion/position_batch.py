@@ -0,0 +1,191 @@
+"""
+Columnar batch of vessel position reports
+"""
+
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+from ..models.vessel import VesselPositionCreate
+from .position_store import NAVIGATION_STATUSES, from_epoch, nav_status_code, to_epoch
+
+
+class PositionBatch:
+    """A batch of position reports held as NumPy columns"""
+
+    COLUMNS = {
+        'mmsi': np.int64,
+        'latitude': np.float64,
+        'longitude': np.float64,
+        'speed_over_ground': np.float32,
+        'course_over_ground': np.float32,
+        'true_heading': np.float32,
+        'navigation_status': np.int8,
+        'timestamp': np.float64,
+    }
+
+    def __init__(self, mmsi, latitude, longitude, timestamp, speed_over_ground=None,
+                 course_over_ground=None, true_heading=None, navigation_status=None,
+                 data_source: str = "unknown", destination=None, eta=None):
+        n = len(mmsi)
+        self.mmsi = np.asarray(mmsi, dtype=np.int64)
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.timestamp = np.asarray(timestamp, dtype=np.float64)
+        self.speed_over_ground = self._optional(speed_over_ground, n, np.float32, np.nan)
+        self.course_over_ground = self._optional(course_over_ground, n, np.float32, np.nan)
+        self.true_heading = self._optional(true_heading, n, np.float32, np.nan)
+        self.navigation_status = self._optional(navigation_status, n, np.int8, -1)
+        self.data_source = data_source
+        self.destination = None if destination is None else np.asarray(destination, dtype=object)
+        self.eta = None if eta is None else np.asarray(eta, dtype=np.float64)
+
+    @staticmethod
+    def _optional(values, n: int, dtype, fill) -> np.ndarray:
+        if values is None:
+            return np.full(n, fill, dtype=dtype)
+        return np.asarray(values, dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self.mmsi)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Column name -> array"""
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns().values())
+
+    def take(self, index) -> "PositionBatch":
+        """Rows selected by a boolean mask, index array or slice"""
+        return PositionBatch(data_source=self.data_source,
+                             destination=None if self.destination is None else self.destination[index],
+                             eta=None if self.eta is None else self.eta[index],
+                             **{name: values[index] for name, values in self.columns().items()})
+
+    @classmethod
+    def concat(cls, batches: Sequence["PositionBatch"]) -> "PositionBatch":
+        """Concatenate batches (the data source of the first batch is kept)"""
+        if not batches:
+            return cls.empty()
+        voyage = {}
+        if any(b.destination is not None for b in batches):
+            voyage['destination'] = np.concatenate([
+                b.destination if b.destination is not None else np.full(len(b), None, dtype=object)
+                for b in batches
+            ])
+            voyage['eta'] = np.concatenate([b.eta if b.eta is not None else np.full(len(b), np.nan)
+                                            for b in batches])
+        return cls(data_source=batches[0].data_source, **voyage,
+                   **{name: np.concatenate([getattr(b, name) for b in batches]) for name in cls.COLUMNS})
+
+    @classmethod
+    def empty(cls, data_source: str = "unknown") -> "PositionBatch":
+        return cls(mmsi=[], latitude=[], longitude=[], timestamp=[], data_source=data_source)
+
+    @classmethod
+    def from_models(cls, positions: Sequence[VesselPositionCreate],
+                    data_source: Optional[str] = None) -> "PositionBatch":
+        """Build a batch from pydantic position models"""
+
+        def optional(values):
+            return [np.nan if v is None else v for v in values]
+
+        return cls(
+            mmsi=[p.mmsi for p in positions],
+            latitude=[p.latitude for p in positions],
+            longitude=[p.longitude for p in positions],
+            speed_over_ground=optional(p.speed_over_ground for p in positions),
+            course_over_ground=optional(p.course_over_ground for p in positions),
+            true_heading=optional(p.true_heading for p in positions),
+            navigation_status=[nav_status_code(p.navigation_status) for p in positions],
+            timestamp=[to_epoch(p.timestamp) for p in positions],
+            data_source=data_source or (positions[0].data_source if positions else "unknown")
+        )
+
+    @classmethod
+    def from_dicts(cls, positions: Sequence[Dict[str, Any]],
+                   data_source: Optional[str] = None) -> "PositionBatch":
+        """Build a batch from position dicts (``VesselPositionCreate.dict()`` rows)"""
+
+        def optional(values):
+            return [np.nan if v is None else v for v in values]
+
+        return cls(
+            mmsi=[p['mmsi'] for p in positions],
+            latitude=[p['latitude'] for p in positions],
+            longitude=[p['longitude'] for p in positions],
+            speed_over_ground=optional(p.get('speed_over_ground') for p in positions),
+            course_over_ground=optional(p.get('course_over_ground') for p in positions),
+            true_heading=optional(p.get('true_heading') for p in positions),
+            navigation_status=[nav_status_code(p.get('navigation_status')) for p in positions],
+            timestamp=[to_epoch(p.get('timestamp')) for p in positions],
+            data_source=data_source or (positions[0].get('data_source') if positions else None) or "unknown"
+        )
+
+    def _voyage(self):
+        """Destination and ETA lists (None where missing)"""
+        n = len(self)
+        if self.destination is None:
+            return [None] * n, [None] * n
+        etas = [None if eta != eta else from_epoch(eta) for eta in self.eta.tolist()]
+        return self.destination.tolist(), etas
+
+    def to_models(self) -> Iterator[VesselPositionCreate]:
+        """Lazily convert rows to pydantic models"""
+        destinations, etas = self._voyage()
+        mmsis = self.mmsi.tolist()
+        latitudes = self.latitude.tolist()
+        longitudes = self.longitude.tolist()
+        speeds = self.speed_over_ground.tolist()
+        courses = self.course_over_ground.tolist()
+        headings = self.true_heading.tolist()
+        statuses = self.navigation_status.tolist()
+        timestamps = self.timestamp.tolist()
+
+        for i in range(len(mmsis)):
+            timestamp = from_epoch(timestamps[i])
+            yield VesselPositionCreate(
+                mmsi=mmsis[i],
+                latitude=latitudes[i],
+                longitude=longitudes[i],
+                speed_over_ground=None if speeds[i] != speeds[i] else speeds[i],
+                course_over_ground=None if courses[i] != courses[i] else courses[i] % 360,
+                true_heading=None if headings[i] != headings[i] else headings[i] % 360,
+                navigation_status=NAVIGATION_STATUSES[statuses[i]] if statuses[i] >= 0 else None,
+                destination=destinations[i],
+                eta=etas[i],
+                timestamp=timestamp,
+                message_timestamp=timestamp,
+                data_source=self.data_source
+            )
+
+    def to_records(self) -> Iterator[Dict[str, Any]]:
+        """Lazily convert rows to plain dicts (ISO timestamps) without model validation"""
+        destinations, etas = self._voyage()
+        mmsis = self.mmsi.tolist()
+        latitudes = self.latitude.tolist()
+        longitudes = self.longitude.tolist()
+        speeds = self.speed_over_ground.tolist()
+        courses = self.course_over_ground.tolist()
+        headings = self.true_heading.tolist()
+        statuses = self.navigation_status.tolist()
+        timestamps = self.timestamp.tolist()
+
+        for i in range(len(mmsis)):
+            timestamp = from_epoch(timestamps[i]).isoformat()
+            yield {
+                'mmsi': mmsis[i],
+                'latitude': latitudes[i],
+                'longitude': longitudes[i],
+                'speed_over_ground': None if speeds[i] != speeds[i] else speeds[i],
+                'course_over_ground': None if courses[i] != courses[i] else courses[i],
+                'true_heading': None if headings[i] != headings[i] else headings[i],
+                'navigation_status': NAVIGATION_STATUSES[statuses[i]].value if statuses[i] >= 0 else None,
+                'destination': destinations[i],
+                'eta': None if etas[i] is None else etas[i].isoformat(),
+                'timestamp': timestamp,
+                'message_timestamp': timestamp,
+                'data_source': self.data_source
+            }
@@ -0,0 +1,426 @@
+"""
+Redis-backed latest-position cache shared by API workers
+"""
+
+import asyncio
+import math
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import structlog
+
+# Optional imports
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from ..core.config import settings
+from ..core.geo import haversine_nm
+from ..models.vessel import VesselPositionCreate
+from .position_batch import PositionBatch
+from .position_store import POSITION_COLUMNS, nav_status_code, to_epoch
+
+logger = structlog.get_logger(__name__)
+
+KM_PER_NM = 1.852
+KM_PER_DEGREE_LAT = 111.32
+
+
+class RedisPositionCache:
+    """Latest position per vessel in Redis, shared by every API worker"""
+
+    def __init__(self, client=None, prefix: str = 'mf', ttl_seconds: Optional[float] = None):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis is not installed")
+            client = aioredis.from_url(settings.redis_url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = int(ttl_seconds if ttl_seconds is not None else settings.max_vessel_age_hours * 3600)
+        self.geo_key = f"{prefix}:geo"
+        self.ts_key = f"{prefix}:ts"
+
+        self._sources: List[str] = []
+        self._source_codes: Dict[str, int] = {}
+
+        self.written_count = 0
+        self.pipeline_count = 0
+        self.pruned_count = 0
+        self.out_of_order_count = 0
+        self.error_count = 0
+
+    def _key(self, mmsi: int) -> str:
+        return f"{self.prefix}:pos:{mmsi}"
+
+    def source_name(self, code: int) -> Optional[str]:
+        return self._sources[code] if 0 <= code < len(self._sources) else None
+
+    def _source_code(self, name: Optional[str]) -> int:
+        if name is None:
+            return -1
+        code = self._source_codes.get(name)
+        if code is None:
+            code = self._source_codes[name] = len(self._sources)
+            self._sources.append(name)
+        return code
+
+    # Writes
+
+    async def _write_rows(self, rows: Sequence[Dict[str, Any]]):
+        if not rows:
+            return
+        try:
+            # Late reports must not replace a newer cached position
+            cached = await self.client.zmscore(self.ts_key, [row['mmsi'] for row in rows])
+        except Exception as e:
+            self.error_count += len(rows)
+            logger.error(f"Failed to read cached report times from Redis: {e}")
+            return
+        newer = [row for row, score in zip(rows, cached) if score is None or float(score) <= row['timestamp']]
+        self.out_of_order_count += len(rows) - len(newer)
+        rows = newer
+        if not rows:
+            return
+
+        pipe = self.client.pipeline(transaction=False)
+        geo_values: List[Any] = []
+        for row in rows:
+            key = self._key(row['mmsi'])
+            pipe.delete(key)
+            pipe.hset(key, mapping={name: value for name, value in row.items()
+                                    if value is not None and value == value})
+            pipe.expire(key, self.ttl_seconds)
+            geo_values.extend((row['longitude'], row['latitude'], row['mmsi']))
+        pipe.geoadd(self.geo_key, geo_values)
+        pipe.zadd(self.ts_key, {row['mmsi']: row['timestamp'] for row in rows}, gt=True)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            # A cache outage must not stop ingestion; the next write refreshes the entries
+            self.error_count += len(rows)
+            logger.error(f"Failed to write {len(rows)} positions to Redis: {e}")
+            return
+        self.written_count += len(rows)
+        self.pipeline_count += 1
+
+    async def update(self, position: VesselPositionCreate):
+        """Write one position report"""
+        await self._write_rows([{
+            'mmsi': int(position.mmsi),
+            'latitude': position.latitude,
+            'longitude': position.longitude,
+            'speed_over_ground': position.speed_over_ground,
+            'course_over_ground': position.course_over_ground,
+            'true_heading': position.true_heading,
+            'navigation_status': nav_status_code(position.navigation_status),
+            'timestamp': to_epoch(position.timestamp),
+            'data_source': position.data_source,
+        }])
+
+    async def update_batch(self, batch: PositionBatch):
+        """Write the newest report of each vessel in a batch, in one pipeline"""
+        if not len(batch):
+            return
+        order = np.lexsort((batch.timestamp, batch.mmsi))
+        mmsi = batch.mmsi[order]
+        last = order[np.append(mmsi[1:] != mmsi[:-1], True)]
+        newest = batch.take(last)
+
+        columns = {name: getattr(newest, name).tolist() for name in POSITION_COLUMNS}
+        names = list(columns)
+        rows = []
+        for mmsi, values in zip(newest.mmsi.tolist(), zip(*columns.values())):
+            row = dict(zip(names, values))
+            row['mmsi'] = mmsi
+            row['data_source'] = newest.data_source
+            rows.append(row)
+        await self._write_rows(rows)
+
+    async def prune(self, now: Optional[float] = None) -> int:
+        """Remove vessels older than ``ttl_seconds`` from the GEO and time indexes"""
+        cutoff = (to_epoch(None) if now is None else now) - self.ttl_seconds
+        stale = await self.client.zrangebyscore(self.ts_key, '-inf', cutoff)
+        if stale:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zrem(self.geo_key, *stale)
+            pipe.zrem(self.ts_key, *stale)
+            pipe.delete(*[self._key(mmsi) for mmsi in stale])
+            await pipe.execute()
+            self.pruned_count += len(stale)
+        return len(stale)
+
+    async def run_pruning(self, interval: float = 60.0):
+        """Run ``prune`` periodically, until cancelled"""
+        while True:
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.error(f"Failed to prune the Redis position cache: {e}")
+            await asyncio.sleep(interval)
+
+    # Reads
+
+    async def get(self, mmsi: int) -> Optional[Dict[str, Any]]:
+        """Latest position for one vessel (same record shape as ``PositionStore.get``)"""
+        record = await self.client.hgetall(self._key(mmsi))
+        if not record:
+            return None
+        columns = self._columns([int(mmsi)], [record])
+        result = {name: values[0].item() for name, values in columns.items()}
+        result['data_source'] = record.get('data_source')
+        return result
+
+    async def _fetch(self, mmsis: Sequence[Any]) -> Dict[str, np.ndarray]:
+        pipe = self.client.pipeline(transaction=False)
+        for mmsi in mmsis:
+            pipe.hgetall(self._key(mmsi))
+        records = await pipe.execute() if mmsis else []
+        # Members whose hash already expired are skipped
+        found = [(int(mmsi), record) for mmsi, record in zip(mmsis, records) if record]
+        return self._columns([mmsi for mmsi, _ in found], [record for _, record in found])
+
+    def _columns(self, mmsis: List[int], records: List[Dict[str, str]]) -> Dict[str, np.ndarray]:
+        columns = {}
+        for name, dtype in POSITION_COLUMNS.items():
+            if np.issubdtype(dtype, np.integer):
+                columns[name] = np.array([int(r.get(name, -1)) for r in records], dtype=dtype)
+            else:
+                columns[name] = np.array([float(r.get(name, 'nan')) for r in records], dtype=dtype)
+        columns['mmsi'] = np.array(mmsis, dtype=np.int64)
+        columns['data_source'] = np.array([self._source_code(r.get('data_source')) for r in records],
+                                          dtype=np.int16)
+        return columns
+
+    def _cutoff(self) -> float:
+        return to_epoch(None) - self.ttl_seconds
+
+    async def snapshot(self, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Latest positions, most recently reported vessels first"""
+        if limit is not None and limit <= 0:
+            return self._columns([], [])
+        # Only members reported within the TTL, so unpruned ones do not use up the limit
+        mmsis = await self.client.zrevrangebyscore(self.ts_key, '+inf', self._cutoff(),
+                                                   start=None if limit is None else 0, num=limit)
+        return await self._fetch(mmsis)
+
+    async def within(self, latitude: float, longitude: float, radius_nm: float,
+                     limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Latest positions within ``radius_nm`` of a point, nearest first"""
+        if limit is not None and limit <= 0:
+            return self._columns([], [])
+        count = limit
+        while True:
+            mmsis = await self.client.geosearch(self.geo_key, longitude=longitude, latitude=latitude,
+                                                radius=radius_nm * KM_PER_NM, unit='km', sort='ASC',
+                                                count=count)
+            columns = await self._fetch(mmsis)
+            # Expired members not yet pruned are skipped; search further until ``limit`` are found
+            if count is None or len(mmsis) < count or len(columns['mmsi']) >= limit:
+                break
+            count *= 2
+        if limit is not None and len(columns['mmsi']) > limit:
+            columns = {name: values[:limit] for name, values in columns.items()}
+        return columns
+
+    async def in_bbox(self, north: float, south: float, east: float, west: float,
+                      limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Latest positions inside the box (``west > east`` crosses the antimeridian)"""
+        spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        widest_lat = 0.0 if south <= 0 <= north else min(abs(north), abs(south))
+        km_per_degree_lon = KM_PER_DEGREE_LAT * math.cos(math.radians(widest_lat))
+
+        mmsis: List[Any] = []
+        for span_west, span_east in spans:
+            # GEO boxes are approximate, so search a covering box and filter exactly below
+            mmsis.extend(await self.client.geosearch(
+                self.geo_key, longitude=(span_west + span_east) / 2, latitude=(north + south) / 2,
+                width=(span_east - span_west) * km_per_degree_lon + 1.0,
+                height=(north - south) * KM_PER_DEGREE_LAT + 1.0, unit='km'
+            ))
+
+        columns = await self._fetch(list(dict.fromkeys(mmsis)))
+        lat, lon = columns['latitude'], columns['longitude']
+        inside = (lat <= north) & (lat >= south)
+        inside &= ((lon >= west) & (lon <= east)) if west <= east else ((lon >= west) | (lon <= east))
+        rows = np.flatnonzero(inside)
+        if limit is not None:
+            rows = rows[:max(limit, 0)]
+        return {name: values[rows] for name, values in columns.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            'written_count': self.written_count,
+            'pipeline_count': self.pipeline_count,
+            'pruned_count': self.pruned_count,
+            'out_of_order_count': self.out_of_order_count,
+            'error_count': self.error_count,
+            'avg_pipeline_rows': self.written_count / max(self.pipeline_count, 1),
+            'ttl_seconds': self.ttl_seconds
+        }
+
+
+class InMemoryRedis:
+    """In-process stand-in for the Redis commands the position cache uses"""
+
+    def __init__(self):
+        self.hashes: Dict[str, Dict[str, str]] = {}
+        self.zsets: Dict[str, Dict[str, float]] = {}
+        self.geo: Dict[str, Dict[str, tuple]] = {}
+        self.expires: Dict[str, float] = {}
+        self.command_count = 0
+
+    def _expired(self, key: str) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.hashes.pop(key, None)
+            self.expires.pop(key, None)
+            return True
+        return False
+
+    def pipeline(self, transaction: bool = True) -> "_InMemoryPipeline":
+        return _InMemoryPipeline(self)
+
+    async def hset(self, name: str, mapping: Dict[str, Any]) -> int:
+        self.command_count += 1
+        self._expired(name)
+        fields = self.hashes.setdefault(name, {})
+        added = len(set(mapping) - set(fields))
+        fields.update({field: str(value) for field, value in mapping.items()})
+        return added
+
+    async def hgetall(self, name: str) -> Dict[str, str]:
+        self.command_count += 1
+        if self._expired(name):
+            return {}
+        return dict(self.hashes.get(name, {}))
+
+    async def expire(self, name: str, seconds: int) -> bool:
+        self.command_count += 1
+        if name not in self.hashes:
+            return False
+        self.expires[name] = time.time() + seconds
+        return True
+
+    async def delete(self, *names: str) -> int:
+        self.command_count += 1
+        removed = 0
+        for name in names:
+            removed += (self.hashes.pop(name, None) is not None) + (self.zsets.pop(name, None) is not None)
+            self.geo.pop(name, None)
+            self.expires.pop(name, None)
+        return removed
+
+    async def geoadd(self, name: str, values: Sequence[Any]) -> int:
+        self.command_count += 1
+        members = self.geo.setdefault(name, {})
+        added = 0
+        for i in range(0, len(values), 3):
+            longitude, latitude, member = values[i:i + 3]
+            added += str(member) not in members
+            members[str(member)] = (float(longitude), float(latitude))
+        return added
+
+    async def geosearch(self, name: str, longitude: float, latitude: float, radius: Optional[float] = None,
+                        width: Optional[float] = None, height: Optional[float] = None, unit: str = 'km',
+                        sort: Optional[str] = None, count: Optional[int] = None) -> List[str]:
+        self.command_count += 1
+        members = self.geo.get(name, {})
+        if not members:
+            return []
+        names = list(members)
+        lon = np.array([members[m][0] for m in names])
+        lat = np.array([members[m][1] for m in names])
+        distance = haversine_nm(latitude, longitude, lat, lon) * KM_PER_NM
+        if radius is not None:
+            match = distance <= radius
+        else:
+            dy = np.abs(lat - latitude) * KM_PER_DEGREE_LAT
+            dlon = np.abs((lon - longitude + 180.0) % 360.0 - 180.0)
+            dx = dlon * KM_PER_DEGREE_LAT * np.cos(np.radians(lat))
+            match = (dx <= width / 2) & (dy <= height / 2)
+        rows = np.flatnonzero(match)
+        if sort == 'ASC':
+            rows = rows[np.argsort(distance[rows], kind='stable')]
+        if count is not None:
+            rows = rows[:count]
+        return [names[i] for i in rows.tolist()]
+
+    async def zadd(self, name: str, mapping: Dict[Any, float], gt: bool = False) -> int:
+        self.command_count += 1
+        members = self.zsets.setdefault(name, {})
+        added = len({str(m) for m in mapping} - set(members))
+        for member, score in mapping.items():
+            current = members.get(str(member))
+            if not gt or current is None or float(score) > current:
+                members[str(member)] = float(score)
+        return added
+
+    async def zmscore(self, name: str, members: Sequence[Any]) -> List[Optional[float]]:
+        self.command_count += 1
+        scores = self.zsets.get(name, {})
+        return [scores.get(str(member)) for member in members]
+
+    async def zrem(self, name: str, *members: Any) -> int:
+        self.command_count += 1
+        removed = 0
+        for member in members:
+            removed += self.zsets.get(name, {}).pop(str(member), None) is not None
+            removed += self.geo.get(name, {}).pop(str(member), None) is not None
+        return removed
+
+    async def zrevrange(self, name: str, start: int, end: int) -> List[str]:
+        self.command_count += 1
+        ordered = sorted(self.zsets.get(name, {}).items(), key=lambda item: item[1], reverse=True)
+        return [member for member, _ in ordered[start:None if end == -1 else end + 1]]
+
+    async def zrangebyscore(self, name: str, min: Any, max: Any) -> List[str]:
+        self.command_count += 1
+        low, high = float(min), float(max)
+        ordered = sorted(self.zsets.get(name, {}).items(), key=lambda item: item[1])
+        return [member for member, score in ordered if low <= score <= high]
+
+    async def zrevrangebyscore(self, name: str, max: Any, min: Any, start: Optional[int] = None,
+                               num: Optional[int] = None) -> List[str]:
+        self.command_count += 1
+        low, high = float(min), float(max)
+        ordered = sorted(self.zsets.get(name, {}).items(), key=lambda item: item[1], reverse=True)
+        members = [member for member, score in ordered if low <= score <= high]
+        if start is not None:
+            members = members[start:None if num is None or num < 0 else start + num]
+        return members
+
+
+class _InMemoryPipeline:
+    """Queues commands and runs them on ``execute``, like a non-transactional pipeline"""
+
+    def __init__(self, redis: InMemoryRedis):
+        self._redis = redis
+        self._commands: List[tuple] = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._redis, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+@lru_cache()
+def get_position_cache() -> Optional[RedisPositionCache]:
+    """Get the shared Redis position cache, or None when it is not enabled"""
+    if not settings.redis_position_cache_enabled:
+        return None
+    if not REDIS_AVAILABLE:
+        logger.warning("REDIS_POSITION_CACHE_ENABLED is set but redis is not installed")
+        return None
+    return RedisPositionCache()
@@ -0,0 +1,308 @@
+"""
+Batched persistence of position reports to the vessel_positions table
+"""
+
+import asyncio
+import csv
+import io
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+import structlog
+
+from ..core.config import settings
+from ..models.vessel import Vessel, VesselPosition, VesselPositionCreate
+from .partitioning import PositionPartitionManager
+from .position_batch import PositionBatch
+from .position_store import NAVIGATION_STATUSES
+
+logger = structlog.get_logger(__name__)
+
+
+@compiles(JSONB, 'sqlite')
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    # Lets the PostgreSQL table definitions be created on SQLite for local testing
+    return 'JSON'
+
+
+POSITION_COLUMNS = (
+    'mmsi', 'latitude', 'longitude', 'course_over_ground', 'speed_over_ground', 'true_heading',
+    'navigation_status', 'timestamp', 'message_timestamp', 'received_timestamp', 'data_source'
+)
+
+# Store code -> column value; code -1 (unknown) indexes the trailing None
+_NAV_STATUS_VALUES = np.array([status.value for status in NAVIGATION_STATUSES] + [None], dtype=object)
+
+
+def _optional_column(values: np.ndarray) -> List[Any]:
+    out = values.astype(np.float64).astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+
+def _timestamp_column(epochs: np.ndarray) -> List[str]:
+    """'YYYY-MM-DD HH:MM:SS.ffffff' strings, which both PostgreSQL and SQLAlchemy's SQLite DateTime read"""
+    stamps = np.datetime_as_string(np.round(epochs * 1e6).astype(np.int64).astype('datetime64[us]'), unit='us')
+    return np.char.replace(stamps, 'T', ' ').tolist()
+
+
+def position_rows(batch: PositionBatch, received_at: str) -> List[Tuple]:
+    """Rows of ``POSITION_COLUMNS`` for a batch"""
+    n = len(batch)
+    timestamps = _timestamp_column(batch.timestamp)
+    return list(zip(
+        batch.mmsi.tolist(), batch.latitude.tolist(), batch.longitude.tolist(),
+        _optional_column(batch.course_over_ground), _optional_column(batch.speed_over_ground),
+        _optional_column(batch.true_heading), _NAV_STATUS_VALUES[batch.navigation_status].tolist(),
+        timestamps, timestamps, [received_at] * n, [batch.data_source] * n
+    ))
+
+
+class PositionPersistenceSink:
+    """Buffer position reports and write them to vessel_positions in bulk"""
+
+    def __init__(self, database_url: Optional[str] = None, batch_size: Optional[int] = None,
+                 max_pending_batches: int = 4, create_tables: bool = False, engine=None,
+                 partitions: Optional[PositionPartitionManager] = None):
+        self._owns_engine = engine is None and partitions is None
+        if engine is None:
+            engine = partitions.engine if partitions is not None else create_engine(database_url or settings.database_url)
+        self.engine = engine
+        self.partitions = partitions
+        self.batch_size = batch_size or settings.batch_size
+        self.max_pending_batches = max_pending_batches
+        self.use_copy = self.engine.dialect.name == 'postgresql' and self.engine.dialect.driver == 'psycopg2'
+
+        marker = {'qmark': '?', 'numeric': ':{}'}.get(self.engine.dialect.paramstyle, '%s')
+        placeholders = ', '.join(marker.format(i + 1) for i in range(len(POSITION_COLUMNS)))
+        self._insert_sql = (f"INSERT INTO {{table}} ({', '.join(POSITION_COLUMNS)}) "
+                            f"VALUES ({placeholders})")
+        self._vessel_sql = (f"INSERT INTO vessels (mmsi, is_active) VALUES ({marker.format(1)}, {marker.format(2)}) "
+                            f"ON CONFLICT (mmsi) DO NOTHING")
+        self._copy_sql = f"COPY {{table}} ({', '.join(POSITION_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+        self._batches: List[PositionBatch] = []
+        self._models: Dict[str, List[VesselPositionCreate]] = {}
+        self._pending_rows = 0
+        self._in_flight: Deque = deque()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='position-sink')
+
+        self.written_rows = 0
+        self.batch_count = 0
+        self.error_rows = 0
+        self.expired_rows = 0
+        self.write_seconds = 0.0
+
+        if create_tables:
+            self.create_tables()
+
+    def create_tables(self):
+        """Create ``vessels`` and ``vessel_positions`` if they do not exist"""
+        Vessel.metadata.create_all(self.engine, tables=[Vessel.__table__, VesselPosition.__table__])
+
+    async def update(self, position: VesselPositionCreate):
+        """Buffer one position report"""
+        self._models.setdefault(position.data_source, []).append(position)
+        self._pending_rows += 1
+        if self._pending_rows >= self.batch_size:
+            await self._submit()
+
+    async def update_batch(self, batch: PositionBatch):
+        """Buffer a batch of position reports"""
+        if not len(batch):
+            return
+        self._batches.append(batch)
+        self._pending_rows += len(batch)
+        if self._pending_rows >= self.batch_size:
+            await self._submit()
+
+    def _enqueue(self):
+        """Hand the buffered reports to the writer thread without waiting"""
+        batches, models = self._batches, self._models
+        self._batches = []
+        self._models = {}
+        self._pending_rows = 0
+        if batches or models:
+            self._in_flight.append(self._executor.submit(self._persist, batches, models))
+
+    async def _submit(self):
+        self._enqueue()
+        # Back-pressure on the collectors without blocking the event loop
+        while len(self._in_flight) > self.max_pending_batches:
+            await asyncio.wrap_future(self._in_flight.popleft())
+
+    def _persist(self, batches: List[PositionBatch], models: Dict[str, List[VesselPositionCreate]]):
+        """Build rows for buffered reports and write them per table (runs in the writer thread)"""
+        try:
+            tables = self._tables(batches, models)
+        except Exception as e:
+            # Like a failed write: counted and logged, never raised into the collector
+            rows = sum(len(batch) for batch in batches) + sum(len(positions) for positions in models.values())
+            self.error_rows += rows
+            logger.error(f"Failed to prepare {rows} positions for persistence: {e}")
+            return
+
+        for table, rows in tables.items():
+            for start in range(0, len(rows), self.batch_size):
+                self._write(table, rows[start:start + self.batch_size])
+
+    def _tables(self, batches: List[PositionBatch],
+                models: Dict[str, List[VesselPositionCreate]]) -> Dict[str, List[Tuple]]:
+        """Rows of the buffered reports grouped by destination table"""
+        batches = batches + [PositionBatch.from_models(positions, data_source)
+                             for data_source, positions in models.items()]
+
+        received_at = _timestamp_column(np.array([time.time()]))[0]
+        tables: Dict[Any, List[Tuple]] = {}
+        for batch in batches:
+            rows = position_rows(batch, received_at)
+            if self.partitions is None:
+                tables.setdefault('vessel_positions', []).extend(rows)
+                continue
+            keys = self.partitions.partition_keys(batch.timestamp).tolist()
+            for key, row in zip(keys, rows):
+                tables.setdefault(key, []).append(row)
+
+        if self.partitions is not None:
+            tables = {self.partitions.name_for_key(key): rows for key, rows in tables.items()}
+            for name in [name for name in tables if self.partitions.is_expired(name)]:
+                # Already past retention: storing it would only recreate a dropped partition
+                self.expired_rows += len(tables.pop(name))
+        return tables
+
+    def _write(self, table: str, rows: Sequence[Tuple]):
+        """Write one batch of rows in a single transaction (runs in the writer thread)"""
+        start = time.perf_counter()
+        try:
+            if self.partitions is not None:
+                self.partitions.ensure_partition(table)
+            with self.engine.begin() as connection:
+                connection.exec_driver_sql(self._vessel_sql, [(mmsi, True) for mmsi in {row[0] for row in rows}])
+                if self.use_copy:
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(rows)
+                    buffer.seek(0)
+                    connection.connection.cursor().copy_expert(self._copy_sql.format(table=table), buffer)
+                else:
+                    connection.exec_driver_sql(self._insert_sql.format(table=table), list(rows))
+            self.written_rows += len(rows)
+            self.batch_count += 1
+        except Exception as e:
+            self.error_rows += len(rows)
+            logger.error(f"Failed to persist {len(rows)} positions: {e}")
+        finally:
+            self.write_seconds += time.perf_counter() - start
+
+    def flush(self):
+        """Write everything buffered and wait for in-flight batches (blocking)"""
+        self._enqueue()
+        while self._in_flight:
+            self._in_flight.popleft().result()
+
+    def close(self):
+        """Flush and release the writer thread (and the engine, if the sink created it)"""
+        self.flush()
+        self._executor.shutdown(wait=True)
+        if self._owns_engine:
+            self.engine.dispose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get persistence statistics"""
+        return {
+            'dialect': self.engine.dialect.name,
+            'method': 'copy' if self.use_copy else 'executemany',
+            'written_rows': self.written_rows,
+            'batch_count': self.batch_count,
+            'error_rows': self.error_rows,
+            'expired_rows': self.expired_rows,
+            'buffered_rows': self._pending_rows,
+            'rows_per_second': self.written_rows / self.write_seconds if self.write_seconds else 0.0
+        }
+
+
+def synthetic_position_batch(row_count: int, vessel_count: int = 5000, seed: int = 0) -> PositionBatch:
+    """Random position batch for benchmarks"""
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    return PositionBatch(
+        mmsi=200000000 + rng.integers(0, vessel_count, row_count),
+        latitude=rng.uniform(-80, 80, row_count),
+        longitude=rng.uniform(-179, 179, row_count),
+        speed_over_ground=rng.uniform(0, 25, row_count),
+        course_over_ground=rng.uniform(0, 359.9, row_count),
+        true_heading=rng.uniform(0, 359.9, row_count),
+        navigation_status=rng.integers(-1, 9, row_count),
+        timestamp=now - rng.uniform(0, 3600, row_count),
+        data_source='benchmark'
+    )
+
+
+def benchmark_position_sink(row_count: int = 100000, orm_row_count: int = 2000,
+                            database_url: Optional[str] = None) -> Dict[str, float]:
+    """Compare per-row ORM inserts with ``PositionPersistenceSink`` in rows per second.
+
+    Defaults to a throwaway SQLite file; pass a PostgreSQL URL to measure COPY.
+    """
+    import os
+    import tempfile
+    from sqlalchemy.orm import Session
+
+    path = None
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+
+    try:
+        sink = PositionPersistenceSink(database_url, create_tables=True)
+
+        orm_batch = synthetic_position_batch(orm_row_count, seed=1)
+        with Session(sink.engine) as session:
+            for mmsi in set(orm_batch.mmsi.tolist()):
+                session.merge(Vessel(mmsi=mmsi))
+            session.commit()
+            start = time.perf_counter()
+            for position in orm_batch.to_models():
+                session.add(VesselPosition(
+                    mmsi=position.mmsi, latitude=position.latitude, longitude=position.longitude,
+                    course_over_ground=position.course_over_ground,
+                    speed_over_ground=position.speed_over_ground, true_heading=position.true_heading,
+                    navigation_status=position.navigation_status.value if position.navigation_status else None,
+                    timestamp=position.timestamp, message_timestamp=position.timestamp,
+                    received_timestamp=datetime.utcnow(), data_source=position.data_source
+                ))
+                session.commit()
+            orm_seconds = time.perf_counter() - start
+
+        async def feed(batch: PositionBatch):
+            for offset in range(0, row_count, 5000):
+                await sink.update_batch(batch.take(slice(offset, offset + 5000)))
+
+        batch = synthetic_position_batch(row_count)
+        start = time.perf_counter()
+        asyncio.run(feed(batch))
+        sink.flush()
+        bulk_seconds = time.perf_counter() - start
+        stats = sink.get_stats()
+        sink.close()
+    finally:
+        if path:
+            os.remove(path)
+
+    orm_rate = orm_row_count / orm_seconds if orm_seconds else 0.0
+    bulk_rate = stats['written_rows'] / bulk_seconds if bulk_seconds else 0.0
+    return {
+        'method': stats['method'],
+        'orm_rows': orm_row_count,
+        'orm_rows_per_second': orm_rate,
+        'bulk_rows': stats['written_rows'],
+        'bulk_rows_per_second': bulk_rate,
+        'speedup': bulk_rate / orm_rate if orm_rate else 0.0
+    }
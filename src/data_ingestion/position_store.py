@@ -0,0 +1,345 @@
+"""
+Columnar in-memory store for latest and recent vessel positions
+"""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Union
+
+import numpy as np
+
+from ..models.vessel import NavigationStatus, VesselPositionCreate
+from .spatial_index import SpatialGridIndex
+
+
+# Navigation statuses are stored as small integer codes (-1 = unknown)
+NAVIGATION_STATUSES: List[NavigationStatus] = list(NavigationStatus)
+_NAV_STATUS_CODES = {status: code for code, status in enumerate(NAVIGATION_STATUSES)}
+_NAV_STATUS_CODES.update({status.value: code for code, status in enumerate(NAVIGATION_STATUSES)})
+
+# Columns kept for both the latest view and the per-vessel history ring
+POSITION_COLUMNS = {
+    'latitude': np.float64,
+    'longitude': np.float64,
+    'speed_over_ground': np.float32,
+    'course_over_ground': np.float32,
+    'true_heading': np.float32,
+    'timestamp': np.float64,  # seconds since epoch (UTC)
+    'navigation_status': np.int8,
+}
+
+
+def to_epoch(value: Union[datetime, float, int, None]) -> float:
+    """Convert a datetime (naive datetimes are treated as UTC) to epoch seconds"""
+    if value is None:
+        return datetime.now(timezone.utc).timestamp()
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def select_range(columns: Dict[str, np.ndarray], start: Optional[float] = None, end: Optional[float] = None,
+                 limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Rows of chronological history columns within [start, end], newest ``limit`` of them"""
+    ts = columns['timestamp']
+    mask = np.ones(len(ts), dtype=bool)
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts <= end
+    if not mask.all():
+        columns = {name: values[mask] for name, values in columns.items()}
+    if limit is not None and len(columns['timestamp']) > limit:
+        # values[-0:] would be every row
+        keep = slice(len(columns['timestamp']) - max(limit, 0), None)
+        columns = {name: values[keep] for name, values in columns.items()}
+    return columns
+
+
+def from_epoch(value: float) -> datetime:
+    """Convert epoch seconds to a naive UTC datetime, matching the rest of the models"""
+    return datetime.utcfromtimestamp(float(value))
+
+
+def nav_status_code(status: Optional[Union[NavigationStatus, str]]) -> int:
+    """Map a navigation status to its stored integer code"""
+    if status is None:
+        return -1
+    return _NAV_STATUS_CODES.get(status, -1)
+
+
+def _fill_value(dtype) -> Any:
+    return -1 if np.issubdtype(dtype, np.integer) else np.nan
+
+
+class PositionStore:
+    """Columnar store of the latest position and a short history ring per vessel"""
+
+    def __init__(self, initial_capacity: int = 1024, history_depth: int = 64,
+                 grid_cell_size: float = 1.0):
+        self.history_depth = history_depth
+        self.spatial_index = SpatialGridIndex(grid_cell_size)
+        self._capacity = 0
+        self._size = 0
+        self._index: Dict[int, int] = {}
+        self._sources: List[str] = []
+        self._source_codes: Dict[str, int] = {}
+
+        self.mmsi = np.zeros(0, dtype=np.int64)
+        self.data_source = np.zeros(0, dtype=np.int16)
+        self.latest: Dict[str, np.ndarray] = {}
+        self.history: Dict[str, np.ndarray] = {}
+        self.history_head = np.zeros(0, dtype=np.int32)
+        self.history_count = np.zeros(0, dtype=np.int32)
+
+        # Bumped for every vessel an update touches, so readers can tell cached results are stale
+        self.revision = np.zeros(0, dtype=np.int64)
+        self._revision_counter = 0
+
+        self._grow(max(initial_capacity, 1))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, mmsi: int) -> bool:
+        return int(mmsi) in self._index
+
+    def _grow(self, min_capacity: int):
+        """Grow all column arrays (amortised doubling)"""
+        new_capacity = max(min_capacity, self._capacity * 2)
+        old = self._capacity
+
+        def extend(array: np.ndarray, fill) -> np.ndarray:
+            shape = (new_capacity,) + array.shape[1:]
+            grown = np.full(shape, fill, dtype=array.dtype)
+            grown[:old] = array[:old]
+            return grown
+
+        self.mmsi = extend(self.mmsi, 0)
+        self.data_source = extend(self.data_source, -1)
+        self.history_head = extend(self.history_head, 0)
+        self.history_count = extend(self.history_count, 0)
+        self.revision = extend(self.revision, 0)
+
+        for name, dtype in POSITION_COLUMNS.items():
+            fill = _fill_value(dtype)
+            latest = self.latest.get(name, np.zeros(0, dtype=dtype))
+            history = self.history.get(name, np.zeros((0, self.history_depth), dtype=dtype))
+            self.latest[name] = extend(latest, fill)
+            self.history[name] = extend(history, fill)
+
+        self._capacity = new_capacity
+
+    def _source_code(self, source: Optional[str]) -> int:
+        if not source:
+            return -1
+        code = self._source_codes.get(source)
+        if code is None:
+            code = len(self._sources)
+            self._sources.append(source)
+            self._source_codes[source] = code
+        return code
+
+    def source_name(self, code: int) -> Optional[str]:
+        """Resolve a stored data source code back to its name"""
+        return self._sources[code] if 0 <= code < len(self._sources) else None
+
+    def rows_for(self, mmsis: np.ndarray, create: bool = True) -> np.ndarray:
+        """Resolve MMSIs to row numbers, allocating rows for new vessels"""
+        rows = np.empty(len(mmsis), dtype=np.int64)
+        index = self._index
+        for i, mmsi in enumerate(mmsis.tolist()):
+            row = index.get(mmsi)
+            if row is None:
+                if not create:
+                    rows[i] = -1
+                    continue
+                if self._size >= self._capacity:
+                    self._grow(self._size + 1)
+                row = self._size
+                index[mmsi] = row
+                self.mmsi[row] = mmsi
+                self._size += 1
+            rows[i] = row
+        return rows
+
+    def update(self, position: Union[VesselPositionCreate, Dict[str, Any]]):
+        """Write a single position report"""
+        if not isinstance(position, dict):
+            position = position.dict()
+        self.update_many(
+            mmsi=[position['mmsi']],
+            latitude=[position['latitude']],
+            longitude=[position['longitude']],
+            speed_over_ground=[position.get('speed_over_ground')],
+            course_over_ground=[position.get('course_over_ground')],
+            true_heading=[position.get('true_heading')],
+            timestamp=[to_epoch(position.get('timestamp'))],
+            navigation_status=[nav_status_code(position.get('navigation_status'))],
+            data_source=position.get('data_source'),
+        )
+
+    def update_batch(self, batch):
+        """Write a ``PositionBatch``"""
+        self.update_many(
+            mmsi=batch.mmsi,
+            latitude=batch.latitude,
+            longitude=batch.longitude,
+            speed_over_ground=batch.speed_over_ground,
+            course_over_ground=batch.course_over_ground,
+            true_heading=batch.true_heading,
+            timestamp=batch.timestamp,
+            navigation_status=batch.navigation_status,
+            data_source=batch.data_source,
+        )
+
+    def update_many(self, mmsi, latitude, longitude, timestamp,
+                    speed_over_ground=None, course_over_ground=None, true_heading=None,
+                    navigation_status=None, data_source: Optional[str] = None):
+        """Write a batch of position reports given as column arrays.
+
+        Timestamps are epoch seconds. Reports are appended to each vessel's
+        history ring; the latest view only moves forward in time.
+        """
+        mmsi = np.asarray(mmsi, dtype=np.int64)
+        n = len(mmsi)
+        if n == 0:
+            return
+
+        def column(values, dtype, default):
+            if values is None:
+                return np.full(n, default, dtype=dtype)
+            array = np.asarray(values)
+            if array.dtype == object:
+                array = np.array([default if v is None else v for v in array])
+            return array.astype(dtype, copy=False)
+
+        columns = {
+            'latitude': column(latitude, np.float64, np.nan),
+            'longitude': column(longitude, np.float64, np.nan),
+            'speed_over_ground': column(speed_over_ground, np.float32, np.nan),
+            'course_over_ground': column(course_over_ground, np.float32, np.nan),
+            'true_heading': column(true_heading, np.float32, np.nan),
+            'timestamp': column(timestamp, np.float64, np.nan),
+            'navigation_status': column(navigation_status, np.int8, -1),
+        }
+
+        rows = self.rows_for(mmsi)
+
+        # Order by (row, timestamp) so each vessel's reports land in the ring chronologically
+        order = np.lexsort((columns['timestamp'], rows))
+        rows = rows[order]
+        columns = {name: values[order] for name, values in columns.items()}
+
+        # Rank of each report within its vessel's group in this batch
+        group_start = np.ones(n, dtype=bool)
+        group_start[1:] = rows[1:] != rows[:-1]
+        starts = np.flatnonzero(group_start)
+        group_sizes = np.diff(np.append(starts, n))
+        rank = np.arange(n) - np.repeat(starts, group_sizes)
+        group_len = np.repeat(group_sizes, group_sizes)
+
+        # Only the last `history_depth` reports of a vessel in this batch survive the ring
+        keep = rank >= group_len - self.history_depth
+        h_rows = rows[keep]
+        slots = (self.history_head[h_rows] + rank[keep]) % self.history_depth
+        for name, values in columns.items():
+            self.history[name][h_rows, slots] = values[keep]
+
+        unique_rows = rows[starts]
+        self.history_head[unique_rows] = (self.history_head[unique_rows] + group_sizes) % self.history_depth
+        self.history_count[unique_rows] = np.minimum(self.history_count[unique_rows] + group_sizes, self.history_depth)
+        self._revision_counter += 1
+        self.revision[unique_rows] = self._revision_counter
+
+        # Latest view: the last report of each group, if it is not older than what we have
+        last = starts + group_sizes - 1
+        current_ts = self.latest['timestamp'][unique_rows]
+        newer = ~(columns['timestamp'][last] < current_ts)
+        target_rows = unique_rows[newer]
+        for name, values in columns.items():
+            self.latest[name][target_rows] = values[last[newer]]
+        self.data_source[target_rows] = self._source_code(data_source)
+        self.spatial_index.update(target_rows, self.latest['latitude'][target_rows],
+                                  self.latest['longitude'][target_rows])
+
+    def revision_of(self, mmsi: int) -> int:
+        """Counter that changes whenever positions for a vessel are written (0 if unknown)"""
+        row = self._index.get(int(mmsi))
+        return 0 if row is None else int(self.revision[row])
+
+    def get(self, mmsi: int) -> Optional[Dict[str, Any]]:
+        """Latest position for one vessel, or None if it has never reported"""
+        row = self._index.get(int(mmsi))
+        if row is None:
+            return None
+        record = {name: values[row].item() for name, values in self.latest.items()}
+        record['mmsi'] = int(mmsi)
+        record['data_source'] = self.source_name(int(self.data_source[row]))
+        return record
+
+    def snapshot(self, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Latest positions for the whole fleet as column views (no copies)"""
+        end = self._size if limit is None else min(max(limit, 0), self._size)
+        columns = {name: values[:end] for name, values in self.latest.items()}
+        columns['mmsi'] = self.mmsi[:end]
+        columns['data_source'] = self.data_source[:end]
+        return columns
+
+    def select(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Latest positions for the given rows"""
+        columns = {name: values[rows] for name, values in self.latest.items()}
+        columns['mmsi'] = self.mmsi[rows]
+        columns['data_source'] = self.data_source[rows]
+        return columns
+
+    def rows_in_bbox(self, north: float, south: float, east: float, west: float) -> np.ndarray:
+        """Rows whose latest position lies in the box (``west > east`` crosses the antimeridian)"""
+        return self.spatial_index.query_bbox(north, south, east, west,
+                                             self.latest['latitude'], self.latest['longitude'])
+
+    def rows_within(self, latitude: float, longitude: float, radius_nm: float) -> np.ndarray:
+        """Rows whose latest position is within ``radius_nm`` of a point"""
+        return self.spatial_index.query_radius(latitude, longitude, radius_nm,
+                                               self.latest['latitude'], self.latest['longitude'])
+
+    def recent(self, mmsi: int, start: Optional[float] = None, end: Optional[float] = None,
+               limit: Optional[int] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Recent positions for one vessel in chronological order.
+
+        ``start`` and ``end`` are epoch seconds (inclusive). When ``limit`` is
+        given the newest ``limit`` positions are returned. Returns None for
+        unknown vessels.
+        """
+        row = self._index.get(int(mmsi))
+        if row is None:
+            return None
+
+        count = int(self.history_count[row])
+        head = int(self.history_head[row])
+        slots = (head - count + np.arange(count)) % self.history_depth
+        columns = {name: values[row, slots] for name, values in self.history.items()}
+
+        # Reports can arrive out of order across batches
+        ts = columns['timestamp']
+        if count > 1 and np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind='stable')
+            columns = {name: values[order] for name, values in columns.items()}
+            ts = columns['timestamp']
+
+        return select_range(columns, start, end, limit)
+
+    def clear(self):
+        """Drop all stored positions"""
+        revision_counter = self._revision_counter
+        self.__init__(history_depth=self.history_depth,
+                      grid_cell_size=self.spatial_index.cell_size)
+        self._revision_counter = revision_counter
+
+
+@lru_cache()
+def get_position_store() -> PositionStore:
+    """Get the process-wide position store shared by collectors and the API"""
+    return PositionStore()
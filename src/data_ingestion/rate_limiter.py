@@ -0,0 +1,132 @@
+"""
+Asyncio token-bucket rate limiting shared between AIS collectors
+"""
+
+import asyncio
+import re
+import time
+import weakref
+from typing import Dict, Optional, Union
+
+from ..core.config import AIS_SOURCES
+
+
+# Requests per minute used when a source does not declare a rate limit
+DEFAULT_RATE_LIMIT = 60
+
+_PERIOD_SECONDS = {
+    'second': 1.0,
+    'sec': 1.0,
+    's': 1.0,
+    'minute': 60.0,
+    'min': 60.0,
+    'm': 60.0,
+    'hour': 3600.0,
+    'h': 3600.0,
+    'day': 86400.0,
+    'd': 86400.0,
+}
+
+_RATE_PATTERN = re.compile(r'^\s*([\d.]+)\s*(?:requests?|req|calls?)?\s*(?:/|per)\s*([a-z]+)\s*$', re.IGNORECASE)
+
+
+def parse_rate_limit(rate_limit: Union[int, float, str, None]) -> Optional[float]:
+    """Convert an ``AIS_SOURCES`` rate limit to requests per second.
+
+    Numbers are requests per minute; strings such as ``"100 requests/minute"``
+    or ``"5 per second"`` are parsed. Returns None for "no limit".
+    """
+    if rate_limit is None:
+        return None
+    if isinstance(rate_limit, (int, float)):
+        return rate_limit / 60.0 if rate_limit > 0 else None
+
+    match = _RATE_PATTERN.match(rate_limit)
+    if not match:
+        raise ValueError(f"Unrecognised rate limit: {rate_limit!r}")
+
+    count, period = float(match.group(1)), match.group(2).lower()
+    if period not in _PERIOD_SECONDS and len(period) > 2 and period.endswith('s'):
+        # Plural of a spelled-out period ("minutes"), never of an abbreviation ("ms")
+        period = period[:-1]
+    seconds = _PERIOD_SECONDS.get(period)
+    if seconds is None:
+        raise ValueError(f"Unrecognised rate limit period: {rate_limit!r}")
+    return count / seconds if count > 0 else None
+
+
+class AsyncTokenBucket:
+    """Token bucket that suspends the calling coroutine instead of the event loop"""
+
+    def __init__(self, rate: Optional[float], capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = \
+            weakref.WeakKeyDictionary()
+
+        self.acquired_count = 0
+        self.total_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting; returns False if not enough are available"""
+        if self.rate is None:
+            return True
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            self.acquired_count += 1
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until ``tokens`` are available and take them"""
+        if self.rate is None:
+            self.acquired_count += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+
+        async with lock:
+            self._refill()
+            if self._tokens < tokens:
+                wait = (tokens - self._tokens) / self.rate
+                self.total_wait += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= tokens
+            self.acquired_count += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get limiter statistics"""
+        return {
+            'rate_per_second': self.rate or 0.0,
+            'capacity': self.capacity,
+            'acquired_count': self.acquired_count,
+            'total_wait_seconds': self.total_wait
+        }
+
+
+_limiters: Dict[str, AsyncTokenBucket] = {}
+
+
+def get_rate_limiter(source_name: str, burst: float = 1.0) -> AsyncTokenBucket:
+    """Get the token bucket shared by every collector of ``source_name``.
+
+    The rate comes from ``AIS_SOURCES[source_name]['rate_limit']``.
+    """
+    limiter = _limiters.get(source_name)
+    if limiter is None:
+        rate_limit = AIS_SOURCES.get(source_name, {}).get('rate_limit', DEFAULT_RATE_LIMIT)
+        limiter = AsyncTokenBucket(parse_rate_limit(rate_limit), capacity=burst)
+        _limiters[source_name] = limiter
+    return limiter
@@ -0,0 +1,291 @@
+"""
+Replay recorded position feeds through the collector pipeline at N× speed
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncGenerator, Deque, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import structlog
+
+from ..models.vessel import VesselPositionCreate
+from .base_collector import BaseAISCollector
+from .nmea_collector import (
+    POSITION_TYPES, STATIC_TYPES, SentenceAssembler, _payload_type, decode_positions, decode_static
+)
+from .position_archive import PositionArchive
+from .position_batch import PositionBatch
+from .position_store import nav_status_code, to_epoch
+
+logger = structlog.get_logger(__name__)
+
+# Chunk latencies kept for the percentile statistics
+LATENCY_WINDOW = 10000
+
+
+def _epoch(value: Any) -> float:
+    if isinstance(value, str):
+        return to_epoch(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    return float(value)
+
+
+def _optional(value: Any) -> float:
+    return np.nan if value is None else value
+
+
+class ReplayCollector(BaseAISCollector):
+    """Collector that replays a recorded feed instead of polling a provider"""
+
+    def __init__(self, source: Union[str, Path, PositionArchive], speed: Optional[float] = 1.0,
+                 source_name: str = "replay", start: Optional[float] = None, end: Optional[float] = None,
+                 retime: bool = False, tick: float = 0.1, max_chunk_rows: int = 5000,
+                 read_lines: int = 50000, **kwargs):
+        super().__init__(source_name, **kwargs)
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive (or None for as fast as possible)")
+        self.source = source
+        self.speed = speed
+        self.start = start
+        self.end = end
+        self.retime = retime
+        self.tick = tick
+        self.max_chunk_rows = max_chunk_rows
+        self.read_lines = read_lines
+        self.assembler = SentenceAssembler()
+
+        self.replayed_rows = 0
+        self.chunk_count = 0
+        self.static_count = 0
+        self.feed_start: Optional[float] = None
+        self.feed_position: Optional[float] = None
+        self.wall_start: Optional[float] = None
+        self.wall_end: Optional[float] = None
+        self.max_lag = 0.0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    # Feed readers: each yields blocks in (roughly) feed-time order, one
+    # batch per data source covering the same stretch of the feed
+
+    def _source_kind(self) -> str:
+        if isinstance(self.source, PositionArchive):
+            return 'archive'
+        path = Path(self.source)
+        if path.is_dir():
+            return 'archive'
+        if path.suffix in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+        return 'nmea'
+
+    def _read_archive(self) -> Iterator[List[PositionBatch]]:
+        archive = self.source if isinstance(self.source, PositionArchive) else PositionArchive(str(self.source))
+        for day in archive.iter_days(self.start, self.end):
+            timestamps = day.columns['timestamp']
+            order = np.argsort(timestamps, kind='stable')
+            ordered = timestamps[order]
+            lower = 0 if self.start is None else int(np.searchsorted(ordered, self.start, 'left'))
+            upper = len(order) if self.end is None else int(np.searchsorted(ordered, self.end, 'right'))
+            if upper <= lower:
+                continue
+            # One hour of feed time at a time, so a day is never copied whole
+            hours = np.arange(ordered[lower], ordered[upper - 1], 3600.0)[1:]
+            bounds = [lower] + np.searchsorted(ordered, hours).tolist() + [upper]
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                if b > a:
+                    yield list(day.batches(order[a:b]))
+
+    def _read_ndjson(self) -> Iterator[List[PositionBatch]]:
+        with open(self.source, 'r', encoding='utf-8') as handle:
+            while True:
+                lines = handle.readlines(self.read_lines * 128)
+                if not lines:
+                    return
+                rows = []
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        self.error_count += 1
+                sources: Dict[str, List[Dict[str, Any]]] = {}
+                for row in rows:
+                    sources.setdefault(row.get('data_source') or self.source_name, []).append(row)
+                block = []
+                for data_source, group in sources.items():
+                    try:
+                        block.append(PositionBatch(
+                            mmsi=[row['mmsi'] for row in group],
+                            latitude=[row['latitude'] for row in group],
+                            longitude=[row['longitude'] for row in group],
+                            speed_over_ground=[_optional(row.get('speed_over_ground')) for row in group],
+                            course_over_ground=[_optional(row.get('course_over_ground')) for row in group],
+                            true_heading=[_optional(row.get('true_heading')) for row in group],
+                            navigation_status=[nav_status_code(row.get('navigation_status')) for row in group],
+                            timestamp=[_epoch(row['timestamp']) for row in group],
+                            data_source=data_source
+                        ))
+                    except (KeyError, TypeError, ValueError) as e:
+                        logger.warning(f"Skipping malformed NDJSON rows: {e}")
+                        self.error_count += len(group)
+                if block:
+                    yield block
+
+    def _read_nmea(self) -> Iterator[List[PositionBatch]]:
+        with open(self.source, 'r', encoding='ascii', errors='replace') as handle:
+            while True:
+                lines = handle.readlines(self.read_lines * 64)
+                if not lines:
+                    return
+                positions, static = [], []
+                received = time.time()
+                for line in lines:
+                    message = self.assembler.feed(line, received)
+                    if message is None:
+                        continue
+                    msg_type = _payload_type(message[0])
+                    if msg_type in POSITION_TYPES:
+                        positions.append(message)
+                    elif msg_type in STATIC_TYPES:
+                        static.append(message)
+                if static:
+                    records = decode_static(static)
+                    self.vessel_registry.upsert_many(records)
+                    self.static_count += len(records)
+                batch = decode_positions(positions, self.source_name)
+                self.error_count += len(positions) - len(batch)
+                if len(batch):
+                    yield [batch]
+
+    def _read_feed(self) -> Iterator[List[PositionBatch]]:
+        kind = self._source_kind()
+        if kind == 'archive':
+            return self._read_archive()
+        if kind == 'ndjson':
+            return self._read_ndjson()
+        return self._read_nmea()
+
+    # Pacing
+
+    def _chunks(self, block: List[PositionBatch]) -> Iterator[PositionBatch]:
+        """Split a feed block into time-ordered, per-source chunks due in the same tick.
+
+        The block's sources are merged in timestamp order first, so feed time
+        never steps back between chunks; each tick (or run of
+        ``max_chunk_rows``) then yields one chunk per source present in it.
+        """
+        sizes = [len(batch) for batch in block]
+        timestamps = np.concatenate([batch.timestamp for batch in block])
+        owner = np.repeat(np.arange(len(block)), sizes)
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        order = np.argsort(timestamps, kind='stable')
+
+        if self.speed is None:
+            bounds = np.arange(self.max_chunk_rows, len(order), self.max_chunk_rows)
+        else:
+            ticks = np.floor((timestamps[order] - self.feed_start) / self.speed / self.tick).astype(np.int64)
+            bounds = np.flatnonzero(np.diff(ticks)) + 1
+        for a, b in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(order)]))):
+            for start in range(a, b, self.max_chunk_rows):
+                rows = order[start:min(start + self.max_chunk_rows, b)]
+                owners = owner[rows]
+                _, first = np.unique(owners, return_index=True)
+                for index in owners[np.sort(first)].tolist():
+                    yield block[index].take(rows[owners == index] - offsets[index])
+
+    async def collect_data(self) -> AsyncGenerator[PositionBatch, None]:
+        """Yield feed chunks when they are due on the replay clock"""
+        self.wall_start = time.monotonic()
+        epoch_start = time.time()
+        feed = self._read_feed()
+        try:
+            while self.is_running:
+                block = await asyncio.to_thread(next, feed, None)
+                if block is None:
+                    break
+                block = [batch for batch in block if len(batch)]
+                if not block:
+                    continue
+                if self.feed_start is None:
+                    self.feed_start = min(float(batch.timestamp.min()) for batch in block)
+
+                for chunk in self._chunks(block):
+                    first = float(chunk.timestamp[0])
+                    now = time.monotonic()
+                    if self.speed is None:
+                        due = now
+                    else:
+                        due = self.wall_start + max(first - self.feed_start, 0.0) / self.speed
+                        if due > now:
+                            await asyncio.sleep(due - now)
+                        else:
+                            self.max_lag = max(self.max_lag, now - due)
+                    if not self.is_running:
+                        return
+
+                    self.feed_position = float(chunk.timestamp[-1])
+                    if self.retime:
+                        chunk.timestamp = chunk.timestamp + (epoch_start - self.feed_start)
+                    rows = len(chunk)
+
+                    # Resumes once the collector has processed the chunk
+                    yield chunk
+
+                    self._latencies.append(time.monotonic() - due)
+                    self.replayed_rows += rows
+                    self.chunk_count += 1
+        finally:
+            self.wall_end = time.monotonic()
+
+    def parse_message(self, raw_message: Any) -> Optional[VesselPositionCreate]:
+        """Replayed reports arrive decoded; single messages are not produced"""
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get replay statistics: throughput, achieved speed and chunk latency"""
+        stats = super().get_stats()
+        wall_seconds = ((self.wall_end or time.monotonic()) - self.wall_start) if self.wall_start else 0.0
+        feed_seconds = (self.feed_position - self.feed_start) if self.feed_start is not None else 0.0
+        latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+        stats.update({
+            'source': str(getattr(self.source, 'root', self.source)),
+            'speed': self.speed,
+            'replayed_rows': self.replayed_rows,
+            'chunk_count': self.chunk_count,
+            'static_reports': self.static_count,
+            'wall_seconds': wall_seconds,
+            'feed_seconds': feed_seconds,
+            'achieved_speed': feed_seconds / wall_seconds if wall_seconds else 0.0,
+            'rows_per_second': self.replayed_rows / wall_seconds if wall_seconds else 0.0,
+            'latency_mean': float(latencies.mean()),
+            'latency_p50': float(np.percentile(latencies, 50)),
+            'latency_p99': float(np.percentile(latencies, 99)),
+            'latency_max': float(latencies.max()),
+            'max_lag': self.max_lag
+        })
+        return stats
+
+
+async def replay_through_manager(source: Union[str, Path, PositionArchive], speed: Optional[float] = None,
+                                 manager=None, **kwargs) -> Dict[str, Any]:
+    """Replay a feed through an ``AISCollectorManager`` and return the replay statistics.
+
+    A manager is created (with its shared conflation stage) when none is
+    given; extra keyword arguments go to ``ReplayCollector``.
+    """
+    from .ais_collectors import AISCollectorManager
+
+    manager = manager if manager is not None else AISCollectorManager()
+    collector = ReplayCollector(source, speed=speed, **kwargs)
+    manager.add_collector(collector)
+    await manager.start_all()
+    await manager.tasks[collector.source_name]
+    stats = collector.get_stats()
+    stats['manager'] = manager.get_status()
+    await manager.stop_all()
+    return stats
@@ -0,0 +1,279 @@
+"""
+Multi-process collector workers that ship parsed batches back to the parent
+"""
+
+import asyncio
+import multiprocessing
+import queue
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import structlog
+
+from ..core.config import settings
+from ..models.vessel import VesselPositionCreate
+from .ais_collectors import AISCollectorManager
+from .base_collector import BaseAISCollector
+from .kafka_publisher import KAFKA_AVAILABLE, BatchingKafkaPublisher, create_kafka_producer
+from .position_batch import PositionBatch
+from .position_store import PositionStore, get_position_store
+from .spool import get_spool_writer
+from .vessel_registry import VesselRegistry, get_vessel_registry
+
+logger = structlog.get_logger(__name__)
+
+
+class QueueBatchSink:
+    """Stand-in position store that forwards batches from a worker process"""
+
+    def __init__(self, result_queue, worker_id: int, max_rows: int = 1000):
+        self.result_queue = result_queue
+        self.worker_id = worker_id
+        self.max_rows = max_rows
+        self._pending: List[Dict[str, Any]] = []
+
+    def update(self, position: Union[VesselPositionCreate, Dict[str, Any]]):
+        self._pending.append(position if isinstance(position, dict) else position.dict())
+        if len(self._pending) >= self.max_rows:
+            self.flush()
+
+    def update_batch(self, batch: PositionBatch):
+        self.flush()
+        if len(batch):
+            self.result_queue.put(('batch', self.worker_id, batch))
+
+    def flush(self):
+        if self._pending:
+            batch = PositionBatch.from_dicts(self._pending)
+            self._pending = []
+            self.result_queue.put(('batch', self.worker_id, batch))
+
+
+def _run_worker(worker_id: int, factory: Callable[..., BaseAISCollector], args: Tuple,
+                mmsi_shard: Optional[Tuple[int, int]], result_queue, stop_event,
+                flush_interval: float):
+    """Worker process entry point: run one collector on its own event loop"""
+
+    async def main():
+        collector = factory(*args)
+        collector.mmsi_shard = mmsi_shard
+        sink = QueueBatchSink(result_queue, worker_id)
+        collector.position_store = sink
+        # The parent publishes after cross-source conflation, like the in-process path
+        if collector.kafka_producer is not None:
+            collector.kafka_producer.close()
+        collector.kafka_producer = collector.publisher = collector.spool = None
+        result_queue.put(('source', worker_id, collector.source_name))
+
+        task = asyncio.create_task(collector.start_collection())
+        while not task.done():
+            await asyncio.sleep(flush_interval)
+            sink.flush()
+            result_queue.put(('stats', worker_id, collector.get_stats()))
+            if stop_event.is_set():
+                collector.stop_collection()
+                try:
+                    await asyncio.wait_for(task, timeout=30)
+                except asyncio.TimeoutError:
+                    task.cancel()
+                break
+
+        sink.flush()
+        result_queue.put(('stats', worker_id, collector.get_stats()))
+        result_queue.put(('done', worker_id, None))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+class _WorkerHandle:
+    """Parent-side bookkeeping for one worker process"""
+
+    def __init__(self, worker_id: int, name: str, factory, args: Tuple,
+                 mmsi_shard: Optional[Tuple[int, int]]):
+        self.worker_id = worker_id
+        self.name = name
+        self.factory = factory
+        self.args = args
+        self.mmsi_shard = mmsi_shard
+        self.source_name: Optional[str] = None
+        self.process = None
+        self.done = False
+
+        self.batch_count = 0
+        self.row_count = 0
+        self.duplicate_count = 0
+        self.started_at: Optional[float] = None
+        self.last_batch_at: Optional[float] = None
+        self.collector_stats: Dict[str, Any] = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = (time.time() - self.started_at) if self.started_at else 0.0
+        return {
+            'pid': self.process.pid if self.process else None,
+            'source_name': self.source_name,
+            'is_alive': bool(self.process and self.process.is_alive()),
+            'mmsi_shard': self.mmsi_shard,
+            'batch_count': self.batch_count,
+            'row_count': self.row_count,
+            'duplicate_count': self.duplicate_count,
+            'rows_per_second': self.row_count / elapsed if elapsed else 0.0,
+            'last_batch_at': self.last_batch_at,
+            'collector': self.collector_stats
+        }
+
+
+class ShardedCollectorManager(AISCollectorManager):
+    """Run collectors in worker processes so parsing uses more than one core"""
+
+    def __init__(self, position_store: Optional[PositionStore] = None,
+                 vessel_registry: Optional[VesselRegistry] = None,
+                 flush_interval: float = 0.5, start_method: str = 'spawn', **kwargs):
+        super().__init__(**kwargs)
+        self.position_store = position_store if position_store is not None else get_position_store()
+        self.vessel_registry = vessel_registry if vessel_registry is not None else get_vessel_registry()
+        self.flush_interval = flush_interval
+        self._context = multiprocessing.get_context(start_method)
+        self._queue = None
+        self._stop_event = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self.workers: Dict[int, _WorkerHandle] = {}
+        # Kafka publishers per source, fed with the workers' conflated batches
+        self.publishers: Dict[str, Optional[BatchingKafkaPublisher]] = {}
+
+    def add_worker(self, name: str, factory: Callable[..., BaseAISCollector], *args,
+                   mmsi_shard: Optional[Tuple[int, int]] = None):
+        """Run ``factory(*args)`` in its own worker process"""
+        worker_id = len(self.workers)
+        self.workers[worker_id] = _WorkerHandle(worker_id, name, factory, args, mmsi_shard)
+
+    def add_sharded(self, name: str, factory: Callable[..., BaseAISCollector], shards: int, *args):
+        """Split one source across ``shards`` worker processes by MMSI"""
+        for index in range(shards):
+            self.add_worker(f"{name}[{index}/{shards}]", factory, *args, mmsi_shard=(index, shards))
+
+    async def start_all(self):
+        """Start worker processes, the batch drain task and any in-process collectors"""
+        self._queue = self._context.Queue()
+        self._stop_event = self._context.Event()
+
+        for worker in self.workers.values():
+            worker.process = self._context.Process(
+                target=_run_worker, name=f"collector-{worker.name}", daemon=True,
+                args=(worker.worker_id, worker.factory, worker.args, worker.mmsi_shard,
+                      self._queue, self._stop_event, self.flush_interval)
+            )
+            worker.process.start()
+            worker.started_at = time.time()
+            logger.info(f"Started collector worker {worker.name} (pid {worker.process.pid})")
+
+        await super().start_all()
+        self._drain_task = asyncio.create_task(self._drain())
+
+    def _create_publisher(self, source_name: str) -> Optional[BatchingKafkaPublisher]:
+        """Kafka publisher for a worker source, falling back to its spool (as collectors do)"""
+        spool = get_spool_writer(source_name) if settings.spool_enabled else None
+        if KAFKA_AVAILABLE:
+            try:
+                return BatchingKafkaPublisher(create_kafka_producer(), fallback=spool)
+            except Exception as e:
+                logger.error(f"Failed to initialize Kafka producer: {e}")
+        return BatchingKafkaPublisher(spool) if spool is not None else None
+
+    async def _publish(self, source_name: str, batch: PositionBatch):
+        if source_name not in self.publishers:
+            self.publishers[source_name] = self._create_publisher(source_name)
+            if settings.spool_enabled and self.is_running:
+                self.start_spool_replay(source_name)
+        publisher = self.publishers[source_name]
+        if publisher is None:
+            return
+        collection_timestamp = datetime.utcnow().isoformat()
+        for data_dict in batch.to_records():
+            data_dict['source'] = source_name
+            data_dict['collection_timestamp'] = collection_timestamp
+            await publisher.publish(data_dict)
+
+    async def _handle(self, kind: str, worker_id: int, payload: Any):
+        worker = self.workers[worker_id]
+        if kind == 'batch':
+            batch: PositionBatch = payload
+            worker.batch_count += 1
+            worker.last_batch_at = time.time()
+            keep = self.conflator.accept_batch(batch, worker.source_name)
+            worker.duplicate_count += int(np.count_nonzero(~keep))
+            batch = batch.take(keep)
+            if len(batch):
+                self.position_store.update_batch(batch)
+                if self.position_sink is not None:
+                    await self.position_sink.update_batch(batch)
+                if self.position_cache is not None:
+                    await self.position_cache.update_batch(batch)
+                self.vessel_registry.observe_many(batch.mmsi.tolist(), batch.data_source)
+                await self._publish(worker.source_name or batch.data_source, batch)
+            worker.row_count += len(batch)
+        elif kind == 'source':
+            worker.source_name = payload
+        elif kind == 'stats':
+            worker.collector_stats = payload
+        elif kind == 'done':
+            worker.done = True
+
+    def _workers_running(self) -> bool:
+        return any(not w.done and w.process is not None and w.process.is_alive()
+                   for w in self.workers.values())
+
+    async def _drain(self):
+        """Move worker batches into the position store until every worker is done"""
+        loop = asyncio.get_running_loop()
+        while self.is_running or self._workers_running():
+            try:
+                message = await loop.run_in_executor(None, self._queue.get, True, 0.2)
+            except queue.Empty:
+                if not self._workers_running() and not self.is_running:
+                    break
+                continue
+            await self._handle(*message)
+
+        # Anything still queued after the workers exited
+        while True:
+            try:
+                await self._handle(*self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    async def stop_all(self):
+        """Stop workers, drain their remaining batches and stop in-process collectors"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        await super().stop_all()
+
+        if self._drain_task is not None:
+            await self._drain_task
+            self._drain_task = None
+
+        for source_name, publisher in self.publishers.items():
+            if publisher is not None:
+                try:
+                    await publisher.close()
+                except Exception as e:
+                    logger.error(f"Failed to flush Kafka publisher for {source_name}: {e}")
+
+        for worker in self.workers.values():
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    logger.warning(f"Terminating collector worker {worker.name}")
+                    worker.process.terminate()
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Get status of in-process collectors plus per-worker throughput"""
+        status = super().get_status()
+        status['workers'] = {worker.name: worker.get_stats() for worker in self.workers.values()}
+        status['publishers'] = {name: publisher.get_stats() for name, publisher in self.publishers.items()
+                                if publisher is not None}
+        return status
@@ -0,0 +1,191 @@
+"""
+Spatial grid index over current vessel positions
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..core.geo import haversine_nm
+
+
+class SpatialGridIndex:
+    """Fixed lat/lon grid mapping each cell to the store rows inside it"""
+
+    def __init__(self, cell_size: float = 1.0):
+        self.cell_size = cell_size
+        self.n_lat = int(math.ceil(180.0 / cell_size))
+        self.n_lon = int(math.ceil(360.0 / cell_size))
+
+        self._cells: Dict[int, np.ndarray] = {}
+        self._cell_counts: Dict[int, int] = {}
+        self._row_cell = np.full(0, -1, dtype=np.int64)
+        self._row_slot = np.full(0, -1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._row_cell >= 0))
+
+    @property
+    def occupied_cells(self) -> int:
+        return len(self._cells)
+
+    def _lat_index(self, latitude):
+        return np.clip(np.floor((np.asarray(latitude) + 90.0) / self.cell_size), 0, self.n_lat - 1).astype(np.int64)
+
+    def _lon_index(self, longitude):
+        return (np.floor((np.asarray(longitude) + 180.0) / self.cell_size).astype(np.int64)) % self.n_lon
+
+    def cell_ids(self, latitude, longitude) -> np.ndarray:
+        """Cell id for each coordinate pair"""
+        return self._lat_index(latitude) * self.n_lon + self._lon_index(longitude)
+
+    def _ensure_rows(self, max_row: int):
+        if max_row < len(self._row_cell):
+            return
+        size = max(max_row + 1, len(self._row_cell) * 2, 1024)
+        row_cell = np.full(size, -1, dtype=np.int64)
+        row_slot = np.full(size, -1, dtype=np.int64)
+        row_cell[:len(self._row_cell)] = self._row_cell
+        row_slot[:len(self._row_slot)] = self._row_slot
+        self._row_cell, self._row_slot = row_cell, row_slot
+
+    def _remove(self, row: int, cell: int):
+        rows = self._cells[cell]
+        count = self._cell_counts[cell] - 1
+        slot = self._row_slot[row]
+        moved = rows[count]
+        rows[slot] = moved
+        self._row_slot[moved] = slot
+        if count:
+            self._cell_counts[cell] = count
+        else:
+            del self._cells[cell]
+            del self._cell_counts[cell]
+
+    def _insert(self, row: int, cell: int):
+        rows = self._cells.get(cell)
+        count = self._cell_counts.get(cell, 0)
+        if rows is None:
+            rows = np.empty(8, dtype=np.int64)
+            self._cells[cell] = rows
+        elif count == len(rows):
+            rows = np.concatenate([rows, np.empty(len(rows), dtype=np.int64)])
+            self._cells[cell] = rows
+        rows[count] = row
+        self._cell_counts[cell] = count + 1
+        self._row_cell[row] = cell
+        self._row_slot[row] = count
+
+    def update(self, rows: np.ndarray, latitude: np.ndarray, longitude: np.ndarray):
+        """Move rows to the cells of their new coordinates.
+
+        Only rows whose cell actually changed are touched, so the common case
+        of a vessel moving within its cell costs one vectorized comparison.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        self._ensure_rows(int(rows.max()))
+
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        valid = ~(np.isnan(latitude) | np.isnan(longitude))
+        new_cells = np.where(valid, self.cell_ids(np.nan_to_num(latitude), np.nan_to_num(longitude)), -1)
+
+        changed = np.flatnonzero(self._row_cell[rows] != new_cells)
+        for i in changed.tolist():
+            row = int(rows[i])
+            old_cell = int(self._row_cell[row])
+            if old_cell >= 0:
+                self._remove(row, old_cell)
+                self._row_cell[row] = -1
+            new_cell = int(new_cells[i])
+            if new_cell >= 0:
+                self._insert(row, new_cell)
+
+    def _lon_ranges(self, west: float, east: float) -> List[Tuple[int, int]]:
+        """Longitude index ranges covered by [west, east], split at the antimeridian"""
+        if east - west >= 360.0:
+            return [(0, self.n_lon - 1)]
+        w = int(self._lon_index(west))
+        e = int(self._lon_index(east))
+        if west <= east and w <= e:
+            return [(w, e)]
+        return [(w, self.n_lon - 1), (0, e)]
+
+    def candidate_rows(self, north: float, south: float, east: float, west: float) -> np.ndarray:
+        """Rows in every cell overlapping the box (superset of the exact result)"""
+        lat_lo, lat_hi = int(self._lat_index(south)), int(self._lat_index(north))
+        lon_ranges = self._lon_ranges(west, east)
+
+        touched = (lat_hi - lat_lo + 1) * sum(hi - lo + 1 for lo, hi in lon_ranges)
+        chunks = []
+
+        if touched > len(self._cells):
+            # Box covers more cells than are occupied: scan the occupied ones
+            for cell, rows in self._cells.items():
+                lat_idx, lon_idx = divmod(cell, self.n_lon)
+                if lat_lo <= lat_idx <= lat_hi and any(lo <= lon_idx <= hi for lo, hi in lon_ranges):
+                    chunks.append(rows[:self._cell_counts[cell]])
+        else:
+            for lat_idx in range(lat_lo, lat_hi + 1):
+                base = lat_idx * self.n_lon
+                for lo, hi in lon_ranges:
+                    for lon_idx in range(lo, hi + 1):
+                        rows = self._cells.get(base + lon_idx)
+                        if rows is not None:
+                            chunks.append(rows[:self._cell_counts[base + lon_idx]])
+
+        if not chunks:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(chunks)
+
+    def query_bbox(self, north: float, south: float, east: float, west: float,
+                   latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        """Rows whose position lies inside the box.
+
+        ``latitude``/``longitude`` are the store's latest-position columns used
+        for the exact test. ``west > east`` denotes a box across the antimeridian.
+        """
+        rows = self.candidate_rows(north, south, east, west)
+        if len(rows) == 0:
+            return rows
+        lat = latitude[rows]
+        lon = longitude[rows]
+        inside = (lat >= south) & (lat <= north)
+        if west <= east:
+            inside &= (lon >= west) & (lon <= east)
+        else:
+            inside &= (lon >= west) | (lon <= east)
+        return rows[inside]
+
+    def query_radius(self, center_lat: float, center_lon: float, radius_nm: float,
+                     latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        """Rows within ``radius_nm`` nautical miles of a point"""
+        dlat = radius_nm / 60.0
+        north = min(center_lat + dlat, 90.0)
+        south = max(center_lat - dlat, -90.0)
+
+        cos_lat = math.cos(math.radians(max(abs(north), abs(south))))
+        if north >= 90.0 or south <= -90.0 or cos_lat < 1e-6:
+            west, east = -180.0, 180.0
+        else:
+            dlon = min(radius_nm / (60.0 * cos_lat), 180.0)
+            west = ((center_lon - dlon + 180.0) % 360.0) - 180.0
+            east = ((center_lon + dlon + 180.0) % 360.0) - 180.0
+            if dlon >= 180.0:
+                west, east = -180.0, 180.0
+
+        rows = self.candidate_rows(north, south, east, west)
+        if len(rows) == 0:
+            return rows
+        distance = haversine_nm(center_lat, center_lon, latitude[rows], longitude[rows])
+        return rows[distance <= radius_nm]
+
+    def clear(self):
+        """Remove every row from the index"""
+        self._cells.clear()
+        self._cell_counts.clear()
+        self._row_cell[:] = -1
+        self._row_slot[:] = -1
@@ -0,0 +1,288 @@
+"""
+Append-only segmented spool for collector output while Kafka is unavailable
+"""
+
+import asyncio
+import os
+import struct
+import threading
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from ..core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+SEGMENT_MAGIC = b'MFSPOOL1'
+SEGMENT_SUFFIX = '.spool'
+
+# crc32, topic length, key length (-1 = no key), value length
+_RECORD_HEADER = struct.Struct('<IHiI')
+
+# A spooled record: (topic, key, value)
+SpoolRecord = Tuple[str, Optional[bytes], bytes]
+
+
+def _segment_name(sequence: int) -> str:
+    return f"segment-{sequence:010d}-{os.getpid()}{SEGMENT_SUFFIX}"
+
+
+def _segment_sequence(path: Path) -> Tuple[int, int]:
+    _, sequence, pid = path.stem.split('-')
+    return int(sequence), int(pid)
+
+
+def _is_locked(path: Path) -> bool:
+    """Whether another writer still holds ``path`` open for appending"""
+    if not FCNTL_AVAILABLE:
+        return False
+    with open(path, 'rb') as handle:
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    return False
+
+
+def _encode(topic: str, key: Optional[bytes], value: bytes) -> bytes:
+    topic_bytes = topic.encode('utf-8')
+    body = topic_bytes + (key or b'') + value
+    header = _RECORD_HEADER.pack(zlib.crc32(body), len(topic_bytes),
+                                 -1 if key is None else len(key), len(value))
+    return header + body
+
+
+def read_segment(path: Path) -> Iterator[SpoolRecord]:
+    """Yield the records of one segment, stopping at a torn or corrupt tail"""
+    with open(path, 'rb') as handle:
+        if handle.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+            logger.warning(f"Skipping spool segment with bad header: {path}")
+            return
+        while True:
+            header = handle.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            crc, topic_len, key_len, value_len = _RECORD_HEADER.unpack(header)
+            body = handle.read(topic_len + max(key_len, 0) + value_len)
+            if len(body) < topic_len + max(key_len, 0) + value_len or zlib.crc32(body) != crc:
+                logger.warning(f"Truncated or corrupt record at the end of spool segment {path}")
+                return
+            topic = body[:topic_len].decode('utf-8')
+            key = body[topic_len:topic_len + key_len] if key_len >= 0 else None
+            yield topic, key, body[topic_len + max(key_len, 0):]
+
+
+class SpoolWriter:
+    """Writer of CRC-checked records into rolling spool segment files"""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 fsync_bytes: int = 4 * 1024 * 1024, max_bytes: Optional[int] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync_bytes = fsync_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._handle = None
+        self._segment_size = 0
+        self._unsynced = 0
+
+        self.record_count = 0
+        self.byte_count = 0
+        self.fsync_count = 0
+        self.segment_count = 0
+        self.dropped_bytes = 0
+        self.dropped_segments = 0
+
+    def segments(self) -> List[Path]:
+        """Segment files in write order"""
+        return sorted(self.directory.glob(f"segment-*{SEGMENT_SUFFIX}"), key=_segment_sequence)
+
+    def closed_segments(self) -> List[Path]:
+        """Segments that are no longer being written"""
+        with self._lock:
+            current = self._handle.name if self._handle else None
+        return [path for path in self.segments()
+                if str(path) != current and not _is_locked(path)]
+
+    def _enforce_limit(self, existing: List[Path]) -> List[Path]:
+        """Delete the oldest closed segments until a new segment fits under ``max_bytes``"""
+        sizes = {}
+        for path in existing:
+            try:
+                sizes[path] = path.stat().st_size
+            except FileNotFoundError:  # drained meanwhile
+                pass
+        total = sum(sizes.values())
+        for path in list(sizes):
+            if total + self.segment_bytes <= self.max_bytes:
+                break
+            if _is_locked(path):
+                continue
+            path.unlink(missing_ok=True)
+            size = sizes.pop(path)
+            total -= size
+            self.dropped_bytes += size
+            self.dropped_segments += 1
+            logger.warning(f"Spool over {self.max_bytes} bytes, dropped oldest segment {path.name}")
+        return list(sizes)
+
+    def _open_segment(self):
+        existing = self.segments()
+        if self.max_bytes is not None:
+            existing = self._enforce_limit(existing)
+        sequence = _segment_sequence(existing[-1])[0] + 1 if existing else 0
+        self._handle = open(self.directory / _segment_name(sequence), 'ab', buffering=1024 * 1024)
+        if FCNTL_AVAILABLE:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        self._handle.write(SEGMENT_MAGIC)
+        self._segment_size = len(SEGMENT_MAGIC)
+        self.segment_count += 1
+
+    def _sync(self):
+        if self._handle and self._unsynced:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self.fsync_count += 1
+            self._unsynced = 0
+
+    def _close_segment(self):
+        if self._handle:
+            self._sync()
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+
+    def send(self, topic: str, value: bytes, key: Optional[bytes] = None):
+        """Append one record"""
+        frame = _encode(topic, key, value)
+        with self._lock:
+            if self._handle is None or self._segment_size + len(frame) > self.segment_bytes:
+                self._close_segment()
+                self._open_segment()
+            self._handle.write(frame)
+            self._segment_size += len(frame)
+            self._unsynced += len(frame)
+            self.record_count += 1
+            self.byte_count += len(frame)
+            if self._unsynced >= self.fsync_bytes:
+                self._sync()
+
+    def flush(self, timeout: Optional[float] = None):
+        """Make everything written so far durable"""
+        with self._lock:
+            self._sync()
+
+    def roll(self):
+        """Close the current segment so the replayer can pick it up"""
+        with self._lock:
+            self._close_segment()
+
+    def close(self, timeout: Optional[float] = None):
+        self.roll()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get spool statistics"""
+        return {
+            'directory': str(self.directory),
+            'record_count': self.record_count,
+            'byte_count': self.byte_count,
+            'fsync_count': self.fsync_count,
+            'segments_written': self.segment_count,
+            'segments_pending': len(self.segments()),
+            'dropped_bytes': self.dropped_bytes,
+            'dropped_segments': self.dropped_segments
+        }
+
+
+class SpoolReplayer:
+    """Drain closed spool segments into a sink once it is reachable"""
+
+    def __init__(self, writer: SpoolWriter):
+        self.writer = writer
+        self.replayed_records = 0
+        self.replayed_segments = 0
+        self.failed_attempts = 0
+
+    def drain(self, sink, include_active: bool = False) -> int:
+        """Replay every closed segment into ``sink`` (blocking); returns records sent"""
+        if include_active:
+            self.writer.roll()
+
+        sent = 0
+        for path in self.writer.closed_segments():
+            count = 0
+            for topic, key, value in read_segment(path):
+                sink.send(topic, value=value, key=key)
+                count += 1
+            sink.flush()
+            # The writer may have dropped it meanwhile to stay under its size limit
+            path.unlink(missing_ok=True)
+            sent += count
+            self.replayed_records += count
+            self.replayed_segments += 1
+            logger.info(f"Replayed {count} spooled records from {path.name}")
+        return sent
+
+    async def run(self, sink_factory: Callable[[], Any], retry_interval: float = 30.0,
+                  include_active: bool = True):
+        """Keep trying to reach the sink and drain the spool into it, until cancelled.
+
+        The sink is created once by ``sink_factory`` (None means unreachable)
+        and reused; it is closed and recreated after a failed drain.
+        """
+        loop = asyncio.get_running_loop()
+        sink = None
+        try:
+            while True:
+                if self.writer.segments():
+                    try:
+                        if sink is None:
+                            sink = await loop.run_in_executor(None, sink_factory)
+                        if sink is not None:
+                            await loop.run_in_executor(None, self.drain, sink, include_active)
+                    except Exception as e:
+                        self.failed_attempts += 1
+                        logger.warning(f"Spool replay failed, will retry: {e}")
+                        sink = self._close_sink(sink)
+                await asyncio.sleep(retry_interval)
+        finally:
+            self._close_sink(sink)
+
+    @staticmethod
+    def _close_sink(sink) -> None:
+        if sink is not None and hasattr(sink, 'close'):
+            try:
+                sink.close()
+            except Exception as e:
+                logger.warning(f"Failed to close spool replay sink: {e}")
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get replay statistics"""
+        return {
+            'replayed_records': self.replayed_records,
+            'replayed_segments': self.replayed_segments,
+            'failed_attempts': self.failed_attempts
+        }
+
+
+@lru_cache()
+def get_spool_writer(source_name: str) -> SpoolWriter:
+    """Get the spool writer shared by every collector of ``source_name``"""
+    return SpoolWriter(os.path.join(settings.spool_dir, source_name),
+                       segment_bytes=settings.spool_segment_bytes,
+                       fsync_bytes=settings.spool_fsync_bytes,
+                       max_bytes=settings.spool_max_bytes)
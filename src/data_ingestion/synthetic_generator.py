@@ -6,20 +6,34 @@ import random
 import math
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Union
 import numpy as np
 from ..core.config import MAJOR_PORTS, SHIPPING_ROUTES
 from ..models.vessel import VesselType, NavigationStatus, VesselPositionCreate
+from .position_batch import PositionBatch
+from .position_store import to_epoch
+from .trajectory_engine import TrajectoryEngine
+from ..core.geo import haversine_nm
+
+# MMSI ranges used for the synthetic fleet
+CONTAINER_MMSI_BASE = 200000000
+TANKER_MMSI_BASE = 400000000
 
 
 class SyntheticDataGenerator:
     """Generate realistic synthetic AIS data for testing and simulation"""
     
-    def __init__(self, seed: Optional[int] = None):
+    def __init__(self, seed: Optional[int] = None, num_vessels: int = 150):
         if seed:
             random.seed(seed)
             np.random.seed(seed)
         
+        self.rng = np.random.default_rng(seed)
+        self.num_vessels = num_vessels
+        self._fleet_arrays: Optional[Dict[str, np.ndarray]] = None
+        self._trajectory_engines: Dict[int, TrajectoryEngine] = {}
+        self.epoch = datetime.utcnow()
+        
         self.vessel_database = self._create_vessel_database()
         self.active_voyages = {}
         self.port_locations = MAJOR_PORTS
@@ -28,10 +42,11 @@ class SyntheticDataGenerator:
     def _create_vessel_database(self) -> List[Dict[str, Any]]:
         """Create a database of synthetic vessels"""
         vessels = []
+        container_count = self.num_vessels * 2 // 3
         
         # Container ships
-        for i in range(100):
-            mmsi = 200000000 + i
+        for i in range(container_count):
+            mmsi = CONTAINER_MMSI_BASE + i
             vessels.append({
                 'mmsi': mmsi,
                 'vessel_name': f'CONTAINER_SHIP_{i:03d}',
@@ -42,8 +57,8 @@ class SyntheticDataGenerator:
             })
         
         # Tankers
-        for i in range(50):
-            mmsi = 400000000 + i
+        for i in range(self.num_vessels - container_count):
+            mmsi = TANKER_MMSI_BASE + i
             vessels.append({
                 'mmsi': mmsi,
                 'vessel_name': f'TANKER_{i:03d}',
@@ -85,6 +100,30 @@ class SyntheticDataGenerator:
         
         return routes
     
+    def _trajectory_routes(self) -> List[List[Tuple[float, float]]]:
+        """Waypoint lists the trajectory engine sails: container routes plus chokepoint transits"""
+        routes = [route['waypoints'] for route in self.routes]
+        
+        for chokepoint in SHIPPING_ROUTES.values():
+            start, end = chokepoint['start'], chokepoint['end']
+            distance = float(haversine_nm(start['lat'], start['lon'], end['lat'], end['lon']))
+            routes.append(self._generate_route_waypoints(start, end, distance))
+        
+        return routes
+    
+    def trajectory_engine(self, vessel_count: Optional[int] = None) -> TrajectoryEngine:
+        """Trajectory engine for the first ``vessel_count`` fleet vessels (cached per size)"""
+        vessel_count = vessel_count or len(self.vessel_database)
+        engine = self._trajectory_engines.get(vessel_count)
+        if engine is None:
+            fleet = self.fleet_arrays(vessel_count)
+            engine = TrajectoryEngine(
+                self._trajectory_routes(), fleet['mmsi'], fleet['max_speed'],
+                epoch=self.epoch, rng=self.rng
+            )
+            self._trajectory_engines[vessel_count] = engine
+        return engine
+    
     def _generate_route_waypoints(self, origin: Dict, destination: Dict, distance_nm: float) -> List[Tuple[float, float]]:
         """Generate waypoints for a route using great circle interpolation"""
         lat1, lon1 = math.radians(origin['lat']), math.radians(origin['lon'])
@@ -118,6 +157,13 @@ class SyntheticDataGenerator:
     def generate_vessel_position(self, vessel: Dict[str, Any], current_time: datetime) -> VesselPositionCreate:
         """Generate a realistic position for a vessel"""
         
+        # Fleet vessels follow their route so consecutive positions form a track
+        engine = self.trajectory_engine()
+        row = engine.row_of(vessel['mmsi'])
+        if row is not None:
+            batch = engine.batch_at(to_epoch(current_time), rows=[row])
+            return next(batch.to_models())
+        
         # Generate random position in shipping lanes
         latitude = random.uniform(-60, 70)
         longitude = random.uniform(-180, 180)
@@ -125,7 +171,7 @@ class SyntheticDataGenerator:
         # Generate realistic navigation data
         speed = random.uniform(0, vessel['max_speed'])
         course = random.uniform(0, 360)
-        heading = course + random.gauss(0, 2)
+        heading = (course + random.gauss(0, 2)) % 360
         
         # Determine navigation status based on speed
         if speed < 0.5:
@@ -148,19 +194,90 @@ class SyntheticDataGenerator:
             data_source="synthetic"
         )
     
-    def generate_batch_positions(self, vessel_count: int, current_time: datetime) -> List[VesselPositionCreate]:
-        """Generate a batch of vessel positions"""
-        positions = []
-        selected_vessels = random.sample(
-            self.vessel_database, 
-            min(vessel_count, len(self.vessel_database))
-        )
+    def generate_batch_positions(self, vessel_count: int, current_time: datetime,
+                                 as_models: bool = True) -> Union[List[VesselPositionCreate], PositionBatch]:
+        """Generate a batch of vessel positions.
         
-        for vessel in selected_vessels:
-            position = self.generate_vessel_position(vessel, current_time)
-            positions.append(position)
+        Positions are generated as arrays; pass ``as_models=False`` to get the
+        ``PositionBatch`` itself instead of a list of models.
+        """
+        count = min(vessel_count, len(self.vessel_database))
+        selected = self.rng.choice(len(self.vessel_database), size=count, replace=False)
         
-        return positions
+        batch = self.trajectory_engine().batch_at(to_epoch(current_time), rows=selected)
+        return list(batch.to_models()) if as_models else batch
+    
+    def fleet_arrays(self, vessel_count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Fleet as arrays (mmsi, max_speed, is_tanker).
+        
+        The first vessels mirror ``vessel_database``; larger fleets are
+        extended with vectorized synthetic vessels in the same MMSI ranges
+        without building per-vessel dicts.
+        """
+        if self._fleet_arrays is None:
+            self._fleet_arrays = {
+                'mmsi': np.array([v['mmsi'] for v in self.vessel_database], dtype=np.int64),
+                'max_speed': np.array([v['max_speed'] for v in self.vessel_database], dtype=np.float32),
+                'is_tanker': np.array([v['vessel_type'] == VesselType.TANKER for v in self.vessel_database])
+            }
+        
+        fleet = self._fleet_arrays
+        base = len(fleet['mmsi'])
+        if vessel_count is None or vessel_count == base:
+            return fleet
+        if vessel_count < base:
+            return {name: values[:vessel_count] for name, values in fleet.items()}
+        
+        # Extend both vessel classes past the database, keeping its 2:1 split
+        extra = vessel_count - base
+        extra_containers = extra * 2 // 3
+        extra_tankers = extra - extra_containers
+        containers = int(np.count_nonzero(~fleet['is_tanker']))
+        tankers = base - containers
+        
+        return {
+            'mmsi': np.concatenate([
+                fleet['mmsi'],
+                CONTAINER_MMSI_BASE + containers + np.arange(extra_containers, dtype=np.int64),
+                TANKER_MMSI_BASE + tankers + np.arange(extra_tankers, dtype=np.int64)
+            ]),
+            'max_speed': np.concatenate([
+                fleet['max_speed'],
+                self.rng.uniform(18, 25, extra_containers).astype(np.float32),
+                self.rng.uniform(14, 20, extra_tankers).astype(np.float32)
+            ]),
+            'is_tanker': np.concatenate([
+                fleet['is_tanker'], np.zeros(extra_containers, dtype=bool), np.ones(extra_tankers, dtype=bool)
+            ])
+        }
+    
+    def generate_position_arrays(self, vessel_count: int, time_steps: int = 1,
+                                 start_time: Optional[datetime] = None,
+                                 interval_seconds: float = 60.0) -> PositionBatch:
+        """Generate ``vessel_count * time_steps`` positions in one vectorized pass.
+        
+        Vessels move along their routes, so each vessel's rows form a
+        continuous track. Rows are ordered time-major: every vessel at step 0,
+        then step 1, ...
+        """
+        engine = self.trajectory_engine(vessel_count)
+        start = to_epoch(start_time or datetime.utcnow())
+        
+        steps = start + interval_seconds * np.arange(time_steps, dtype=np.float64)
+        return engine.batch_at(np.repeat(steps, vessel_count), rows=np.tile(np.arange(vessel_count), time_steps))
+    
+    def iter_position_batches(self, vessel_count: int, time_steps: int,
+                              start_time: Optional[datetime] = None, interval_seconds: float = 60.0,
+                              steps_per_batch: int = 10) -> Iterator[PositionBatch]:
+        """Stream a large synthetic feed as batches of ``steps_per_batch`` time steps"""
+        start = start_time or datetime.utcnow()
+        for first_step in range(0, time_steps, steps_per_batch):
+            steps = min(steps_per_batch, time_steps - first_step)
+            yield self.generate_position_arrays(
+                vessel_count, steps,
+                start + timedelta(seconds=first_step * interval_seconds),
+                interval_seconds
+            )
     
     def generate_port_congestion_scenario(self, port_name: str, congestion_level: float) -> List[VesselPositionCreate]:
         """Generate a port congestion scenario"""
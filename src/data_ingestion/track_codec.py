@@ -0,0 +1,210 @@
+"""
+Compact per-vessel track encoding: fixed-point deltas packed as zigzag varints
+"""
+
+import struct
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .position_store import POSITION_COLUMNS
+
+TRACK_MEDIA_TYPE = "application/vnd.maritimeflow.track"
+
+TRACK_MAGIC = b'MFT1'
+
+# magic, constant-column mask, mmsi, row count, data source length
+_HEADER = struct.Struct('<4sBqIH')
+
+# column -> (fixed-point scale, delta order, NaN allowed); encoded in this order.
+# 1e-6 degrees is about 0.1 m; speeds and angles keep AIS's own 0.1 resolution.
+_COLUMN_CODECS = {
+    'timestamp': (1000.0, 2, False),  # milliseconds, delta-of-delta
+    'latitude': (1e6, 1, False),
+    'longitude': (1e6, 1, False),
+    'speed_over_ground': (10.0, 1, True),
+    'course_over_ground': (10.0, 1, True),
+    'true_heading': (10.0, 1, True),
+    'navigation_status': (1.0, 1, False),
+}
+
+_LENGTHS = struct.Struct(f'<{len(_COLUMN_CODECS)}I')
+
+_SHIFTS = np.arange(10, dtype=np.uint64) * np.uint64(7)
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def varint_encode(values: np.ndarray) -> bytes:
+    """LEB128 varints of unsigned 64-bit values, vectorized"""
+    if not len(values):
+        return b''
+    lengths = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        lengths += values >= np.uint64(1 << (7 * k))
+    width = int(lengths.max())
+    chunks = ((values[:, None] >> _SHIFTS[:width]) & np.uint64(0x7f)).astype(np.uint8)
+    positions = np.arange(width)
+    chunks[positions < (lengths - 1)[:, None]] |= 0x80
+    return chunks[positions < lengths[:, None]].tobytes()
+
+
+def varint_decode(data: bytes, count: int) -> np.ndarray:
+    """Decode exactly ``count`` varints"""
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(buf < 0x80)
+    if len(ends) != count or ends[-1] != len(buf) - 1:
+        raise ValueError(f"Expected {count} varints in {len(buf)} bytes")
+    starts = np.empty(count, dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    offsets = np.arange(len(buf)) - np.repeat(starts, ends - starts + 1)
+    parts = (buf & 0x7f).astype(np.uint64) << (offsets.astype(np.uint64) * np.uint64(7))
+    return np.add.reduceat(parts, starts)
+
+
+def _quantize(values: np.ndarray, scale: float, nullable: bool) -> np.ndarray:
+    if not nullable:
+        return np.round(values.astype(np.float64) * scale).astype(np.int64)
+    # 0 marks a missing value, so present values are shifted up by one
+    missing = np.isnan(values)
+    out = np.round(np.where(missing, 0, values).astype(np.float64) * scale).astype(np.int64) + 1
+    out[missing] = 0
+    return out
+
+
+def _dequantize(values: np.ndarray, scale: float, nullable: bool, dtype) -> np.ndarray:
+    if np.issubdtype(dtype, np.integer):
+        return values.astype(dtype)
+    if not nullable:
+        return (values / scale).astype(dtype)
+    out = ((values - 1) / scale).astype(dtype)
+    out[values == 0] = np.nan
+    return out
+
+
+def encode_track(columns: Dict[str, np.ndarray], mmsi: int, data_source: Optional[str] = None) -> bytes:
+    """Encode one vessel's position columns (as returned by ``PositionStore.recent``).
+
+    Each column is converted to fixed point, delta coded (timestamps as
+    delta-of-delta, so a regular reporting interval costs one byte per
+    point), zigzag mapped and packed as varints. A column whose values are
+    all equal is stored once. Rows may be in any order; the order is kept.
+    """
+    count = len(columns['timestamp'])
+    source = (data_source or '').encode('utf-8')
+    mask = 0
+    lengths = []
+    payloads = []
+    for bit, (name, (scale, order, nullable)) in enumerate(_COLUMN_CODECS.items()):
+        quantized = _quantize(columns[name], scale, nullable)
+        if count and np.all(quantized == quantized[0]):
+            mask |= 1 << bit
+            quantized = quantized[:1]
+        else:
+            for _ in range(order):
+                quantized = np.diff(quantized, prepend=0)
+        payload = varint_encode(_zigzag(quantized))
+        lengths.append(len(payload))
+        payloads.append(payload)
+
+    return b''.join([_HEADER.pack(TRACK_MAGIC, mask, int(mmsi), count, len(source)),
+                     source, _LENGTHS.pack(*lengths)] + payloads)
+
+
+def decode_track(data: bytes) -> Tuple[Dict[str, np.ndarray], int, Optional[str]]:
+    """Decode ``encode_track`` output into (columns, mmsi, data_source).
+
+    Columns have the ``PositionStore`` dtypes and values at the codec's
+    fixed-point resolution.
+    """
+    data = memoryview(data)
+    if len(data) < _HEADER.size or bytes(data[:4]) != TRACK_MAGIC:
+        raise ValueError("Not an encoded track")
+    _, mask, mmsi, count, source_length = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    data_source = bytes(data[offset:offset + source_length]).decode('utf-8') or None
+    offset += source_length
+    lengths = _LENGTHS.unpack_from(data, offset)
+    offset += _LENGTHS.size
+
+    columns = {}
+    for bit, ((name, (scale, order, nullable)), length) in enumerate(zip(_COLUMN_CODECS.items(), lengths)):
+        payload = data[offset:offset + length]
+        offset += length
+        if mask >> bit & 1:
+            quantized = np.repeat(_unzigzag(varint_decode(payload, 1)), count)
+        else:
+            quantized = _unzigzag(varint_decode(payload, count))
+            for _ in range(order):
+                quantized = np.cumsum(quantized)
+        columns[name] = _dequantize(quantized, scale, nullable, POSITION_COLUMNS[name])
+    return columns, mmsi, data_source
+
+
+def benchmark_track_codec(point_count: int = 720, vessel_count: int = 200,
+                          interval_seconds: int = 60) -> Dict[str, Any]:
+    """Compare encoded tracks with raw rows in bytes per point and decode speed.
+
+    Raw rows are the ``vessel_positions`` rows as the persistence sink
+    COPYs them (CSV) and as the positions endpoint returns them (JSON);
+    NumPy column bytes are listed as the in-memory baseline.
+    """
+    import csv
+    import io
+    import json
+    from datetime import datetime, timedelta
+    from .position_sink import POSITION_COLUMNS as ROW_COLUMNS, position_rows
+    from .synthetic_generator import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=7)
+    batch = generator.generate_position_arrays(
+        vessel_count, point_count, datetime.utcnow() - timedelta(seconds=interval_seconds * point_count),
+        interval_seconds=interval_seconds
+    )
+    batch = batch.take(np.lexsort((batch.timestamp, batch.mmsi)))
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(batch.mmsi)) + 1, [len(batch)]))
+    tracks = [batch.take(slice(start, end)) for start, end in zip(bounds[:-1], bounds[1:])]
+
+    encoded = []
+    start = time.perf_counter()
+    for track in tracks:
+        columns = {name: getattr(track, name) for name in POSITION_COLUMNS}
+        encoded.append(encode_track(columns, int(track.mmsi[0]), track.data_source))
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in encoded:
+        decode_track(data)
+    decode_seconds = time.perf_counter() - start
+
+    rows = position_rows(batch, '2024-01-01 00:00:00.000000')
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    row_bytes = len(buffer.getvalue().encode('utf-8'))
+    json_bytes = len(json.dumps([dict(zip(ROW_COLUMNS, row)) for row in rows], separators=(',', ':')))
+    column_bytes = sum(getattr(batch, name).nbytes for name in POSITION_COLUMNS) + batch.mmsi.nbytes
+    encoded_bytes = sum(len(data) for data in encoded)
+
+    rows_total = len(batch)
+    return {
+        'points': rows_total,
+        'encoded_bytes_per_point': encoded_bytes / rows_total,
+        'row_bytes_per_point': row_bytes / rows_total,
+        'json_bytes_per_point': json_bytes / rows_total,
+        'column_bytes_per_point': column_bytes / rows_total,
+        'ratio_vs_rows': row_bytes / encoded_bytes,
+        'ratio_vs_json': json_bytes / encoded_bytes,
+        'ratio_vs_columns': column_bytes / encoded_bytes,
+        'encode_points_per_second': rows_total / encode_seconds if encode_seconds else 0.0,
+        'decode_points_per_second': rows_total / decode_seconds if decode_seconds else 0.0
+    }
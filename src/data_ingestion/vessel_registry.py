@@ -0,0 +1,126 @@
+"""
+In-memory vessel master data registry with hash and secondary indexes
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def _index_key(value: Any) -> Optional[str]:
+    """Normalise an indexed attribute (enums index by their value)"""
+    if value is None:
+        return None
+    return getattr(value, 'value', value)
+
+
+class VesselRegistry:
+    """Vessel master data keyed by MMSI with type and flag indexes"""
+
+    INDEXED_FIELDS = ('vessel_type', 'flag_country')
+
+    def __init__(self):
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[int, None]]] = {
+            field: {} for field in self.INDEXED_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, mmsi: int) -> bool:
+        return int(mmsi) in self._records
+
+    def _reindex(self, mmsi: int, field: str, old: Any, new: Any):
+        old, new = _index_key(old), _index_key(new)
+        if old == new:
+            return
+        index = self._indexes[field]
+        if old is not None:
+            members = index.get(old)
+            if members is not None:
+                members.pop(mmsi, None)
+                if not members:
+                    del index[old]
+        if new is not None:
+            index.setdefault(new, {})[mmsi] = None
+
+    def upsert(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or merge a vessel record; ``None`` values never overwrite known data"""
+        mmsi = int(record['mmsi'])
+        current = self._records.get(mmsi)
+        if current is None:
+            current = {'mmsi': mmsi}
+            self._records[mmsi] = current
+
+        for field, value in record.items():
+            if value is None or field == 'mmsi':
+                continue
+            if field in self._indexes:
+                self._reindex(mmsi, field, current.get(field), value)
+            current[field] = value
+
+        return current
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]):
+        """Insert or merge several vessel records"""
+        for record in records:
+            self.upsert(record)
+
+    def observe(self, mmsi: int, data_source: Optional[str] = None,
+                timestamp: Optional[datetime] = None):
+        """Record that a vessel was seen in a position report"""
+        timestamp = timestamp or datetime.utcnow()
+        record = self._records.get(int(mmsi))
+        if record is None:
+            record = self.upsert({'mmsi': mmsi})
+        record.setdefault('first_seen', timestamp)
+        record['last_seen'] = timestamp
+        if data_source:
+            record['data_source'] = data_source
+
+    def observe_many(self, mmsis: Iterable[int], data_source: Optional[str] = None,
+                     timestamp: Optional[datetime] = None):
+        """Record that several vessels were seen in one batch of reports"""
+        timestamp = timestamp or datetime.utcnow()
+        for mmsi in mmsis:
+            self.observe(mmsi, data_source, timestamp)
+
+    def get(self, mmsi: int) -> Optional[Dict[str, Any]]:
+        """Record for a single vessel, or None if unknown"""
+        return self._records.get(int(mmsi))
+
+    def find(self, vessel_type: Optional[Any] = None, flag_country: Optional[str] = None,
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Vessels matching every given filter, in registration order"""
+        filters = [(field, _index_key(value)) for field, value in
+                   (('vessel_type', vessel_type), ('flag_country', flag_country)) if value is not None]
+
+        if not filters:
+            mmsis = self._records.keys()
+        else:
+            # Walk the smallest matching set and probe the others
+            sets = sorted((self._indexes[field].get(key, {}) for field, key in filters), key=len)
+            smallest, others = sets[0], sets[1:]
+            mmsis = (m for m in smallest if all(m in other for other in others))
+
+        result = []
+        for mmsi in mmsis:
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self._records[mmsi])
+        return result
+
+    def counts(self, field: str) -> Dict[Any, int]:
+        """Number of vessels per value of an indexed field"""
+        return {key: len(members) for key, members in self._indexes[field].items()}
+
+    def clear(self):
+        """Drop all vessel records"""
+        self.__init__()
+
+
+@lru_cache()
+def get_vessel_registry() -> VesselRegistry:
+    """Get the process-wide vessel registry shared by collectors and the API"""
+    return VesselRegistry()
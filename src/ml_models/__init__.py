@@ -3,12 +3,15 @@ Machine learning models for maritime analytics and predictions
 """
 
 from .congestion_predictor import CongestionPredictor
+from .feature_store import CongestionFeatureStore, get_congestion_feature_store
 from .route_optimizer import RouteOptimizer
 from .eta_predictor import ETAPredictor
 from .anomaly_detector import AnomalyDetector
 
 __all__ = [
     "CongestionPredictor",
+    "CongestionFeatureStore",
+    "get_congestion_feature_store",
     "RouteOptimizer",
     "ETAPredictor",
     "AnomalyDetector"
@@ -5,23 +5,110 @@ Port congestion prediction model using machine learning
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Sequence
 import joblib
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import structlog
 
+from ..core.config import MAJOR_PORTS
+from ..core.geo import haversine_nm
+from ..data_ingestion.position_archive import PositionArchive, get_position_archive
+from ..data_ingestion.position_store import from_epoch, nav_status_code
+from ..models.vessel import NavigationStatus
+from .feature_store import CongestionFeatureStore, get_congestion_feature_store
+
 logger = structlog.get_logger(__name__)
 
+# Port conditions assumed for forecasts when no current observation is given
+DEFAULT_PORT_CONDITIONS = {
+    'vessels_waiting': 0.0,
+    'vessels_at_berth': 0.0,
+    'vessels_arrived_24h': 0.0,
+    'average_wait_time': 0.0,
+    'berth_utilization': 0.7,
+    'throughput_24h': 0.0,
+    'weather_impact': 0.1,  # Good weather
+    'historical_avg_congestion': 0.5  # Used until the feature store has history for the slot
+}
+
+
+def _epochs(timestamps: pd.Series) -> np.ndarray:
+    """Epoch seconds of a UTC timestamp series"""
+    return ((timestamps - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+
+
+def _port_ids(df: pd.DataFrame) -> List[str]:
+    if 'port_id' not in df.columns:
+        return ['unknown'] * len(df)
+    return df['port_id'].fillna('unknown').astype(str).tolist()
+
+
+def _hourly_vessel_counts(hours: np.ndarray, mmsis: np.ndarray, mask: np.ndarray) -> Dict[int, int]:
+    """Distinct vessels per hour among the masked reports"""
+    pairs = np.unique(np.column_stack([hours[mask], mmsis[mask]]), axis=0)
+    counted, counts = np.unique(pairs[:, 0], return_counts=True)
+    return dict(zip(counted.tolist(), counts.tolist()))
+
+
+def archive_congestion_samples(archive: Optional[PositionArchive] = None, start: Optional[float] = None,
+                               end: Optional[float] = None, radius_nm: float = 15.0,
+                               port_ids: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Hourly congestion observations per port from archived position reports.
+
+    Reads each archived day overlapping [start, end] (epoch seconds) once.
+    Vessels within ``radius_nm`` of a port at anchor count as waiting and
+    moored ones as at berth; ``congestion_score`` is the waiting share.
+    """
+    archive = archive if archive is not None else get_position_archive()
+    ports = {port_id: MAJOR_PORTS[port_id] for port_id in (port_ids or MAJOR_PORTS)}
+    anchored = nav_status_code(NavigationStatus.AT_ANCHOR)
+    moored = nav_status_code(NavigationStatus.MOORED)
+    samples = []
+    for day in archive.iter_days(start, end):
+        columns = day.scan()
+        timestamps = np.asarray(columns['timestamp'])
+        in_range = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            in_range &= timestamps >= start
+        if end is not None:
+            in_range &= timestamps <= end
+        latitudes = np.asarray(columns['latitude'])
+        for port_id, port in ports.items():
+            # Latitude band first, so the distance is computed for few rows
+            rows = np.flatnonzero(in_range & (np.abs(latitudes - port['lat']) <= radius_nm / 60.0))
+            rows = rows[haversine_nm(latitudes[rows], columns['longitude'][rows],
+                                     port['lat'], port['lon']) <= radius_nm]
+            if not len(rows):
+                continue
+            hours = np.floor_divide(timestamps[rows], 3600).astype(np.int64)
+            mmsis = np.asarray(columns['mmsi'][rows], dtype=np.int64)
+            status = np.asarray(columns['navigation_status'][rows])
+            waiting = _hourly_vessel_counts(hours, mmsis, status == anchored)
+            at_berth = _hourly_vessel_counts(hours, mmsis, status == moored)
+            for hour in np.unique(hours).tolist():
+                vessels_waiting, vessels_at_berth = waiting.get(hour, 0), at_berth.get(hour, 0)
+                total = vessels_waiting + vessels_at_berth
+                samples.append({
+                    'port_id': port_id,
+                    'timestamp': from_epoch(hour * 3600),
+                    'vessels_waiting': vessels_waiting,
+                    'vessels_at_berth': vessels_at_berth,
+                    'congestion_score': vessels_waiting / total if total else 0.0
+                })
+    return samples
+
 
 class CongestionPredictor:
     """Machine learning model for predicting port congestion levels"""
     
-    def __init__(self, model_type: str = "random_forest"):
+    def __init__(self, model_type: str = "random_forest",
+                 feature_store: Optional[CongestionFeatureStore] = None):
         self.model_type = model_type
         self.model = None
         self.scaler = StandardScaler()
+        self.feature_store = feature_store if feature_store is not None else get_congestion_feature_store()
         self.feature_columns = [
             'vessels_waiting', 'vessels_at_berth', 'vessels_arrived_24h',
             'average_wait_time', 'berth_utilization', 'throughput_24h',
@@ -48,12 +135,17 @@ class CongestionPredictor:
         else:
             raise ValueError(f"Unsupported model type: {model_type}")
     
-    def prepare_features(self, congestion_data: List[Dict]) -> pd.DataFrame:
-        """Prepare features for training or prediction"""
+    def prepare_features(self, congestion_data: List[Dict],
+                         historical: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Prepare features for training or prediction.
+
+        ``historical`` overrides the feature store lookup of
+        ``historical_avg_congestion`` (NaN where there is no history).
+        """
         df = pd.DataFrame(congestion_data)
         
-        # Convert timestamp to datetime features
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # Convert timestamp to datetime features (naive timestamps are UTC)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
         df['hour_of_day'] = df['timestamp'].dt.hour
         df['day_of_week'] = df['timestamp'].dt.dayofweek
         df['month'] = df['timestamp'].dt.month
@@ -61,8 +153,14 @@ class CongestionPredictor:
         # Calculate seasonal factor (higher in winter months for northern ports)
         df['seasonal_factor'] = np.sin(2 * np.pi * df['month'] / 12)
         
-        # Calculate historical average congestion for the same time period
-        df['historical_avg_congestion'] = df.groupby(['hour_of_day', 'day_of_week'])['congestion_score'].transform('mean')
+        # Historical average congestion for the port and hour of week, precomputed in the feature store
+        if historical is None:
+            historical = self.feature_store.lookup(_port_ids(df), _epochs(df['timestamp']))
+        if 'historical_avg_congestion' in df.columns:
+            given = pd.to_numeric(df['historical_avg_congestion'], errors='coerce').to_numpy(dtype=np.float64)
+            historical = np.where(np.isnan(historical), given, historical)
+        df['historical_avg_congestion'] = np.where(np.isnan(historical),
+                                                   DEFAULT_PORT_CONDITIONS['historical_avg_congestion'], historical)
         
         # Fill missing values
         for col in self.feature_columns:
@@ -73,13 +171,28 @@ class CongestionPredictor:
         
         return df[self.feature_columns]
     
+    def record_observations(self, congestion_data: List[Dict], target_column: str = 'congestion_score'):
+        """Add observed congestion scores to the feature store"""
+        df = pd.DataFrame(congestion_data)
+        if target_column not in df.columns or not len(df):
+            return
+        self.feature_store.update_many(
+            _port_ids(df), _epochs(pd.to_datetime(df['timestamp'], utc=True)),
+            pd.to_numeric(df[target_column], errors='coerce').to_numpy(dtype=np.float64)
+        )
+    
     def train(self, training_data: List[Dict], target_column: str = 'congestion_score') -> Dict[str, float]:
-        """Train the congestion prediction model"""
+        """Train the congestion prediction model, then record the samples in the feature store"""
         logger.info(f"Training congestion predictor with {len(training_data)} samples")
         
-        # Prepare features and target
-        X = self.prepare_features(training_data)
+        # Prepare features and target; each sample's historical average is the one
+        # it would have seen before its own score was recorded
         df = pd.DataFrame(training_data)
+        historical = self.feature_store.lookup_before(
+            _port_ids(df), _epochs(pd.to_datetime(df['timestamp'], utc=True)),
+            pd.to_numeric(df[target_column], errors='coerce').to_numpy(dtype=np.float64)
+        )
+        X = self.prepare_features(training_data, historical=historical)
         y = df[target_column].fillna(0.0)
         
         # Scale features
@@ -97,9 +210,19 @@ class CongestionPredictor:
             'rmse': np.sqrt(mean_squared_error(y, y_pred))
         }
         
+        self.record_observations(training_data, target_column)
+        
         logger.info(f"Training completed. MAE: {metrics['mae']:.4f}, RMSE: {metrics['rmse']:.4f}")
         return metrics
     
+    def train_from_archive(self, archive: Optional[PositionArchive] = None, start: Optional[float] = None,
+                           end: Optional[float] = None, radius_nm: float = 15.0) -> Dict[str, float]:
+        """Train on hourly port observations derived from the position archive"""
+        samples = archive_congestion_samples(archive, start, end, radius_nm)
+        if not samples:
+            raise ValueError("No archived positions near ports in the requested range")
+        return self.train(samples)
+    
     def predict(self, input_data: List[Dict]) -> List[float]:
         """Predict congestion levels for given input data"""
         if not self.is_trained:
@@ -117,48 +240,80 @@ class CongestionPredictor:
     
     def predict_future_congestion(self, port_id: str, hours_ahead: int = 24) -> List[Dict]:
         """Predict congestion for the next N hours"""
+        return self.forecast_ports([port_id], hours_ahead)[port_id]
+    
+    @staticmethod
+    def _time_features(epochs: np.ndarray) -> np.ndarray:
+        """hour_of_day, day_of_week, month and seasonal_factor columns for UTC epoch seconds"""
+        seconds = epochs.astype(np.int64)
+        hour = (seconds // 3600) % 24
+        day_of_week = (seconds // 86400 + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+        month = seconds.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64) % 12 + 1
+        return np.column_stack([hour, day_of_week, month, np.sin(2 * np.pi * month / 12)]).astype(np.float64)
+    
+    def forecast_ports(self, port_ids: Optional[Sequence[str]] = None, hours_ahead: int = 24,
+                       current_conditions: Optional[Dict[str, Dict[str, float]]] = None,
+                       start_time: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+        """Hourly congestion forecasts for many ports with a single model call.
+        
+        Builds one (ports x hours) feature matrix, scales it and predicts
+        it in one pass. ``port_ids`` defaults to every port in
+        ``MAJOR_PORTS``; ``current_conditions`` maps a port to observed
+        feature values (missing ones use ``DEFAULT_PORT_CONDITIONS``).
+        ``historical_avg_congestion`` is read from the feature store for
+        each port and forecast hour where it has history.
+        """
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        predictions = []
-        current_time = datetime.utcnow()
-        
-        for hour in range(hours_ahead):
-            future_time = current_time + timedelta(hours=hour)
-            
-            # Create input data for this time point
-            input_data = [{
-                'port_id': port_id,
-                'timestamp': future_time,
-                'vessels_waiting': 0,  # These would be populated from current data
-                'vessels_at_berth': 0,
-                'vessels_arrived_24h': 0,
-                'average_wait_time': 0,
-                'berth_utilization': 0.7,  # Default assumption
-                'throughput_24h': 0,
-                'weather_impact': 0.1,  # Default good weather
-                'historical_avg_congestion': 0.5  # Default
-            }]
-            
-            congestion_score = self.predict(input_data)[0]
-            
-            predictions.append({
-                'timestamp': future_time,
-                'predicted_congestion': congestion_score,
-                'confidence': self._calculate_confidence(congestion_score)
-            })
-        
-        return predictions
+        port_ids = list(port_ids) if port_ids is not None else list(MAJOR_PORTS)
+        current_conditions = current_conditions or {}
+        start_time = start_time or datetime.utcnow()
+        if not port_ids or hours_ahead <= 0:
+            return {port_id: [] for port_id in port_ids}
+        
+        # Per-port conditions broadcast over the horizon, time features shared by every port
+        timestamps = [start_time + timedelta(hours=hour) for hour in range(hours_ahead)]
+        epochs = (start_time - datetime(1970, 1, 1)).total_seconds() + 3600.0 * np.arange(hours_ahead)
+        time_features = dict(zip(('hour_of_day', 'day_of_week', 'month', 'seasonal_factor'),
+                                 self._time_features(epochs).T))
+        n_ports = len(port_ids)
+        history = self.feature_store.lookup(np.repeat(port_ids, hours_ahead).tolist(), np.tile(epochs, n_ports))
+        X = np.empty((n_ports * hours_ahead, len(self.feature_columns)), dtype=np.float64)
+        for j, column in enumerate(self.feature_columns):
+            if column in time_features:
+                X[:, j] = np.tile(time_features[column], n_ports)
+            else:
+                values = [current_conditions.get(port_id, {}).get(column, DEFAULT_PORT_CONDITIONS.get(column, 0.0))
+                          for port_id in port_ids]
+                X[:, j] = np.repeat(np.asarray(values, dtype=np.float64), hours_ahead)
+                if column == 'historical_avg_congestion':
+                    X[:, j] = np.where(np.isnan(history), X[:, j], history)
+        
+        # Same transform as ``scaler.transform``, without its per-call validation
+        X_scaled = (X - self.scaler.mean_) / self.scaler.scale_
+        scores = np.clip(self.model.predict(X_scaled), 0.0, 1.0)
+        confidence = self._calculate_confidence(scores)
+        
+        scores = scores.reshape(n_ports, hours_ahead).tolist()
+        confidence = np.broadcast_to(confidence, (n_ports * hours_ahead,)).reshape(n_ports, hours_ahead).tolist()
+        return {
+            port_id: [
+                {'timestamp': timestamp, 'predicted_congestion': score, 'confidence': conf}
+                for timestamp, score, conf in zip(timestamps, scores[i], confidence[i])
+            ]
+            for i, port_id in enumerate(port_ids)
+        }
     
-    def _calculate_confidence(self, prediction: float) -> float:
-        """Calculate confidence score for prediction"""
+    def _calculate_confidence(self, prediction):
+        """Calculate confidence score for a prediction (or an array of predictions)"""
         # Simple confidence calculation based on prediction value
         # More sophisticated methods could use prediction intervals
         if hasattr(self.model, 'predict_proba'):
             return 0.8  # Placeholder for probabilistic models
         else:
             # For regression models, use distance from extremes
-            return min(prediction, 1 - prediction) * 2
+            return np.minimum(prediction, 1 - prediction) * 2
     
     def get_feature_importance(self) -> Dict[str, float]:
         """Get feature importance scores"""
@@ -186,6 +341,10 @@ class CongestionPredictor:
         
         joblib.dump(model_data, filepath)
         logger.info(f"Model saved to {filepath}")
+        
+        # Keep the features the model was trained on next to it
+        if self.feature_store.path is not None:
+            self.feature_store.save()
     
     def load_model(self, filepath: str):
         """Load a trained model from file"""
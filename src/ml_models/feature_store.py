@@ -0,0 +1,212 @@
+"""
+Incrementally updated per-port congestion aggregates for model features
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import structlog
+
+from ..core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+HOURS_PER_WEEK = 168
+
+
+def hour_of_week(epochs) -> np.ndarray:
+    """Hour of the week (Monday 00:00 UTC = 0) of epoch seconds"""
+    seconds = np.floor(np.asarray(epochs, dtype=np.float64)).astype(np.int64)
+    return ((seconds // 86400 + 3) % 7) * 24 + (seconds // 3600) % 24  # 1970-01-01 was a Thursday
+
+
+class CongestionFeatureStore:
+    """Rolling average congestion per port and hour of the week"""
+
+    def __init__(self, path: Optional[str] = None, window: int = 8):
+        self.path = Path(path) if path else None
+        self.window = window
+        self._ports: Dict[str, int] = {}
+        self.values = np.full((0, HOURS_PER_WEEK, window), np.nan)
+        self.head = np.zeros((0, HOURS_PER_WEEK), dtype=np.int64)
+        self.count = np.zeros((0, HOURS_PER_WEEK), dtype=np.int64)
+        self.mean = np.full((0, HOURS_PER_WEEK), np.nan)
+        self.observation_count = 0
+
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._ports)
+
+    def ports(self):
+        return list(self._ports)
+
+    def _grow(self, rows: int):
+        extra = rows - len(self.mean)
+        self.values = np.concatenate([self.values, np.full((extra, HOURS_PER_WEEK, self.window), np.nan)])
+        self.head = np.concatenate([self.head, np.zeros((extra, HOURS_PER_WEEK), dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros((extra, HOURS_PER_WEEK), dtype=np.int64)])
+        self.mean = np.concatenate([self.mean, np.full((extra, HOURS_PER_WEEK), np.nan)])
+
+    def _rows(self, port_ids: Sequence[str], create: bool = False) -> np.ndarray:
+        """Row of each port (-1 for unknown ports unless ``create``)"""
+        index = self._ports
+        if create:
+            for port_id in port_ids:
+                if port_id not in index:
+                    index[port_id] = len(index)
+            if len(index) > len(self.mean):
+                self._grow(len(index))
+        return np.fromiter((index.get(port_id, -1) for port_id in port_ids), dtype=np.int64, count=len(port_ids))
+
+    def update(self, port_id: str, timestamp: float, congestion_score: float):
+        """Add one observation (epoch seconds)"""
+        self.update_many([port_id], [timestamp], [congestion_score])
+
+    def update_many(self, port_ids: Sequence[str], epochs, congestion_scores):
+        """Add observations in bulk; missing scores are ignored.
+
+        Observations of the same slot enter its ring in timestamp order.
+        """
+        epochs = np.asarray(epochs, dtype=np.float64)
+        scores = np.asarray(congestion_scores, dtype=np.float64)
+        valid = ~np.isnan(scores) & ~np.isnan(epochs)
+        if not valid.any():
+            return
+        port_ids = [port_id for port_id, ok in zip(port_ids, valid.tolist()) if ok]
+        rows = self._rows(port_ids, create=True)
+        epochs, scores = epochs[valid], scores[valid]
+        slots = hour_of_week(epochs)
+
+        order = np.lexsort((epochs, slots, rows))
+        rows, slots, scores = rows[order], slots[order], scores[order]
+
+        # Rank of each observation within its slot; only the newest ``window`` are kept
+        key = rows * HOURS_PER_WEEK + slots
+        starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+        sizes = np.diff(np.append(starts, len(key)))
+        rank = np.arange(len(key)) - np.repeat(starts, sizes)
+        keep = rank >= np.repeat(sizes, sizes) - self.window
+        position = (self.head[rows, slots] + rank) % self.window
+        self.values[rows[keep], slots[keep], position[keep]] = scores[keep]
+
+        touched_rows, touched_slots = rows[starts], slots[starts]
+        self.head[touched_rows, touched_slots] = (self.head[touched_rows, touched_slots] + sizes) % self.window
+        self.count[touched_rows, touched_slots] = np.minimum(self.count[touched_rows, touched_slots] + sizes,
+                                                             self.window)
+        self.mean[touched_rows, touched_slots] = np.nanmean(self.values[touched_rows, touched_slots], axis=1)
+        self.observation_count += len(key)
+
+    def lookup_before(self, port_ids: Sequence[str], epochs, congestion_scores) -> np.ndarray:
+        """Rolling average each observation would have seen just before it was added.
+
+        Point-in-time features for training on observations not yet in the
+        store: for every row this is ``lookup`` after ``update_many`` had
+        been given only the rows of the same slot with an earlier timestamp
+        (ties in input order).
+        The store itself is not changed.
+        """
+        epochs = np.asarray(epochs, dtype=np.float64)
+        scores = np.asarray(congestion_scores, dtype=np.float64)
+        out = np.full(len(epochs), np.nan)
+        dated = np.flatnonzero(~np.isnan(epochs))
+        if not len(dated):
+            return out
+        port_ids = [port_ids[i] for i in dated.tolist()]
+        _, ports = np.unique(np.asarray(port_ids, dtype=str), return_inverse=True)
+        rows = self._rows(port_ids)
+        epochs, scores = epochs[dated], scores[dated]
+        slots = hour_of_week(epochs)
+
+        order = np.lexsort((epochs, slots, ports))
+        ports, rows, slots, scores = ports[order], rows[order], slots[order], scores[order]
+        key = ports * HOURS_PER_WEEK + slots
+        starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+        sizes = np.diff(np.append(starts, len(key)))
+        group = np.repeat(np.arange(len(starts)), sizes)
+
+        # Stored ring of each slot, oldest first (unfilled places are NaN)
+        history = np.full((len(starts), self.window), np.nan)
+        known = rows[starts] >= 0
+        ring_rows, ring_slots = rows[starts][known], slots[starts][known]
+        places = (self.head[ring_rows, ring_slots][:, None] + np.arange(self.window)) % self.window
+        history[known] = self.values[ring_rows[:, None], ring_slots[:, None], places]
+        # Sum and count of the newest ``window - k`` stored values, for k = 0..window
+        tail_sum = np.cumsum(np.nan_to_num(history)[:, ::-1], axis=1)[:, ::-1]
+        tail_count = np.cumsum(~np.isnan(history)[:, ::-1], axis=1)[:, ::-1]
+        tail_sum = np.column_stack([tail_sum, np.zeros(len(starts))])
+        tail_count = np.column_stack([tail_count, np.zeros(len(starts), dtype=np.int64)])
+
+        # Earlier scored observations of the same slot push the oldest stored ones out
+        scored = ~np.isnan(scores)
+        seen = np.concatenate(([0], np.cumsum(scored)))[:-1]
+        total = np.concatenate(([0.0], np.cumsum(scores[scored])))
+        earlier = np.minimum(seen - seen[starts[group]], self.window)
+        new_sum = total[seen] - total[seen - earlier]
+
+        count = tail_count[group, earlier] + earlier
+        with np.errstate(invalid='ignore', divide='ignore'):
+            prior = (tail_sum[group, earlier] + new_sum) / count
+        out[dated[order]] = np.where(count > 0, prior, np.nan)
+        return out
+
+    def lookup(self, port_ids: Sequence[str], epochs) -> np.ndarray:
+        """Rolling average for each (port, timestamp); NaN where the slot has no history"""
+        rows = self._rows(port_ids)
+        slots = hour_of_week(epochs)
+        out = np.full(len(rows), np.nan)
+        known = rows >= 0
+        out[known] = self.mean[rows[known], slots[known]]
+        return out
+
+    def get(self, port_id: str, timestamp: float) -> Optional[float]:
+        value = self.lookup([port_id], [timestamp])[0]
+        return None if np.isnan(value) else float(value)
+
+    def save(self, path: Optional[str] = None):
+        """Write the store atomically to ``path`` (default: the path it was created with)"""
+        path = Path(path) if path else self.path
+        if path is None:
+            raise ValueError("No path to save the feature store to")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + '.tmp')
+        with open(temporary, 'wb') as handle:
+            np.savez(handle, ports=np.array(list(self._ports), dtype=str), values=self.values,
+                     head=self.head, count=self.count, observation_count=self.observation_count)
+        os.replace(temporary, path)
+        logger.info(f"Feature store saved to {path}")
+
+    def load(self, path: Optional[str] = None):
+        """Replace the contents with a saved store"""
+        path = Path(path) if path else self.path
+        with np.load(path) as data:
+            self._ports = {str(port_id): row for row, port_id in enumerate(data['ports'].tolist())}
+            self.values = data['values']
+            self.head = data['head']
+            self.count = data['count']
+            self.observation_count = int(data['observation_count'])
+        self.window = self.values.shape[2]
+        self.mean = np.full(self.count.shape, np.nan)
+        filled = self.count > 0
+        self.mean[filled] = np.nanmean(self.values[filled], axis=1)
+        logger.info(f"Feature store loaded from {path}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get feature store statistics"""
+        return {
+            'ports': len(self._ports),
+            'window': self.window,
+            'filled_slots': int(np.count_nonzero(self.count)),
+            'observation_count': self.observation_count,
+            'path': str(self.path) if self.path else None
+        }
+
+
+@lru_cache()
+def get_congestion_feature_store() -> CongestionFeatureStore:
+    """Get the feature store persisted under ``settings.ml_model_path``"""
+    return CongestionFeatureStore(os.path.join(settings.ml_model_path, 'congestion_features.npz'))
@@ -0,0 +1,23 @@
+"""
+Vectorized decoding of provider responses
+"""
+
+import numpy as np
+
+from src.data_ingestion.bulk_parser import parse_aishub_batch
+
+
+def test_aishub_heading_not_available_is_missing():
+    records = [
+        {'MMSI': 244660000, 'LATITUDE': 51.9, 'LONGITUDE': 4.1, 'SOG': 12.3, 'COG': 87.0, 'HEADING': 511,
+         'TIMESTAMP': '2024-01-01T00:00:00Z', 'DESTINATION': 'ROTTERDAM ', 'ETA': '2024-01-02T06:00:00Z'},
+        {'MMSI': 244660001, 'LATITUDE': 52.0, 'LONGITUDE': 4.2, 'SOG': 8.0, 'COG': 90.0, 'HEADING': 92,
+         'TIMESTAMP': '2024-01-01T00:00:10Z'},
+    ]
+    batch, recovered = parse_aishub_batch(records)
+
+    assert len(batch) == 2 and recovered == []
+    assert np.isnan(batch.true_heading[0])
+    assert batch.true_heading[1] == 92
+    assert batch.destination.tolist() == ['ROTTERDAM', None]
+    assert batch.eta[0] == 1704175200.0 and np.isnan(batch.eta[1])
@@ -0,0 +1,72 @@
+"""
+Cross-source conflation of position reports
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from src.data_ingestion.conflation import PositionConflator
+from src.data_ingestion.position_batch import PositionBatch
+from src.models.vessel import VesselPositionCreate
+
+BUCKET = 30.0
+
+
+def report(mmsi, bucket, speed=None, source='aishub'):
+    timestamp = datetime.utcfromtimestamp(bucket * BUCKET)
+    return VesselPositionCreate(mmsi=mmsi, latitude=0.0, longitude=0.0, speed_over_ground=speed,
+                                timestamp=timestamp, message_timestamp=timestamp, data_source=source)
+
+
+def test_duplicates_are_dropped_and_better_reports_pass():
+    conflator = PositionConflator(bucket_seconds=BUCKET)
+    assert conflator.accept(report(1, 100))
+    assert not conflator.accept(report(1, 100, source='datalastic'))
+    # More fields present: re-emitted as an upgrade
+    assert conflator.accept(report(1, 100, speed=12.0))
+    assert not conflator.accept(report(1, 100, speed=11.0))
+    assert conflator.accept(report(1, 101))
+
+    stats = conflator.get_stats()
+    assert (stats['accepted_count'], stats['upgraded_count'], stats['dropped_count']) == (2, 1, 2)
+
+
+def test_accept_batch_matches_single_reports():
+    n = 6
+    batch = PositionBatch(mmsi=np.array([1, 1, 2, 1, 2, 2]), latitude=np.zeros(n), longitude=np.zeros(n),
+                          speed_over_ground=np.array([np.nan, np.nan, 5.0, 6.0, np.nan, 5.0]),
+                          timestamp=np.array([0.0, 10.0, 20.0, 25.0, 40.0, 45.0]) + 100 * BUCKET,
+                          data_source='aishub')
+    mask = PositionConflator(bucket_seconds=BUCKET).accept_batch(batch)
+
+    single = PositionConflator(bucket_seconds=BUCKET)
+    expected = [single.accept(report(int(mmsi), int(ts // BUCKET), None if np.isnan(speed) else speed))
+                for mmsi, ts, speed in zip(batch.mmsi, batch.timestamp, batch.speed_over_ground)]
+    assert mask.tolist() == expected == [True, False, True, True, True, True]
+
+
+def test_out_of_order_keys_are_evicted_with_the_window():
+    conflator = PositionConflator(bucket_seconds=BUCKET, window_seconds=10 * BUCKET)
+    conflator.accept(report(1, 100))
+    conflator.accept(report(2, 109))
+    # Late report inserted behind a newer key
+    conflator.accept(report(3, 100))
+    assert len(conflator) == 3
+
+    conflator.accept(report(4, 112))
+    assert len(conflator) == 2
+    assert conflator.get_stats()['evicted_count'] == 2
+    # Older than the window: accepted without being tracked
+    assert conflator.accept(report(3, 100))
+    assert len(conflator) == 2
+
+
+def test_max_entries_bounds_the_tracked_keys():
+    conflator = PositionConflator(bucket_seconds=BUCKET, max_entries=3)
+    for mmsi in range(5):
+        conflator.accept(report(mmsi, 100))
+    assert len(conflator) == 3
+    # The oldest keys were evicted, so their duplicates pass again
+    assert conflator.accept(report(0, 100))
+    assert not conflator.accept(report(4, 100))
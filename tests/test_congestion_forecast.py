@@ -0,0 +1,70 @@
+"""
+Batched port congestion forecasts against per-row predictions
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+congestion_predictor = pytest.importorskip("src.ml_models.congestion_predictor")
+from src.ml_models.feature_store import CongestionFeatureStore  # noqa: E402
+
+CongestionPredictor = congestion_predictor.CongestionPredictor
+DEFAULT_PORT_CONDITIONS = congestion_predictor.DEFAULT_PORT_CONDITIONS
+
+START = datetime(2024, 3, 1, 6)
+PORTS = ['SINGAPORE', 'ROTTERDAM', 'BUSAN']
+
+
+def training_data(n=400):
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(n):
+        waiting = float(rng.integers(0, 40))
+        rows.append({
+            'port_id': PORTS[i % len(PORTS)],
+            'timestamp': START - timedelta(hours=int(rng.integers(1, 24 * 60))),
+            'vessels_waiting': waiting,
+            'vessels_at_berth': float(rng.integers(0, 30)),
+            'berth_utilization': float(rng.uniform(0.3, 1.0)),
+            'weather_impact': float(rng.uniform(0, 0.5)),
+            'congestion_score': min(waiting / 40 + rng.normal(0, 0.05), 1.0),
+        })
+    return rows
+
+
+@pytest.fixture
+def predictor():
+    predictor = CongestionPredictor(model_type='gradient_boosting', feature_store=CongestionFeatureStore())
+    predictor.train(training_data())
+    return predictor
+
+
+def test_forecast_ports_matches_per_row_predict(predictor):
+    conditions = {'SINGAPORE': {'vessels_waiting': 30.0, 'berth_utilization': 0.95},
+                  'BUSAN': {'weather_impact': 0.4}}
+    forecasts = predictor.forecast_ports(PORTS, hours_ahead=36, current_conditions=conditions, start_time=START)
+
+    rows = [dict(DEFAULT_PORT_CONDITIONS, **conditions.get(port, {}), port_id=port,
+                 timestamp=START + timedelta(hours=hour))
+            for port in PORTS for hour in range(36)]
+    expected = np.array(predictor.predict(rows)).reshape(len(PORTS), 36)
+
+    for i, port in enumerate(PORTS):
+        assert [point['timestamp'] for point in forecasts[port]] == [START + timedelta(hours=h) for h in range(36)]
+        assert np.allclose([point['predicted_congestion'] for point in forecasts[port]], expected[i])
+        assert all(0.0 <= point['confidence'] <= 1.0 for point in forecasts[port])
+
+
+def test_single_port_forecast_and_empty_requests(predictor):
+    single = predictor.predict_future_congestion('ROTTERDAM', hours_ahead=5)
+    assert len(single) == 5
+    assert predictor.forecast_ports([], hours_ahead=5) == {}
+    assert predictor.forecast_ports(['BUSAN'], hours_ahead=0) == {'BUSAN': []}
+
+
+def test_forecasts_require_a_trained_model():
+    with pytest.raises(ValueError):
+        CongestionPredictor(feature_store=CongestionFeatureStore()).forecast_ports(PORTS)
@@ -0,0 +1,85 @@
+"""
+Incremental per-port hour-of-week congestion feature store
+"""
+
+import copy
+
+import numpy as np
+import pytest
+
+feature_store = pytest.importorskip("src.ml_models.feature_store")
+CongestionFeatureStore = feature_store.CongestionFeatureStore
+hour_of_week = feature_store.hour_of_week
+
+WEEK = 7 * 86400.0
+MONDAY = 1704067200.0  # 2024-01-01 00:00 UTC
+
+
+def observations(seed, n=600):
+    """Scores for three ports over a few weeks, with repeated slots, tied timestamps and gaps"""
+    rng = np.random.default_rng(seed)
+    ports = rng.choice(['SINGAPORE', 'ROTTERDAM', 'BUSAN'], n).tolist()
+    epochs = MONDAY + rng.integers(0, 4, n) * WEEK + rng.integers(0, 3, n) * 3600.0 + rng.integers(0, 2, n) * 60
+    scores = rng.uniform(0, 1, n)
+    scores[rng.uniform(size=n) < 0.1] = np.nan
+    epochs[rng.uniform(size=n) < 0.02] = np.nan
+    return ports, epochs, scores
+
+
+def test_hour_of_week_starts_on_monday():
+    assert hour_of_week([MONDAY, MONDAY + 3599, MONDAY + 3600, MONDAY + WEEK - 1]).tolist() == [0, 0, 1, 167]
+
+
+def test_update_many_matches_single_updates():
+    ports, epochs, scores = observations(0)
+    bulk = CongestionFeatureStore(window=4)
+    bulk.update_many(ports, epochs, scores)
+
+    single = CongestionFeatureStore(window=4)
+    for i in np.argsort(epochs, kind='stable'):
+        if not np.isnan(epochs[i]):
+            single.update(ports[i], epochs[i], scores[i])
+
+    assert bulk.observation_count == single.observation_count
+    probe = MONDAY + np.arange(168) * 3600.0
+    for port in ('SINGAPORE', 'ROTTERDAM', 'BUSAN', 'UNKNOWN'):
+        assert np.allclose(bulk.lookup([port] * 168, probe), single.lookup([port] * 168, probe), equal_nan=True)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_lookup_before_matches_sequential_updates(seed):
+    store = CongestionFeatureStore(window=4)
+    # History already in the store before the new observations
+    store.update_many(*observations(seed + 100, n=200))
+    ports, epochs, scores = observations(seed)
+    before, untouched = copy.deepcopy(store), copy.deepcopy(store)
+
+    features = store.lookup_before(ports, epochs, scores)
+
+    # Reference: look each observation up, then add it, in timestamp order (ties in input order)
+    expected = np.full(len(epochs), np.nan)
+    for i in np.argsort(epochs, kind='stable'):
+        if np.isnan(epochs[i]):
+            continue
+        expected[i] = before.lookup([ports[i]], [epochs[i]])[0]
+        before.update(ports[i], epochs[i], scores[i])
+    assert np.allclose(features, expected, equal_nan=True)
+
+    # The store itself is unchanged
+    assert store.observation_count == untouched.observation_count
+    assert np.array_equal(store.values, untouched.values, equal_nan=True)
+    assert np.array_equal(store.head, untouched.head)
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / 'features.npz'
+    store = CongestionFeatureStore(path=str(path), window=4)
+    store.update_many(*observations(5))
+    store.save()
+
+    loaded = CongestionFeatureStore(path=str(path))
+    assert loaded.window == 4 and loaded.ports() == store.ports()
+    assert loaded.get_stats()['filled_slots'] == store.get_stats()['filled_slots']
+    probe = MONDAY + np.arange(168) * 3600.0
+    assert np.allclose(loaded.lookup(['BUSAN'] * 168, probe), store.lookup(['BUSAN'] * 168, probe), equal_nan=True)
+    assert loaded.get('UNKNOWN', MONDAY) is None
@@ -0,0 +1,58 @@
+"""
+Shared pooled aiohttp session against a local test server
+"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.data_ingestion.http_pool import SharedHTTPPool
+
+
+async def start_server():
+    app = web.Application()
+    app.router.add_get('/positions', lambda request: web.json_response({'ok': True}))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}/positions'
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_pooled_connections():
+    runner, url = await start_server()
+    pool = SharedHTTPPool(limit_per_host=2)
+    try:
+        for _ in range(5):
+            async with pool.session.get(url) as response:
+                assert await response.json() == {'ok': True}
+        assert pool.session is pool.session
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+    stats = pool.get_stats()
+    assert stats['request_count'] == 5
+    assert (stats['connections_created'], stats['connections_reused']) == (1, 4)
+    assert stats['pool_hit_rate'] == pytest.approx(0.8)
+    assert not stats['is_open']
+
+
+def test_session_is_recreated_for_a_new_event_loop():
+    pool = SharedHTTPPool()
+
+    async def first_loop():
+        return pool.session, pool.session
+
+    async def second_loop(stale):
+        current = pool.session
+        await stale.close()
+        await pool.close()
+        return current
+
+    first, again = asyncio.run(first_loop())
+    assert again is first
+    assert asyncio.run(second_loop(first)) is not first
@@ -0,0 +1,82 @@
+"""
+Micro-batched Kafka publishing against the in-process stub broker
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from src.data_ingestion.kafka_publisher import BatchingKafkaPublisher, StubKafkaProducer, serialize_record
+
+
+class FailingProducer(StubKafkaProducer):
+    def send(self, topic, value, key=None):
+        raise ConnectionError("broker unavailable")
+
+
+def record(i):
+    return {'mmsi': 200000000 + i, 'latitude': 1.0, 'longitude': 2.0, 'timestamp': datetime(2024, 1, 1)}
+
+
+def test_serialize_record_encodes_datetimes():
+    assert json.loads(serialize_record(record(0))) == {
+        'mmsi': 200000000, 'latitude': 1.0, 'longitude': 2.0, 'timestamp': '2024-01-01T00:00:00'
+    }
+
+
+@pytest.mark.asyncio
+async def test_records_are_sent_in_batches_with_few_flushes():
+    producer = StubKafkaProducer(flush_latency=0, keep_messages=True)
+    publisher = BatchingKafkaPublisher(producer, topic='ais', batch_size=100, linger_ms=20)
+
+    for i in range(1000):
+        await publisher.publish(record(i))
+    await publisher.close()
+
+    assert [key for _, key, _ in producer.messages] == [str(200000000 + i).encode() for i in range(1000)]
+    assert {topic for topic, _, _ in producer.messages} == {'ais'}
+    stats = publisher.get_stats()
+    assert stats['published_count'] == 1000
+    assert stats['batch_count'] == 10
+    # Full batches are not flushed; close flushes what is left
+    assert producer.flush_count == stats['flush_count'] == 1
+
+
+@pytest.mark.asyncio
+async def test_linger_deadline_flushes_a_partial_batch():
+    producer = StubKafkaProducer(flush_latency=0)
+    publisher = BatchingKafkaPublisher(producer, batch_size=100, linger_ms=10)
+
+    await publisher.publish(record(0))
+    await asyncio.sleep(0.1)
+
+    assert producer.message_count == 1
+    assert producer.flush_count == 1
+    await publisher.close()
+    assert producer.flush_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_go_to_the_fallback():
+    fallback = StubKafkaProducer(flush_latency=0, keep_messages=True)
+    publisher = BatchingKafkaPublisher(FailingProducer(flush_latency=0), batch_size=10, linger_ms=5,
+                                       fallback=fallback)
+
+    for i in range(25):
+        await publisher.publish(record(i))
+    await publisher.close()
+
+    assert len(fallback.messages) == 25
+    stats = publisher.get_stats()
+    assert (stats['fallback_count'], stats['error_count'], stats['published_count']) == (25, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_without_fallback_are_counted():
+    publisher = BatchingKafkaPublisher(FailingProducer(flush_latency=0), batch_size=10, linger_ms=5)
+    for i in range(5):
+        await publisher.publish(record(i))
+    await publisher.close()
+    assert publisher.get_stats()['error_count'] == 5
@@ -0,0 +1,70 @@
+"""
+NMEA collector in file mode, replaying a small AIVDM capture
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.data_ingestion.nmea_collector import NMEACollector
+from src.data_ingestion.position_store import PositionStore, nav_status_code
+from src.data_ingestion.vessel_registry import VesselRegistry
+from src.models.vessel import NavigationStatus, VesselType
+
+CAPTURE = Path(__file__).parent / 'fixtures' / 'aivdm_sample.nmea'
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    monkeypatch.setattr(settings, 'spool_enabled', False)
+    return NMEACollector(str(CAPTURE), position_store=PositionStore(), vessel_registry=VesselRegistry())
+
+
+@pytest.mark.asyncio
+async def test_file_replay_decodes_positions(collector):
+    await collector.start_collection()
+
+    class_a = collector.position_store.get(371798000)
+    assert class_a['timestamp'] == 1700000000  # tag block c: in seconds
+    assert class_a['latitude'] == pytest.approx(48.381633, abs=1e-6)
+    assert class_a['longitude'] == pytest.approx(-123.395383, abs=1e-6)
+    assert class_a['speed_over_ground'] == pytest.approx(12.3, abs=1e-4)
+    assert class_a['course_over_ground'] == pytest.approx(224.0)
+    assert class_a['true_heading'] == 215
+    assert class_a['navigation_status'] == nav_status_code(NavigationStatus.UNDER_WAY_USING_ENGINE)
+    assert class_a['data_source'] == 'nmea'
+
+    class_b = collector.position_store.get(367430530)
+    assert class_b['timestamp'] == 1700000060  # tag block c: in milliseconds
+    assert class_b['latitude'] == pytest.approx(37.785035, abs=1e-6)
+    assert class_b['longitude'] == pytest.approx(-122.26732, abs=1e-6)
+    assert class_b['speed_over_ground'] == 0
+    assert np.isnan(class_b['true_heading'])  # 511, not available
+    assert class_b['navigation_status'] == -1  # class B reports carry no status
+
+    # The repeated class A sentence has a bad checksum and is dropped
+    assert len(collector.position_store.recent(371798000)['timestamp']) == 1
+    stats = collector.get_stats()
+    assert stats['invalid_sentences'] == 1
+    assert stats['sentence_count'] == 4
+    assert stats['request_count'] == 2
+
+
+@pytest.mark.asyncio
+async def test_file_replay_registers_multipart_static_data(collector):
+    await collector.start_collection()
+
+    vessel = collector.vessel_registry.get(351759000)
+    assert vessel['vessel_name'] == 'EVER DIADEM'
+    assert vessel['call_sign'] == '3FOF8'
+    assert vessel['imo'] == '9134270'
+    assert vessel['vessel_type'] == VesselType.CARGO
+    assert vessel['vessel_type_code'] == 70
+    assert vessel['length'] == 295
+    assert vessel['width'] == 32
+    assert vessel['draft'] == pytest.approx(12.2)
+    assert vessel['destination'] == 'NEW YORK'
+    assert collector.static_count == 1
+    assert collector.position_store.get(351759000) is None
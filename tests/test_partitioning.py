@@ -0,0 +1,67 @@
+"""
+Scheduled maintenance of the partitioned position history
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.core.config import settings
+from src.data_ingestion.ais_collectors import AISCollectorManager
+from src.data_ingestion.partitioning import PositionPartitionManager
+from src.data_ingestion.position_sink import PositionPersistenceSink, synthetic_position_batch
+
+
+@pytest.mark.asyncio
+async def test_manager_schedules_sealing_and_retention(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'spool_enabled', False)
+    partitions = PositionPartitionManager(database_url=f"sqlite:///{tmp_path / 'history.db'}",
+                                          retention_days=2)
+    now = time.time()
+    expired = partitions.partition_name(now - 4 * 86400)
+    finished = partitions.partition_name(now - 86400)
+    live = partitions.partition_name(now)
+    for name in (expired, finished, live):
+        partitions.ensure_partition(name)
+
+    sink = PositionPersistenceSink(partitions=partitions)
+    manager = AISCollectorManager(position_sink=sink)
+    await manager.start_all()
+    try:
+        for _ in range(200):
+            if expired not in partitions.partitions() and finished in partitions._sealed:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await manager.stop_all()
+
+    assert partitions.partitions() == [finished, live]
+    assert partitions._sealed == {finished}
+    assert partitions._maintenance_task is None
+
+
+def test_instances_sharing_a_database_see_each_others_partitions(tmp_path):
+    url = f"sqlite:///{tmp_path / 'history.db'}"
+    writer = PositionPartitionManager(database_url=url, retention_days=2)
+    reader = PositionPartitionManager(database_url=url, retention_days=2)
+
+    # Created by the writer after the reader started
+    sink = PositionPersistenceSink(partitions=writer, create_tables=True)
+    batch = synthetic_position_batch(200, vessel_count=10)
+    asyncio.run(sink.update_batch(batch))
+    sink.flush()
+    sink.close()
+    mmsi = int(batch.mmsi[0])
+    assert len(reader.query(mmsi)['timestamp']) == int((batch.mmsi == mmsi).sum())
+
+    # Dropped by the writer's maintenance while the reader still knows it
+    now = time.time()
+    expired = writer.partition_name(now - 4 * 86400)
+    writer.ensure_partition(expired)
+    reader.refresh()
+    assert expired in reader.partitions()
+    writer.maintain()
+    assert reader.query(mmsi, start=now - 5 * 86400) is not None
+    assert expired not in reader.partitions()
+    assert reader.maintain()['dropped'] == []
@@ -0,0 +1,91 @@
+"""
+Day-partitioned memory-mapped position archive
+"""
+
+import numpy as np
+import pytest
+
+from src.data_ingestion.position_archive import PositionArchive
+from src.data_ingestion.position_batch import PositionBatch
+
+DAY = 86400.0
+START = 1700006400.0  # 2023-11-15 00:00 UTC
+
+
+def feed(seed=0, vessels=40, reports=300, days=3):
+    """Vessels reporting at random times over ``days`` days, split across two sources"""
+    rng = np.random.default_rng(seed)
+    n = vessels * reports
+    mmsi = 200000000 + rng.integers(0, vessels, n)
+    timestamp = START + rng.uniform(0, days * DAY, n)
+    columns = dict(mmsi=mmsi, latitude=rng.uniform(-60, 60, n), longitude=rng.uniform(-180, 180, n),
+                   timestamp=timestamp, speed_over_ground=rng.uniform(0, 20, n),
+                   navigation_status=rng.integers(-1, 8, n))
+    half = n // 2
+    return [PositionBatch(data_source=source, **{name: values[rows] for name, values in columns.items()})
+            for source, rows in (('aishub', slice(0, half)), ('datalastic', slice(half, n)))]
+
+
+def expected_track(batches, mmsi, start, end):
+    mmsis = np.concatenate([batch.mmsi for batch in batches])
+    timestamps = np.concatenate([batch.timestamp for batch in batches])
+    latitudes = np.concatenate([batch.latitude for batch in batches])
+    rows = np.flatnonzero((mmsis == mmsi) & (timestamps >= start) & (timestamps <= end))
+    rows = rows[np.argsort(timestamps[rows], kind='stable')]
+    return timestamps[rows], latitudes[rows]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    # A small stride puts many index blocks inside every vessel's rows
+    archive = PositionArchive(str(tmp_path), index_stride=64)
+    batches = feed()
+    assert archive.write(batches) == ['20231115', '20231116', '20231117']
+    return archive, batches
+
+
+@pytest.mark.parametrize('start, end', [
+    (START, START + 3 * DAY),                       # everything
+    (START + 0.5 * DAY, START + 0.75 * DAY),        # inside one day
+    (START + 0.9 * DAY, START + 2.1 * DAY),         # across both day boundaries
+    (START + DAY, START + DAY),                     # exactly on a boundary
+    (START - DAY, START - 1),                       # before the archive
+])
+def test_track_matches_a_full_scan(archive, start, end):
+    archive, batches = archive
+    for mmsi in (200000000, 200000017, 200000039, 200000040):
+        timestamps, latitudes = expected_track(batches, mmsi, start, end)
+        track = archive.track(mmsi, start, end)
+        if track is None:
+            assert len(timestamps) == 0
+            continue
+        assert np.array_equal(track['timestamp'], timestamps)
+        assert np.array_equal(track['latitude'], latitudes)
+
+
+def test_row_ranges_at_every_index_stride(archive):
+    archive, _ = archive
+    day = archive.open_day('20231116')
+    mmsis, timestamps = np.asarray(day.columns['mmsi']), np.asarray(day.columns['timestamp'])
+    # Keys exactly at block starts, and just before and after them
+    for row in range(0, len(day), day.index_stride):
+        mmsi, timestamp = int(mmsis[row]), float(timestamps[row])
+        for probe in (np.nextafter(timestamp, -np.inf), timestamp, np.nextafter(timestamp, np.inf)):
+            rows = day.row_range(mmsi, probe, probe + 3600)
+            expected = np.flatnonzero((mmsis == mmsi) & (timestamps >= probe) & (timestamps <= probe + 3600))
+            assert (rows.start, rows.stop) == ((expected[0], expected[-1] + 1) if len(expected)
+                                               else (rows.start, rows.start))
+
+
+def test_days_are_immutable_and_keep_their_sources(archive):
+    archive, batches = archive
+    with pytest.raises(FileExistsError):
+        archive.write(batches)
+
+    day = archive.open_day('20231115')
+    assert sorted(day.sources) == ['aishub', 'datalastic']
+    rows = sum(len(batch) for batch in day.batches())
+    assert rows == len(day)
+    assert {batch.data_source for batch in day.batches()} == {'aishub', 'datalastic'}
+    assert [day.day for day in archive.iter_days(START + 1.5 * DAY)] == ['20231116', '20231117']
+    assert archive.get_stats()['day_count'] == 3
@@ -0,0 +1,131 @@
+"""
+Redis position cache against the in-memory Redis stand-in
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.data_ingestion.ais_collectors import AISCollectorManager
+from src.data_ingestion.position_batch import PositionBatch
+from src.data_ingestion.position_cache import InMemoryRedis, RedisPositionCache
+from src.models.vessel import VesselPositionCreate
+
+
+def make_batch(mmsi, latitude, longitude, timestamp, source='aishub'):
+    n = len(mmsi)
+    return PositionBatch(
+        mmsi=np.array(mmsi, dtype=np.int64),
+        latitude=np.array(latitude, dtype=np.float64),
+        longitude=np.array(longitude, dtype=np.float64),
+        speed_over_ground=np.full(n, 10.0),
+        course_over_ground=np.full(n, 90.0),
+        true_heading=np.full(n, 90.0),
+        navigation_status=np.zeros(n, dtype=np.int8),
+        timestamp=np.array(timestamp, dtype=np.float64),
+        data_source=source,
+    )
+
+
+@pytest.fixture
+def cache():
+    return RedisPositionCache(client=InMemoryRedis(), ttl_seconds=3600)
+
+
+@pytest.mark.asyncio
+async def test_update_batch_keeps_newest_report_per_vessel(cache):
+    now = time.time()
+    await cache.update_batch(make_batch([1, 1, 2], [10.0, 11.0, 20.0], [30.0, 31.0, 40.0],
+                                        [now - 20, now - 10, now - 5]))
+
+    latest = await cache.get(1)
+    assert (latest['latitude'], latest['longitude']) == (11.0, 31.0)
+    assert latest['timestamp'] == pytest.approx(now - 10)
+    assert latest['data_source'] == 'aishub'
+    assert await cache.get(3) is None
+
+    snapshot = await cache.snapshot()
+    assert snapshot['mmsi'].tolist() == [2, 1]
+    assert cache.source_name(int(snapshot['data_source'][0])) == 'aishub'
+    assert (await cache.snapshot(1))['mmsi'].tolist() == [2]
+    assert len((await cache.snapshot(0))['mmsi']) == 0
+
+
+@pytest.mark.asyncio
+async def test_older_report_does_not_overwrite_newer(cache):
+    now = time.time()
+    await cache.update_batch(make_batch([1], [10.0], [30.0], [now]))
+    await cache.update_batch(make_batch([1], [50.0], [60.0], [now - 60], source='late'))
+    late = datetime.fromtimestamp(now - 30, tz=timezone.utc)
+    await cache.update(VesselPositionCreate(mmsi=1, latitude=51.0, longitude=61.0, data_source='late',
+                                            timestamp=late, message_timestamp=late))
+
+    latest = await cache.get(1)
+    assert (latest['latitude'], latest['longitude'], latest['data_source']) == (10.0, 30.0, 'aishub')
+    assert len((await cache.within(50.0, 60.0, 10.0))['mmsi']) == 0
+    assert cache.get_stats()['out_of_order_count'] == 2
+
+
+@pytest.mark.asyncio
+async def test_within_and_bbox(cache):
+    now = time.time()
+    await cache.update_batch(make_batch(
+        [1, 2, 3, 4, 5],
+        [0.0, 0.0, 0.5, -10.0, -10.5],
+        [0.0, 0.1, 0.0, 179.5, -179.5],
+        [now] * 5
+    ))
+
+    near = await cache.within(0.0, 0.0, 60.0)
+    assert near['mmsi'].tolist() == [1, 2, 3]
+    assert (await cache.within(0.0, 0.0, 60.0, limit=2))['mmsi'].tolist() == [1, 2]
+
+    box = await cache.in_bbox(north=1.0, south=-1.0, east=0.05, west=-0.05)
+    assert sorted(box['mmsi'].tolist()) == [1, 3]
+
+    # West of east crosses the antimeridian
+    dateline = await cache.in_bbox(north=-9.0, south=-11.0, east=-179.0, west=179.0)
+    assert sorted(dateline['mmsi'].tolist()) == [4, 5]
+    assert len((await cache.in_bbox(north=-9.0, south=-11.0, east=-179.0, west=179.0, limit=1))['mmsi']) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_members_are_pruned_and_do_not_shorten_limits(cache):
+    now = time.time()
+    await cache.update_batch(make_batch([1, 2, 3], [0.0, 0.01, 0.02], [0.0, 0.0, 0.0],
+                                        [now - 7200, now - 7100, now]))
+    # Expired hashes whose index members were not pruned yet
+    for mmsi in (1, 2):
+        cache.client.expires[cache._key(mmsi)] = now - 1
+
+    assert (await cache.snapshot(1))['mmsi'].tolist() == [3]
+    assert (await cache.within(0.0, 0.0, 10.0, limit=1))['mmsi'].tolist() == [3]
+
+    assert await cache.prune() == 2
+    assert sorted(cache.client.zsets[cache.ts_key]) == ['3']
+    assert sorted(cache.client.geo[cache.geo_key]) == ['3']
+    assert cache.get_stats()['pruned_count'] == 2
+
+
+@pytest.mark.asyncio
+async def test_manager_schedules_pruning(cache, monkeypatch):
+    monkeypatch.setattr(settings, 'spool_enabled', False)
+    await cache.update_batch(make_batch([1], [0.0], [0.0], [time.time() - 7200]))
+
+    manager = AISCollectorManager(position_cache=cache)
+    await manager.start_all()
+    try:
+        for _ in range(100):
+            if cache.pruned_count:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await manager.stop_all()
+
+    assert cache.pruned_count == 1
+    assert cache.client.zsets[cache.ts_key] == {}
+    assert manager._cache_prune_task is None
@@ -0,0 +1,61 @@
+"""
+Back-pressure of the bulk position sink on the event loop
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.data_ingestion.position_sink import PositionPersistenceSink, synthetic_position_batch
+
+
+@pytest.mark.asyncio
+async def test_backpressure_does_not_block_event_loop(tmp_path):
+    sink = PositionPersistenceSink(f"sqlite:///{tmp_path / 'positions.db'}", batch_size=1000,
+                                   max_pending_batches=1, create_tables=True)
+    write = sink._write
+
+    def slow_write(table, rows):
+        time.sleep(0.1)
+        write(table, rows)
+
+    sink._write = slow_write
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    for seed in range(4):
+        await sink.update_batch(synthetic_position_batch(1000, seed=seed))
+    waited = time.perf_counter() - start
+    task.cancel()
+
+    # The collector waited for the writer, while the loop kept running other tasks
+    assert waited >= 0.15
+    assert ticks >= waited / 0.005 / 4
+
+    sink.close()
+    assert sink.get_stats()['written_rows'] == 4000
+
+
+@pytest.mark.asyncio
+async def test_row_building_errors_are_counted_not_raised(tmp_path):
+    sink = PositionPersistenceSink(f"sqlite:///{tmp_path / 'positions.db'}", batch_size=100,
+                                   max_pending_batches=0, create_tables=True)
+    broken = synthetic_position_batch(100, seed=1)
+    broken.timestamp = None  # fails while building rows
+
+    await sink.update_batch(broken)
+    await sink.update_batch(synthetic_position_batch(100, seed=2))
+    sink.close()
+
+    stats = sink.get_stats()
+    assert stats['error_rows'] == 100
+    assert stats['written_rows'] == 100
@@ -0,0 +1,74 @@
+"""
+Columnar latest-position store and its per-vessel history rings
+"""
+
+import numpy as np
+import pytest
+
+from src.data_ingestion.position_store import PositionStore, select_range
+
+
+def test_latest_view_only_moves_forward():
+    store = PositionStore(initial_capacity=1)
+    store.update_many(mmsi=[1, 2, 1], latitude=[10.0, 20.0, 11.0], longitude=[0.0, 0.0, 0.0],
+                      timestamp=[100.0, 100.0, 200.0], speed_over_ground=[5.0, None, 6.0],
+                      data_source='aishub')
+    # A late report is added to the history, not the latest view
+    store.update_many(mmsi=[1], latitude=[99.0], longitude=[0.0], timestamp=[150.0], data_source='late')
+
+    assert len(store) == 2 and 3 not in store
+    latest = store.get(1)
+    assert (latest['latitude'], latest['speed_over_ground'], latest['data_source']) == (11.0, 6.0, 'aishub')
+    assert np.isnan(store.get(2)['speed_over_ground'])
+    assert store.get(3) is None
+    assert store.recent(1)['latitude'].tolist() == [10.0, 99.0, 11.0]
+
+
+def test_history_ring_keeps_newest_reports():
+    store = PositionStore(history_depth=4)
+    store.update_many(mmsi=[7] * 3, latitude=[0.0, 1.0, 2.0], longitude=[0.0] * 3, timestamp=[0.0, 1.0, 2.0])
+    store.update_many(mmsi=[7] * 3, latitude=[3.0, 4.0, 5.0], longitude=[0.0] * 3, timestamp=[3.0, 4.0, 5.0])
+
+    assert store.recent(7)['latitude'].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert store.recent(7, start=3.0, end=4.0)['timestamp'].tolist() == [3.0, 4.0]
+    assert store.recent(7, limit=2)['timestamp'].tolist() == [4.0, 5.0]
+    assert store.recent(7, limit=0)['timestamp'].tolist() == []
+    assert store.recent(8) is None
+
+
+def test_revisions_change_only_for_touched_vessels():
+    store = PositionStore()
+    store.update_many(mmsi=[1, 2], latitude=[0.0, 0.0], longitude=[0.0, 0.0], timestamp=[0.0, 0.0])
+    first = store.revision_of(1), store.revision_of(2)
+    store.update_many(mmsi=[2], latitude=[1.0], longitude=[0.0], timestamp=[1.0])
+
+    assert store.revision_of(1) == first[0]
+    assert store.revision_of(2) > first[1]
+    assert store.revision_of(3) == 0
+
+
+def test_snapshot_and_spatial_queries():
+    store = PositionStore(grid_cell_size=1.0)
+    store.update_many(mmsi=[1, 2, 3], latitude=[0.5, 0.5, -10.0], longitude=[0.5, 179.9, -179.9],
+                      timestamp=[0.0, 0.0, 0.0])
+    # Vessel 1 moves to another cell
+    store.update_many(mmsi=[1], latitude=[-10.0], longitude=[179.5], timestamp=[1.0])
+
+    assert store.snapshot()['mmsi'].tolist() == [1, 2, 3]
+    assert store.snapshot(2)['mmsi'].tolist() == [1, 2]
+    in_box = store.select(store.rows_in_bbox(north=-9.0, south=-11.0, east=-179.0, west=179.0))
+    assert sorted(in_box['mmsi'].tolist()) == [1, 3]
+    assert store.select(store.rows_within(0.5, 179.9, 30.0))['mmsi'].tolist() == [2]
+
+
+@pytest.mark.parametrize('start, end, limit, expected', [
+    (None, None, None, [0.0, 1.0, 2.0, 3.0]),
+    (1.0, 2.0, None, [1.0, 2.0]),
+    (1.0, None, 2, [2.0, 3.0]),
+    (None, None, 0, []),
+])
+def test_select_range(start, end, limit, expected):
+    columns = {'timestamp': np.arange(4.0), 'latitude': np.arange(4.0) * 10}
+    selected = select_range(columns, start, end, limit)
+    assert selected['timestamp'].tolist() == expected
+    assert selected['latitude'].tolist() == [value * 10 for value in expected]
@@ -0,0 +1,55 @@
+"""
+Rate limit parsing and the asyncio token bucket
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.data_ingestion.rate_limiter import AsyncTokenBucket, parse_rate_limit
+
+
+@pytest.mark.parametrize('rate_limit, expected', [
+    ("100 requests/minute", 100 / 60.0),
+    ("2000 requests/minute", 2000 / 60.0),
+    ("5 per second", 5.0),
+    ("10/s", 10.0),
+    ("30 calls per minutes", 0.5),
+    ("48 req/days", 48 / 86400.0),
+    ("2 per h", 2 / 3600.0),
+    (120, 2.0),
+    (0, None),
+    (None, None),
+])
+def test_parse_rate_limit(rate_limit, expected):
+    assert parse_rate_limit(rate_limit) == (pytest.approx(expected) if expected is not None else None)
+
+
+@pytest.mark.parametrize('rate_limit', ["10/ms", "10 per fortnight", "ten per second", "10 per hs"])
+def test_unknown_rate_limits_are_rejected(rate_limit):
+    with pytest.raises(ValueError):
+        parse_rate_limit(rate_limit)
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_paced_at_the_rate():
+    bucket = AsyncTokenBucket(rate=50.0, capacity=1.0)
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+
+    # The first token is in the bucket, the other five refill at 50/s
+    assert time.monotonic() - start >= 5 / 50.0 - 0.01
+    assert bucket.get_stats()['acquired_count'] == 6
+    assert not bucket.try_acquire()
+
+
+def test_bucket_is_usable_from_several_event_loops():
+    bucket = AsyncTokenBucket(rate=1000.0, capacity=1.0)
+
+    async def take(count):
+        await asyncio.gather(*(bucket.acquire() for _ in range(count)))
+
+    asyncio.run(take(3))
+    asyncio.run(take(3))
+    assert bucket.acquired_count == 6
@@ -0,0 +1,68 @@
+"""
+Response cache keys, ETags and revalidation
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.api.response_cache import ResponseCache, cached_response
+
+
+def make_client(cache, state):
+    app = FastAPI()
+
+    @app.get("/track")
+    async def track(request: Request):
+        window = (0.0, cache.window_end(state['now']))
+        return cached_response(cache, request, 1, state['revision'],
+                               lambda: f"{state['revision']}:{window[1]}".encode(), 'text/plain',
+                               window=window)
+
+    return TestClient(app)
+
+
+def test_window_end_rounds_up_to_the_ttl():
+    cache = ResponseCache(ttl_seconds=10, max_entries=10)
+    assert cache.window_end(100.0) == 100.0
+    assert cache.window_end(100.5) == 110.0
+    assert cache.window_end(109.9) == 110.0
+
+
+def test_entries_follow_revision_and_time_window():
+    cache = ResponseCache(ttl_seconds=10, max_entries=10)
+    state = {'now': 101.0, 'revision': 1}
+    client = make_client(cache, state)
+
+    first = client.get("/track")
+    assert first.text == "1:110"
+    etag = first.headers['etag']
+    assert client.get("/track", headers={'If-None-Match': etag}).status_code == 304
+
+    # Same bucket, same entry
+    state['now'] = 109.0
+    assert client.get("/track").headers['etag'] == etag
+    assert cache.get_stats()['hit_count'] == 2
+
+    # The window moved on: new body and ETag
+    state['now'] = 111.0
+    moved = client.get("/track", headers={'If-None-Match': etag})
+    assert moved.status_code == 200
+    assert moved.text == "1:120"
+    assert moved.headers['etag'] != etag
+
+    # New positions invalidate the entry
+    state['revision'] = 2
+    assert client.get("/track").text == "2:120"
+    assert cache.get_stats()['invalidated_count'] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    for key in ('a', 'b'):
+        cache.put(key, 1, 1, b'x')
+    assert cache.get('a', 1) is not None
+    cache.put('c', 1, 1, b'x')
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) is not None
+    assert cache.get_stats()['evicted_count'] == 1
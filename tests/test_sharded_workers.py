@@ -0,0 +1,93 @@
+"""
+Collectors running in worker processes under the sharded manager
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.config import settings
+from src.data_ingestion.base_collector import BaseAISCollector
+from src.data_ingestion.conflation import PositionConflator
+from src.data_ingestion.kafka_publisher import BatchingKafkaPublisher
+from src.data_ingestion.position_store import PositionStore
+from src.data_ingestion.sharded_workers import ShardedCollectorManager
+from src.data_ingestion.vessel_registry import VesselRegistry
+from src.models.vessel import VesselPositionCreate
+
+START = datetime(2024, 1, 1)
+
+
+class SingleMessageCollector(BaseAISCollector):
+    """Yields one raw message at a time, like a websocket feed"""
+
+    def __init__(self, count: int, source_name: str = 'stream'):
+        super().__init__(source_name)
+        self.count = count
+
+    async def collect_data(self):
+        for i in range(self.count):
+            yield {'mmsi': 200000000 + i, 'lat': 10.0 + i / 100, 'lon': 20.0, 'offset': i}
+
+    def parse_message(self, raw_message):
+        timestamp = START + timedelta(seconds=raw_message['offset'])
+        return VesselPositionCreate(mmsi=raw_message['mmsi'], latitude=raw_message['lat'],
+                                    longitude=raw_message['lon'], speed_over_ground=12.5,
+                                    timestamp=timestamp, message_timestamp=timestamp,
+                                    data_source=self.source_name)
+
+
+@pytest.mark.asyncio
+async def test_single_message_collector_runs_in_workers(monkeypatch):
+    monkeypatch.setattr(settings, 'spool_enabled', False)
+    store = PositionStore()
+    manager = ShardedCollectorManager(position_store=store, vessel_registry=VesselRegistry(),
+                                      conflator=PositionConflator(), flush_interval=0.05)
+    manager.add_sharded('stream', SingleMessageCollector, 2, 50)
+
+    await manager.start_all()
+    await manager.stop_all()
+
+    assert len(store) == 50
+    latest = store.get(200000007)
+    assert latest['latitude'] == pytest.approx(10.07)
+    assert latest['speed_over_ground'] == pytest.approx(12.5)
+    assert latest['data_source'] == 'stream'
+    workers = manager.get_status()['workers']
+    assert sorted(worker['row_count'] for worker in workers.values()) == [25, 25]
+
+
+class RecordingProducer:
+    def __init__(self):
+        self.records = []
+
+    def send(self, topic, value, key=None):
+        self.records.append((topic, key, value))
+
+    def flush(self, timeout=None):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_parent_publishes_conflated_worker_batches(monkeypatch):
+    monkeypatch.setattr(settings, 'spool_enabled', False)
+    producers = {}
+
+    def create_publisher(source_name):
+        producers[source_name] = RecordingProducer()
+        return BatchingKafkaPublisher(producers[source_name], linger_ms=5)
+
+    manager = ShardedCollectorManager(position_store=PositionStore(), vessel_registry=VesselRegistry(),
+                                      conflator=PositionConflator(), flush_interval=0.05)
+    monkeypatch.setattr(manager, '_create_publisher', create_publisher)
+    # Two sources reporting the same vessels at the same times
+    manager.add_worker('first', SingleMessageCollector, 20, 'first')
+    manager.add_worker('second', SingleMessageCollector, 20, 'second')
+
+    await manager.start_all()
+    await manager.stop_all()
+
+    published = [record for producer in producers.values() for record in producer.records]
+    assert len(published) == 20
+    assert sorted(int(key) for _, key, _ in published) == list(range(200000000, 200000020))
+    assert manager.conflator.get_stats()['dropped_count'] == 20
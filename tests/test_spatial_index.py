@@ -0,0 +1,66 @@
+"""
+Spatial grid index against brute-force box and radius filters
+"""
+
+import numpy as np
+import pytest
+
+from src.core.geo import haversine_nm
+from src.data_ingestion.spatial_index import SpatialGridIndex
+
+
+@pytest.fixture
+def fleet():
+    rng = np.random.default_rng(7)
+    n = 5000
+    latitude = rng.uniform(-85.0, 85.0, n)
+    longitude = rng.uniform(-180.0, 180.0, n)
+    index = SpatialGridIndex(cell_size=2.0)
+    index.update(np.arange(n), latitude, longitude)
+    # Move half the fleet, some within their cell and some across cells
+    moved = np.arange(0, n, 2)
+    latitude[moved] += rng.uniform(-3.0, 3.0, len(moved))
+    longitude[moved] = (longitude[moved] + rng.uniform(-3.0, 3.0, len(moved)) + 180.0) % 360.0 - 180.0
+    index.update(moved, latitude[moved], longitude[moved])
+    return index, latitude, longitude
+
+
+@pytest.mark.parametrize('north, south, east, west', [
+    (10.0, -10.0, 20.0, -20.0),
+    (60.0, 59.0, 5.5, 5.0),
+    (30.0, -30.0, -170.0, 170.0),  # across the antimeridian
+    (90.0, -90.0, 180.0, -180.0),
+])
+def test_bbox_matches_brute_force(fleet, north, south, east, west):
+    index, latitude, longitude = fleet
+    inside = (latitude >= south) & (latitude <= north)
+    if west <= east:
+        inside &= (longitude >= west) & (longitude <= east)
+    else:
+        inside &= (longitude >= west) | (longitude <= east)
+
+    rows = index.query_bbox(north, south, east, west, latitude, longitude)
+    assert sorted(rows.tolist()) == np.flatnonzero(inside).tolist()
+
+
+@pytest.mark.parametrize('lat, lon, radius_nm', [
+    (0.0, 0.0, 300.0),
+    (45.0, 179.0, 500.0),
+    (84.0, 10.0, 400.0),
+])
+def test_radius_matches_brute_force(fleet, lat, lon, radius_nm):
+    index, latitude, longitude = fleet
+    expected = np.flatnonzero(haversine_nm(lat, lon, latitude, longitude) <= radius_nm)
+
+    rows = index.query_radius(lat, lon, radius_nm, latitude, longitude)
+    assert sorted(rows.tolist()) == expected.tolist()
+
+
+def test_rows_without_coordinates_leave_the_index():
+    index = SpatialGridIndex(cell_size=1.0)
+    index.update(np.array([0, 1]), np.array([0.5, 0.5]), np.array([0.5, 0.6]))
+    assert len(index) == 2 and index.occupied_cells == 1
+
+    index.update(np.array([0]), np.array([np.nan]), np.array([np.nan]))
+    assert len(index) == 1
+    assert index.candidate_rows(1.0, 0.0, 1.0, 0.0).tolist() == [1]
@@ -0,0 +1,78 @@
+"""
+Spool size limit and replay from the collector manager
+"""
+
+import asyncio
+
+import pytest
+
+from src.core.config import settings
+from src.data_ingestion import ais_collectors
+from src.data_ingestion.ais_collectors import AISCollectorManager
+from src.data_ingestion.spool import SpoolWriter, get_spool_writer, read_segment
+
+
+class RecordingSink:
+    def __init__(self):
+        self.records = []
+        self.flush_count = 0
+
+    def send(self, topic, value, key=None):
+        self.records.append((topic, key, value))
+
+    def flush(self, timeout=None):
+        self.flush_count += 1
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'spool_dir', str(tmp_path))
+    monkeypatch.setattr(settings, 'spool_enabled', True)
+    monkeypatch.setattr(settings, 'spool_replay_interval', 0.01)
+    get_spool_writer.cache_clear()
+    yield tmp_path
+    get_spool_writer.cache_clear()
+
+
+def test_writer_drops_oldest_segments_over_max_bytes(tmp_path):
+    writer = SpoolWriter(str(tmp_path), segment_bytes=1000, max_bytes=3000)
+    value = b'x' * 80
+    for i in range(200):
+        writer.send('ais_data', value=value, key=str(i).encode())
+    writer.roll()
+
+    on_disk = sum(path.stat().st_size for path in writer.segments())
+    assert on_disk <= 3000
+    assert writer.dropped_segments > 0
+    assert writer.dropped_bytes + on_disk == writer.byte_count + writer.segment_count * 8
+
+    # Only the newest records survive, still in order
+    keys = [int(key) for path in writer.segments() for _, key, _ in read_segment(path)]
+    assert keys == list(range(200 - len(keys), 200))
+    assert writer.get_stats()['dropped_bytes'] == writer.dropped_bytes
+
+
+@pytest.mark.asyncio
+async def test_manager_drains_spools_into_kafka(spool_dir, monkeypatch):
+    sink = RecordingSink()
+    monkeypatch.setattr(ais_collectors, 'create_kafka_producer', lambda: sink)
+
+    # Left over from an earlier run
+    writer = get_spool_writer('aishub')
+    for i in range(10):
+        writer.send('ais_data', value=b'{}', key=str(i).encode())
+    writer.roll()
+
+    manager = AISCollectorManager()
+    await manager.start_all()
+    try:
+        for _ in range(100):
+            if len(sink.records) == 10:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await manager.stop_all()
+
+    assert [key for _, key, _ in sink.records] == [str(i).encode() for i in range(10)]
+    assert writer.segments() == []
+    assert manager.spool_replayers['aishub'].replayed_records == 10
@@ -0,0 +1,59 @@
+"""
+Streamed NDJSON position responses
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from src.api.streaming import iter_ndjson, streaming_response
+from src.data_ingestion.position_store import PositionStore, to_epoch
+from src.models.vessel import VesselPositionResponse
+
+
+def history(n):
+    return {
+        'latitude': np.linspace(0.0, 1.0, n),
+        'longitude': np.zeros(n),
+        'course_over_ground': np.full(n, np.nan),
+        'speed_over_ground': np.full(n, 12.5),
+        'true_heading': np.full(n, 90.0),
+        'navigation_status': np.array([0] + [-1] * (n - 1), dtype=np.int8),
+        'timestamp': to_epoch(datetime(2024, 1, 1)) + np.arange(n) * 0.5,
+    }
+
+
+def read_lines(chunks):
+    return [json.loads(line) for chunk in chunks for line in chunk.decode().splitlines()]
+
+
+def test_ndjson_rows_match_json_responses():
+    columns = history(5)
+    rows = read_lines(iter_ndjson(columns, PositionStore(), mmsi=200000001, data_source='aishub', chunk_rows=2))
+
+    assert len(rows) == 5
+    assert rows[0]['navigation_status'] == 'under_way_using_engine'
+    assert rows[1]['navigation_status'] is None
+    assert rows[0]['course_over_ground'] is None
+    # Timestamps are ISO strings, like FastAPI encodes the response models
+    assert [row['timestamp'] for row in rows[:2]] == ['2024-01-01T00:00:00', '2024-01-01T00:00:00.500000']
+    timestamp = datetime(2024, 1, 1, 0, 0, 0, 500000)
+    model = VesselPositionResponse(id=0, vessel_id=0, created_at=timestamp, message_timestamp=timestamp,
+                                   received_timestamp=timestamp, **dict(rows[1], timestamp=timestamp))
+    assert jsonable_encoder(model)['timestamp'] == rows[1]['timestamp']
+
+
+def test_streamed_columns_are_copied_before_sending():
+    columns = history(3)
+    response = streaming_response('ndjson', columns, PositionStore(), mmsi=200000001, data_source='aishub')
+    # The store keeps being written while the response is sent
+    columns['latitude'][:] = 99.0
+
+    async def body():
+        return [chunk async for chunk in response.body_iterator]
+
+    rows = read_lines(asyncio.run(body()))
+    assert [row['latitude'] for row in rows] == [0.0, 0.5, 1.0]
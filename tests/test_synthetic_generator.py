@@ -0,0 +1,64 @@
+"""
+Vectorized synthetic position generation
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from src.core.geo import haversine_nm
+from src.data_ingestion.position_batch import PositionBatch
+from src.data_ingestion.position_store import to_epoch
+from src.data_ingestion.synthetic_generator import SyntheticDataGenerator
+
+START = datetime(2024, 1, 1)
+
+
+def test_fleet_arrays_extend_past_the_vessel_database():
+    generator = SyntheticDataGenerator(seed=1, num_vessels=30)
+    fleet = generator.fleet_arrays(3000)
+
+    assert len(fleet['mmsi']) == 3000
+    assert len(np.unique(fleet['mmsi'])) == 3000
+    assert fleet['mmsi'][:30].tolist() == [vessel['mmsi'] for vessel in generator.vessel_database]
+    assert np.count_nonzero(fleet['is_tanker'][30:]) == 2970 - 2970 * 2 // 3
+    assert len(generator.fleet_arrays(10)['mmsi']) == 10
+
+
+def test_position_arrays_are_time_major_tracks():
+    generator = SyntheticDataGenerator(seed=1, num_vessels=30)
+    batch = generator.generate_position_arrays(500, time_steps=4, start_time=START, interval_seconds=60.0)
+
+    assert isinstance(batch, PositionBatch) and len(batch) == 2000
+    timestamps = batch.timestamp.reshape(4, 500)
+    assert np.all(timestamps == to_epoch(START) + 60.0 * np.arange(4)[:, None])
+    mmsi = batch.mmsi.reshape(4, 500)
+    assert np.all(mmsi == mmsi[0])
+    assert len(np.unique(mmsi[0])) == 500
+
+    assert np.all(np.abs(batch.latitude) <= 90) and np.all(np.abs(batch.longitude) <= 180)
+    # A one-minute step covers no more ground than the fastest class (25 kn) allows
+    lat, lon = batch.latitude.reshape(4, 500), batch.longitude.reshape(4, 500)
+    step_nm = haversine_nm(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    assert np.all(step_nm <= 25.0 / 60.0)
+    assert np.all(step_nm > 0)
+
+
+def test_generation_is_reproducible_with_a_seed():
+    first = SyntheticDataGenerator(seed=3, num_vessels=30).generate_position_arrays(200, 2, START)
+    second = SyntheticDataGenerator(seed=3, num_vessels=30).generate_position_arrays(200, 2, START)
+    assert np.array_equal(first.mmsi, second.mmsi)
+    assert np.array_equal(first.timestamp, second.timestamp)
+    # Routes are anchored at construction time, so positions differ by microseconds of travel
+    assert np.allclose(first.latitude, second.latitude, atol=1e-4)
+    assert np.allclose(first.longitude, second.longitude, atol=1e-4)
+    assert np.allclose(first.speed_over_ground, second.speed_over_ground, atol=1e-3)
+
+
+def test_iter_position_batches_covers_every_step():
+    generator = SyntheticDataGenerator(seed=1, num_vessels=30)
+    batches = list(generator.iter_position_batches(100, time_steps=25, start_time=START, steps_per_batch=10))
+
+    assert [len(batch) for batch in batches] == [1000, 1000, 500]
+    timestamps = np.concatenate([batch.timestamp for batch in batches])
+    assert np.unique(timestamps).tolist() == (to_epoch(START) + 60.0 * np.arange(25)).tolist()
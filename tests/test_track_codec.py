@@ -0,0 +1,90 @@
+"""
+Compact delta-encoded track format round trips
+"""
+
+import numpy as np
+import pytest
+
+from src.data_ingestion.position_store import POSITION_COLUMNS
+from src.data_ingestion.track_codec import decode_track, encode_track, varint_decode, varint_encode
+
+# Codec resolution per column
+RESOLUTION = {
+    'timestamp': 1e-3,
+    'latitude': 1e-6,
+    'longitude': 1e-6,
+    'speed_over_ground': 0.1,
+    'course_over_ground': 0.1,
+    'true_heading': 0.1,
+    'navigation_status': 0,
+}
+
+
+def track(n, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {
+        'timestamp': 1700000000.0 + np.cumsum(rng.choice([60.0, 60.0, 61.5], n)),
+        'latitude': -33.0 + np.cumsum(rng.normal(0, 0.01, n)),
+        'longitude': 179.99 + np.cumsum(rng.normal(0, 0.01, n)),
+        'speed_over_ground': rng.uniform(0, 25, n),
+        'course_over_ground': rng.uniform(0, 360, n),
+        'true_heading': rng.uniform(0, 360, n),
+        'navigation_status': rng.integers(-1, 15, n),
+    }
+    columns['speed_over_ground'][::7] = np.nan
+    columns['true_heading'][:] = np.nan
+    return {name: values.astype(POSITION_COLUMNS[name]) for name, values in columns.items()}
+
+
+def assert_round_trip(columns, decoded):
+    for name, values in columns.items():
+        assert decoded[name].dtype == POSITION_COLUMNS[name]
+        present = slice(None)
+        if values.dtype.kind == 'f':
+            assert np.array_equal(np.isnan(decoded[name]), np.isnan(values)), name
+            present = ~np.isnan(values)
+        error = np.abs(decoded[name][present].astype(np.float64) - values[present].astype(np.float64))
+        # Half a step of the fixed-point resolution, plus float32 rounding
+        assert np.all(error <= RESOLUTION[name] / 2 + 1e-4 * (values.dtype == np.float32)), name
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 500])
+def test_round_trip(n):
+    columns = track(n)
+    decoded, mmsi, data_source = decode_track(encode_track(columns, 200000001, 'aishub'))
+
+    assert (mmsi, data_source) == (200000001, 'aishub')
+    assert all(len(values) == n for values in decoded.values())
+    assert_round_trip(columns, decoded)
+
+
+def test_regular_tracks_are_compact():
+    columns = track(1000)
+    columns['timestamp'] = 1700000000.0 + 60.0 * np.arange(1000)
+    columns['navigation_status'][:] = 0
+    data = encode_track(columns, 1)
+
+    decoded, _, data_source = decode_track(data)
+    assert data_source is None
+    assert np.array_equal(decoded['timestamp'], columns['timestamp'])
+    assert np.all(decoded['navigation_status'] == 0)
+    assert len(data) / 1000 < 12
+
+
+def test_out_of_order_rows_keep_their_order():
+    columns = track(50)
+    order = np.random.default_rng(1).permutation(50)
+    shuffled = {name: values[order] for name, values in columns.items()}
+    assert_round_trip(shuffled, decode_track(encode_track(shuffled, 1))[0])
+
+
+def test_varints_round_trip_the_full_range():
+    values = np.array([0, 1, 127, 128, 300, 2 ** 32, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64)
+    assert np.array_equal(varint_decode(varint_encode(values), len(values)), values)
+    with pytest.raises(ValueError):
+        varint_decode(varint_encode(values), len(values) + 1)
+
+
+def test_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        decode_track(b'not a track')
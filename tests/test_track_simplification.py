@@ -0,0 +1,70 @@
+"""
+Vectorized Ramer-Douglas-Peucker track simplification against a recursive reference
+"""
+
+import numpy as np
+import pytest
+
+from src.core.geo import _local_xy, rdp_importance, simplify_track, zoom_tolerance_nm
+
+
+def reference_rdp(x, y, tolerance):
+    """Textbook recursive RDP on projected coordinates"""
+    keep = {0, len(x) - 1}
+
+    def split(start, end):
+        if end - start < 2:
+            return
+        ax, ay, dx, dy = x[start], y[start], x[end] - x[start], y[end] - y[start]
+        chord = np.hypot(dx, dy)
+        interior = np.arange(start + 1, end)
+        if chord > 0:
+            distance = np.abs(dx * (ay - y[interior]) - dy * (ax - x[interior])) / chord
+        else:
+            distance = np.hypot(x[interior] - ax, y[interior] - ay)
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            keep.add(start + 1 + farthest)
+            split(start, start + 1 + farthest)
+            split(start + 1 + farthest, end)
+
+    split(0, len(x) - 1)
+    return sorted(keep)
+
+
+def random_track(seed, n=400):
+    rng = np.random.default_rng(seed)
+    lat = 30.0 + np.cumsum(rng.normal(0, 0.02, n))
+    lon = 179.0 + np.cumsum(rng.normal(0.01, 0.02, n))
+    return lat, (lon + 180.0) % 360.0 - 180.0  # crosses the antimeridian
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('tolerance', [0.1, 0.5, 2.0, 10.0])
+def test_tolerance_matches_recursive_rdp(seed, tolerance):
+    lat, lon = random_track(seed)
+    x, y = _local_xy(lat, lon)
+    assert simplify_track(lat, lon, tolerance_nm=tolerance).tolist() == reference_rdp(x, y, tolerance)
+
+
+def test_point_budget_keeps_the_most_significant_points():
+    lat, lon = random_track(3)
+    importance = rdp_importance(lat, lon)
+
+    kept = simplify_track(lat, lon, max_points=50)
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == len(lat) - 1
+    assert importance[kept].min() >= np.delete(importance, kept).max()
+    # Budgets are nested
+    assert set(simplify_track(lat, lon, max_points=20)) <= set(kept)
+
+
+def test_short_and_straight_tracks():
+    assert simplify_track([0.0, 1.0], [0.0, 1.0], tolerance_nm=1.0).tolist() == [0, 1]
+    line = np.linspace(0.0, 1.0, 20)
+    assert simplify_track(line, line, tolerance_nm=0.01).tolist() == [0, 19]
+
+
+def test_zoom_tolerance_halves_per_level():
+    assert zoom_tolerance_nm(0) == pytest.approx(0.5 * 360 * 60 / 256)
+    assert zoom_tolerance_nm(11) == pytest.approx(zoom_tolerance_nm(10) / 2)
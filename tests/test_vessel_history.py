@@ -0,0 +1,58 @@
+"""
+Vessel history served from the store ring, falling back to the position archive
+"""
+
+import numpy as np
+import pytest
+
+from src.api.routes import vessels
+from src.data_ingestion.position_archive import PositionArchive
+from src.data_ingestion.position_batch import PositionBatch
+from src.data_ingestion.position_store import PositionStore
+
+MMSI = 200000001
+DAY = 86400.0
+START = 1700006400.0  # 2023-11-15 00:00 UTC
+
+
+def hourly_batch(start, hours):
+    timestamps = start + 3600.0 * np.arange(hours)
+    return PositionBatch(mmsi=np.full(hours, MMSI), latitude=np.linspace(0.0, 1.0, hours),
+                         longitude=np.zeros(hours), timestamp=timestamps, data_source='aishub')
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    archive = PositionArchive(str(tmp_path))
+    # Two archived days, then the live ring from the third
+    archive.write([hourly_batch(START, 48)])
+    store = PositionStore()
+    store.update_batch(hourly_batch(START + 2 * DAY, 12))
+
+    monkeypatch.setattr(vessels, 'position_store', store)
+    monkeypatch.setattr(vessels, 'position_history', None)
+    monkeypatch.setattr(vessels, 'position_archive', archive)
+    return archive
+
+
+def test_ring_alone_serves_ranges_it_covers(history):
+    columns = vessels._vessel_history(MMSI, START + 2 * DAY + 3600)
+    assert len(columns['timestamp']) == 11
+
+
+def test_older_ranges_are_read_from_the_archive(history):
+    columns = vessels._vessel_history(MMSI, START + DAY + 12 * 3600)
+    timestamps = columns['timestamp']
+    assert len(timestamps) == 12 + 12
+    assert np.all(np.diff(timestamps) == 3600.0)
+    assert timestamps[0] == START + DAY + 12 * 3600
+
+    # The limit keeps the newest rows across both sources
+    limited = vessels._vessel_history(MMSI, START, limit=20)
+    assert limited['timestamp'][0] == START + 2 * DAY - 8 * 3600
+    assert limited['timestamp'][-1] == START + 2 * DAY + 11 * 3600
+
+
+def test_archive_is_not_read_when_disabled(history, monkeypatch):
+    monkeypatch.setattr(vessels, 'position_archive', None)
+    assert len(vessels._vessel_history(MMSI, START)['timestamp']) == 12
@@ -0,0 +1,51 @@
+"""
+Vessel master data registry and its secondary indexes
+"""
+
+from datetime import datetime
+
+from src.data_ingestion.vessel_registry import VesselRegistry
+from src.models.vessel import VesselType
+
+
+def test_upsert_merges_without_overwriting_known_values():
+    registry = VesselRegistry()
+    registry.upsert({'mmsi': '200000001', 'vessel_name': 'EVER GIVEN', 'flag_country': 'PA'})
+    registry.upsert({'mmsi': 200000001, 'vessel_name': None, 'length': 400.0})
+
+    record = registry.get(200000001)
+    assert record == {'mmsi': 200000001, 'vessel_name': 'EVER GIVEN', 'flag_country': 'PA', 'length': 400.0}
+    assert 200000001 in registry and len(registry) == 1
+    assert registry.get(200000002) is None
+
+
+def test_find_uses_and_maintains_the_indexes():
+    registry = VesselRegistry()
+    registry.upsert_many([
+        {'mmsi': 1, 'vessel_type': VesselType.TANKER, 'flag_country': 'SG'},
+        {'mmsi': 2, 'vessel_type': VesselType.CARGO, 'flag_country': 'SG'},
+        {'mmsi': 3, 'vessel_type': VesselType.TANKER, 'flag_country': 'NO'},
+        {'mmsi': 4, 'vessel_type': 'tanker', 'flag_country': 'SG'},
+    ])
+
+    assert [v['mmsi'] for v in registry.find(vessel_type=VesselType.TANKER)] == [1, 3, 4]
+    assert [v['mmsi'] for v in registry.find(vessel_type='tanker', flag_country='SG')] == [1, 4]
+    assert [v['mmsi'] for v in registry.find(flag_country='SG', limit=2)] == [1, 2]
+    assert registry.find(flag_country='US') == []
+    assert len(registry.find()) == 4
+
+    # Changing an indexed field moves the vessel between index entries
+    registry.upsert({'mmsi': 3, 'flag_country': 'SG', 'vessel_type': VesselType.CARGO})
+    assert registry.counts('flag_country') == {'SG': 4}
+    assert registry.counts('vessel_type') == {'tanker': 2, 'cargo': 2}
+
+
+def test_observe_tracks_first_and_last_sightings():
+    registry = VesselRegistry()
+    first, later = datetime(2024, 1, 1), datetime(2024, 1, 2)
+    registry.observe_many([5, 6], data_source='aishub', timestamp=first)
+    registry.observe(5, data_source='datalastic', timestamp=later)
+
+    record = registry.get(5)
+    assert (record['first_seen'], record['last_seen'], record['data_source']) == (first, later, 'datalastic')
+    assert registry.get(6)['last_seen'] == first